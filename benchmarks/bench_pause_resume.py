@@ -0,0 +1,174 @@
+# Path: benchmarks/bench_pause_resume.py
+"""
+Đo Pause/Resume của một CabinSession (chạy trong process, không cần server):
+- pause: lệnh pause -> audio ngừng vào pipeline; release: -> source đã dừng capture
+- resume: lệnh resume -> chunk đầu tiên vào AudioQueue, và lượng pre-roll được giữ lại
+- CPU của process trong lúc Pause (mic vẫn chạy ở standby vs đã release)
+
+Mặc định dùng mic giả lập (PCM tổng hợp theo nhịp thời gian thực, --start-latency mô phỏng
+thời gian start lại stream của thiết bị). --mic dùng microphone thật qua PortAudio.
+
+Usage:
+    python benchmarks/bench_pause_resume.py [--cycles 10] [--pause 1.0]
+    python benchmarks/bench_pause_resume.py --mic --device 3
+"""
+import argparse
+import asyncio
+import math
+import resource
+import statistics
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Generator, List
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from starlette.websockets import WebSocketState  # noqa: E402
+
+from cabin_app.config import get_settings  # noqa: E402
+from cabin_app.audio_sources import AudioSource, MicrophoneSource  # noqa: E402
+from cabin_app.services import stt_registry, translation_registry  # noqa: E402
+from cabin_app.session import CabinSession  # noqa: E402
+
+settings = get_settings()
+settings.JOURNAL_ENABLED = False
+
+
+class SimulatedMic(AudioSource):
+    """Thiết bị giả: chunk theo nhịp thời gian thực, suspend() dừng hẳn, resume() tốn start_latency giây"""
+    name = "sim-mic"
+
+    def __init__(self, start_latency: float) -> None:
+        self.start_latency = start_latency
+        self.reads = 0  # Số chunk đã thu (để thấy source có thật sự ngừng khi Pause)
+        self._closed = threading.Event()
+        self._clock = time.monotonic()
+
+    def chunks(self) -> Generator[bytes, None, None]:
+        chunk_seconds = settings.CHUNK_SIZE / settings.RATE
+        phase = 0
+        while not self._closed.is_set():
+            self._clock += chunk_seconds
+            delay = self._clock - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            samples = [int(3000 * math.sin(2 * math.pi * 220 * (phase + i) / settings.RATE)) for i in range(settings.CHUNK_SIZE)]
+            phase += settings.CHUNK_SIZE
+            self.reads += 1
+            yield struct.pack(f"<{len(samples)}h", *samples)
+
+    def suspend(self) -> bool:
+        return True
+
+    def resume(self) -> None:
+        time.sleep(self.start_latency)
+        self._clock = time.monotonic()  # Thiết bị thu lại từ bây giờ, không bù phần đã dừng
+
+    def close(self) -> None:
+        self._closed.set()
+
+
+class NullWebSocket:
+    """Đủ cho CabinSession.send / close: bỏ mọi message"""
+    client_state = WebSocketState.DISCONNECTED
+
+    async def send_json(self, payload: Dict) -> None:
+        pass
+
+    async def send_bytes(self, data: bytes) -> None:
+        pass
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def wait_for(predicate, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError("Capture thread did not reach the expected state")
+        await asyncio.sleep(0.002)
+
+
+async def run_cycles(args: argparse.Namespace, release_after: float) -> Dict[str, List[float]]:
+    settings.PAUSE_RELEASE_AFTER = release_after
+    if args.mic:
+        source: AudioSource = MicrophoneSource(args.device)
+    else:
+        source = SimulatedMic(args.start_latency)
+    transcriber = stt_registry.load("mock")(buffer_duration=5.0)
+    session = CabinSession(
+        NullWebSocket(), source, [transcriber], translation_registry.load("mock")(),
+        fallback_factory=lambda _: translation_registry.load("mock")(), glossary={},
+    )
+    results: Dict[str, List[float]] = {"pause": [], "release": [], "resume": [], "preroll": [], "paused_cpu": [], "paused_reads": []}
+    try:
+        session.resume()
+        await wait_for(lambda: session.capture_state == "running" and session.audio_queue.last_captured_at > 0)
+        await asyncio.sleep(args.talk)
+        for _ in range(args.cycles):
+            session.pause()
+            await wait_for(lambda: session.capture_state in ("standby", "released"))
+            reads = getattr(source, "reads", 0)
+            cpu = cpu_seconds()
+            await asyncio.sleep(args.pause)
+            results["paused_cpu"].append((cpu_seconds() - cpu) / args.pause * 100)
+            results["paused_reads"].append(getattr(source, "reads", 0) - reads)
+            results["pause"].append(session.pause_latency * 1000)
+            if session.capture_state == "released":
+                results["release"].append(session.release_latency * 1000)
+
+            session.resume()
+            await wait_for(lambda: session.capture_state == "running")
+            results["resume"].append(session.resume_latency * 1000)
+            results["preroll"].append(session.preroll_seconds * 1000)
+            await asyncio.sleep(args.talk)
+    finally:
+        await session.close()
+    return results
+
+
+def summarize(values: List[float]) -> str:
+    if not values:
+        return f"{'-':>17}"
+    return f"{statistics.median(values):7.1f} / {max(values):7.1f}"
+
+
+async def run(args: argparse.Namespace) -> None:
+    device = f"microphone {args.device if args.device is not None else 'default'}" if args.mic else \
+        f"simulated mic (start latency {args.start_latency * 1000:.0f} ms)"
+    print(f"{args.cycles} pause/resume cycles, {args.pause:g}s paused each, {device}, chunk {settings.CHUNK_SIZE / settings.RATE * 1000:.0f} ms")
+    print(f"{'mode':>30} | {'pause ms':>17} | {'release ms':>17} | {'resume ms':>17} | {'pre-roll ms':>17} | {'CPU % paused':>12} | {'reads paused':>12}")
+    print(f"{'':>30} | {'median / max':>17} | {'median / max':>17} | {'median / max':>17} | {'median / max':>17} | {'':>12} | {'':>12}")
+    modes = (
+        ("standby (mic hot, pre-roll)", args.pause * 10),  # Không release trong lúc đo
+        ("release immediately", 0.0),
+    )
+    for name, release_after in modes:
+        r = await run_cycles(args, release_after)
+        reads = statistics.mean(r["paused_reads"]) if r["paused_reads"] else 0
+        print(f"{name:>30} | {summarize(r['pause'])} | {summarize(r['release'])} | {summarize(r['resume'])} | "
+              f"{summarize(r['preroll'])} | {statistics.mean(r['paused_cpu']):12.2f} | {reads:12.1f}")
+    print("(reads paused: số chunk source còn thu trong lúc Pause; 0 = thiết bị đã dừng)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pause/resume latency and paused CPU of a cabin session")
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--pause", type=float, default=1.0, help="Seconds paused per cycle")
+    parser.add_argument("--talk", type=float, default=0.5, help="Seconds running between pauses")
+    parser.add_argument("--start-latency", type=float, default=0.02, help="Simulated device restart (s)")
+    parser.add_argument("--mic", action="store_true", help="Dùng microphone thật (PortAudio)")
+    parser.add_argument("--device", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
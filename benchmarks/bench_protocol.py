@@ -0,0 +1,182 @@
+# Path: benchmarks/bench_protocol.py
+"""
+So sánh protocol WebSocket cabin.v1 (JSON, một frame mỗi message) với cabin.v2
+(binary, gom message theo send tick): bytes trên dây (kể cả header frame, có/không
+permessage-deflate) và CPU server cho mỗi message.
+
+- Offline: mã hóa một luồng message tổng hợp (partial, transcript, translation theo batch, overload)
+  đúng như server làm, nén giống permessage-deflate (raw deflate, context takeover, Z_SYNC_FLUSH).
+- --live: chạy server thật, N session với partial transcripts, đo CPU server / message
+  và số frame / bytes client nhận được cho từng protocol.
+
+Usage:
+    python benchmarks/bench_protocol.py [--segments 5000]
+    python benchmarks/bench_protocol.py --live --sessions 16 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import websockets
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from loadtest_cabin import AUDIO_NAME, ServerProcess, write_synthetic_audio  # noqa: E402
+from cabin_app.protocol import PROTOCOL_BINARY, PROTOCOL_JSON, decode_batch, encode_batch  # noqa: E402
+
+Message = Dict[str, object]
+WORDS = ("we deploy the model to production and measure latency across every region so the "
+         "dashboard shows how batching and caching change the tail of the distribution").split()
+
+
+# --- Offline ---
+def synth_ticks(segments: int, seed: int = 3) -> List[List[Message]]:
+    """Luồng message của một session, nhóm theo send tick (các message server phát ra trong cùng một vòng loop)"""
+    rng = random.Random(seed)
+    ticks: List[List[Message]] = []
+    pending_translations: List[Message] = []
+    for seq in range(1, segments + 1):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 18))]
+        for cut in sorted(rng.sample(range(2, len(words)), 3)):  # 3 partial cho mỗi segment
+            ticks.append([{"type": "partial", "text": " ".join(words[:cut]), "stable": " ".join(words[:cut - 2]), "seq": seq}])
+        tick: List[Message] = [{"type": "transcript", "text": " ".join(words), "seq": seq, "latency": round(rng.uniform(0.3, 1.2), 3)}]
+        if seq % 10 == 0:
+            tick.append({"type": "overload", "policy": "drop_oldest", "backlog_seconds": 0.4, "pending_segments": 1,
+                         "dropped_seconds": 0.0, "dropped_segments": 0, "merged_segments": 0, "degraded": False, "behind": False})
+        ticks.append(tick)
+        pending_translations.append({"type": "translation", "text": "Chúng tôi triển khai mô hình " + " ".join(words[:6]),
+                                     "seq": seq, "latency": round(rng.uniform(0.8, 2.5), 3)})
+        # Micro-batch: đôi khi 2-3 bản dịch về cùng lúc (cùng một tick)
+        if rng.random() < 0.6 or len(pending_translations) >= 3:
+            ticks.append(pending_translations)
+            pending_translations = []
+    if pending_translations:
+        ticks.append(pending_translations)
+    return ticks
+
+
+def frame_header(size: int) -> int:
+    """Header frame server -> client (không mask)"""
+    return 2 if size < 126 else 4 if size < 65536 else 10
+
+
+def deflate(compressor: "zlib._Compress", data: bytes) -> bytes:
+    # permessage-deflate: bỏ 4 byte 00 00 ff ff cuối mỗi message
+    return (compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH))[:-4]
+
+
+def measure(ticks: List[List[Message]], frames_of: Callable[[List[Message]], List[bytes]], compress: bool) -> Dict[str, float]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15) if compress else None
+    messages = frames = wire = 0
+    start = time.process_time()
+    for tick in ticks:
+        for frame in frames_of(tick):
+            if compressor is not None:
+                frame = deflate(compressor, frame)
+            frames += 1
+            wire += len(frame) + frame_header(len(frame))
+        messages += len(tick)
+    cpu = time.process_time() - start
+    return {"frames": frames, "wire": wire, "bytes_per_msg": wire / messages, "us_per_msg": cpu / messages * 1e6}
+
+
+def json_frames(tick: List[Message]) -> List[bytes]:
+    # Giống starlette WebSocket.send_json
+    return [json.dumps(m, separators=(",", ":"), ensure_ascii=False).encode("utf-8") for m in tick]
+
+
+def binary_frames(tick: List[Message]) -> List[bytes]:
+    return [encode_batch(tick)]
+
+
+def binary_single_frames(tick: List[Message]) -> List[bytes]:
+    return [encode_batch([m]) for m in tick]
+
+
+def run_offline(args: argparse.Namespace) -> None:
+    ticks = synth_ticks(args.segments)
+    total = sum(len(t) for t in ticks)
+    for tick in ticks[:50]:
+        assert decode_batch(encode_batch(tick)) == [
+            {**m, "latency": round(m["latency"], 3)} if "latency" in m else m for m in tick
+        ]
+    print(f"Offline: {total} messages in {len(ticks)} send ticks ({args.segments} segments, partial transcripts on)")
+    print(f"{'protocol':>26} | {'deflate':>7} | {'frames':>7} | {'wire KB':>8} | {'B/msg':>6} | {'vs v1':>6} | {'CPU µs/msg':>10}")
+    for compress in (False, True):
+        baseline = None
+        for name, frames_of in (("cabin.v1 JSON", json_frames),
+                                ("cabin.v2 binary, no batch", binary_single_frames),
+                                ("cabin.v2 binary, per tick", binary_frames)):
+            r = measure(ticks, frames_of, compress)
+            baseline = baseline or r["wire"]
+            print(f"{name:>26} | {'on' if compress else 'off':>7} | {r['frames']:7d} | {r['wire'] / 1024:8.1f} | "
+                  f"{r['bytes_per_msg']:6.1f} | {r['wire'] / baseline:6.0%} | {r['us_per_msg']:10.2f}")
+
+
+# --- Live ---
+async def live_session(url: str, protocol: str, duration: float, totals: Dict[str, int]) -> None:
+    async with websockets.connect(url, subprotocols=[protocol], max_size=None) as ws:
+        await ws.send(json.dumps({"command": "resume"}))
+        deadline = time.monotonic() + duration
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                raw = await asyncio.wait_for(ws.recv(), remaining)
+            except asyncio.TimeoutError:
+                break
+            totals["frames"] += 1
+            totals["bytes"] += len(raw)
+            totals["messages"] += len(decode_batch(raw)) if isinstance(raw, bytes) else 1
+
+
+async def run_live(args: argparse.Namespace) -> None:
+    work_dir = Path(tempfile.mkdtemp(prefix="cabin-proto-"))
+    write_synthetic_audio(work_dir / AUDIO_NAME, 30.0)
+    server_args = argparse.Namespace(stt_latency=0.05, translation_latency=0.1, latency_sigma=0.0, verbose=args.verbose)
+    server = ServerProcess(args.port, work_dir, server_args)
+    params = f"stt_provider=mock&provider=mock&partial=true&batch=true&buffer=2&source=file:{AUDIO_NAME};pace=realtime;loop=true"
+    url = f"ws://127.0.0.1:{args.port}/ws/cabin?{params}"
+    try:
+        await asyncio.to_thread(server.wait_ready)
+        print(f"Live: {args.sessions} sessions x {args.duration:.0f}s (mock providers, partial transcripts, batch translation)")
+        print(f"{'protocol':>9} | {'messages':>8} | {'frames':>7} | {'KB recv':>8} | {'B/msg':>6} | {'server CPU µs/msg':>17}")
+        for protocol in (PROTOCOL_JSON, PROTOCOL_BINARY):
+            totals = {"frames": 0, "bytes": 0, "messages": 0}
+            cpu_start = server.cpu_seconds()
+            await asyncio.gather(*(live_session(url, protocol, args.duration, totals) for _ in range(args.sessions)))
+            cpu = server.cpu_seconds() - cpu_start
+            messages = max(1, totals["messages"])
+            print(f"{protocol:>9} | {totals['messages']:8d} | {totals['frames']:7d} | {totals['bytes'] / 1024:8.1f} | "
+                  f"{totals['bytes'] / messages:6.1f} | {cpu / messages * 1e6:17.0f}")
+            await asyncio.sleep(1.0)
+        print("(CPU / message gồm cả pipeline mock: STT, VAD, resample; chỉ so sánh tương đối giữa hai protocol)")
+    finally:
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON vs binary WebSocket protocol")
+    parser.add_argument("--segments", type=int, default=5000)
+    parser.add_argument("--live", action="store_true", help="Đo thêm trên server thật")
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--port", type=int, default=18509)
+    parser.add_argument("--verbose", action="store_true", help="Show server logs")
+    args = parser.parse_args()
+
+    run_offline(args)
+    if args.live:
+        print()
+        asyncio.run(run_live(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Path: benchmarks/bench_resampler.py
+"""
+Đo chi phí CPU của AudioConverter (downmix + polyphase resample) trên mỗi giây audio,
+cùng độ phẳng passband / độ chống alias, cho các format thiết bị thường gặp.
+
+Usage:
+    python benchmarks/bench_resampler.py [--seconds 60] [--taps 16 32 64]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from cabin_app.config import get_settings  # noqa: E402
+from cabin_app.resampler import AudioConverter, design_filter_bank  # noqa: E402
+
+settings = get_settings()
+FORMATS: List[Tuple[int, int]] = [(48000, 2), (48000, 1), (44100, 2), (44100, 1), (32000, 1), (16000, 2)]
+AMPLITUDE = 8000
+
+
+def make_signal(rate: int, channels: int, seconds: float, freq: float = 0.0) -> bytes:
+    """Tone (freq > 0) hoặc nhiễu trắng, interleaved PCM16"""
+    n = int(rate * seconds)
+    if freq:
+        mono = AMPLITUDE * np.sin(2 * np.pi * freq * np.arange(n) / rate)
+    else:
+        mono = np.random.default_rng(0).normal(0, AMPLITUDE / 3, n)
+    mono = np.clip(mono, -32768, 32767).astype("<i2")
+    return np.repeat(mono[:, None], channels, axis=1).tobytes()
+
+
+def run(converter: AudioConverter, data: bytes) -> bytes:
+    """Đưa data vào theo kích thước chunk mà capture thật sẽ đọc"""
+    step = converter.frames_for(settings.CHUNK_SIZE) * converter.in_channels * 2
+    return b"".join(converter.convert(data[i:i + step]) for i in range(0, len(data), step))
+
+
+def gain_db(rate: int, channels: int, freq: float) -> float:
+    out = np.frombuffer(run(AudioConverter(rate, channels), make_signal(rate, channels, 2.0, freq)), "<i2")
+    steady = out[len(out) // 4:].astype(np.float64)  # Bỏ đoạn đầu (trễ của filter)
+    rms = np.sqrt(np.mean(steady ** 2)) if steady.size else 0.0
+    return 20 * np.log10(max(rms, 1e-3) / (AMPLITUDE / np.sqrt(2)))
+
+
+def bench(rate: int, channels: int, seconds: float) -> Tuple[float, float]:
+    data = make_signal(rate, channels, seconds)
+    converter = AudioConverter(rate, channels)
+    start = time.process_time()
+    run(converter, data)
+    cpu = time.process_time() - start
+    return cpu / seconds * 1000, seconds / cpu if cpu else float("inf")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark native-rate capture conversion")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--taps", type=int, nargs="+", default=[settings.RESAMPLER_TAPS_PER_PHASE])
+    args = parser.parse_args()
+
+    passband = 3000.0  # Vùng năng lượng chính của giọng nói, gain phải ~0 dB
+    stopband = settings.RATE * 0.75  # Trên Nyquist của output: phải bị chặn, nếu không sẽ alias
+    for taps in args.taps:
+        settings.RESAMPLER_TAPS_PER_PHASE = taps
+        design_filter_bank.cache_clear()
+        print(f"== taps/phase: {taps} | target {settings.RATE} Hz / {settings.CHANNELS} ch | {args.seconds:.0f}s audio ==")
+        print(f"{'format':>16} | {'CPU ms/audio s':>14} | {'x realtime':>10} | {f'{passband / 1000:.1f}k gain':>10} | {f'{stopband / 1000:.0f}k alias':>10}")
+        for rate, channels in FORMATS:
+            ms_per_second, realtime = bench(rate, channels, args.seconds)
+            pass_db = gain_db(rate, channels, passband)
+            # Input không chứa tần số trên Nyquist của output thì không có gì để alias
+            alias = f"{gain_db(rate, channels, stopband):8.1f}dB" if stopband < rate / 2 else "n/a"
+            print(f"{f'{rate} Hz / {channels} ch':>16} | {ms_per_second:14.3f} | {realtime:10.0f} | {pass_db:8.2f}dB | {alias:>10}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
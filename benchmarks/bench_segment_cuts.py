@@ -0,0 +1,161 @@
+# Path: benchmarks/bench_segment_cuts.py
+"""
+Đo tỉ lệ cắt đôi từ (word split) tại ranh giới segment: cắt cứng khi buffer đầy
+(MAX_BUFFER_CUT_SEARCH=0) so với cắt theo năng lượng, với nhiều kích thước buffer.
+
+Fixture là file WAV 16kHz mono kèm sidecar `<name>.json` = {"words": [[start, end], ...]} (giây).
+Mặc định sinh fixture "nói nhanh" tổng hợp (từ nhiều âm tiết, khoảng nghỉ ngắn hơn VAD_SILENCE_DURATION
+nên ranh giới chủ yếu do Max_Buffer). WAV không có sidecar: một điểm cắt được tính là "split"
+nếu năng lượng quanh điểm cắt >= VAD_THRESHOLD.
+
+Usage:
+    python benchmarks/bench_segment_cuts.py [--buffers 1 2 3 5] [--wav talk.wav ...] [--keep DIR]
+"""
+import argparse
+import asyncio
+import json
+import math
+import sys
+import tempfile
+import wave
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from cabin_app.config import get_settings  # noqa: E402
+from cabin_app.services.base import Transcriber  # noqa: E402
+from cabin_app.services.segmentation import frame_energy  # noqa: E402
+
+settings = get_settings()
+RATE = settings.RATE
+Interval = Tuple[float, float]
+
+
+# --- Fixtures ---
+def synth_speech(seconds: float, seed: int) -> Tuple[np.ndarray, List[Interval]]:
+    """Giọng nói tổng hợp: từ 1-3 âm tiết (có chỗ lõm giữa âm tiết), nghỉ 40-250ms giữa các từ"""
+    rng = np.random.default_rng(seed)
+    out: List[np.ndarray] = []
+    words: List[Interval] = []
+    cursor = 0
+    while cursor < seconds * RATE:
+        f0 = rng.uniform(100, 220)
+        parts = []
+        for syllable in range(rng.integers(1, 4)):
+            if syllable:
+                dip = int(rng.uniform(0.02, 0.05) * RATE)  # Phụ âm tắc giữa từ: lõm nhưng không im hẳn
+                parts.append(rng.normal(0, rng.uniform(300, 900), dip))
+            n = int(rng.uniform(0.12, 0.25) * RATE)
+            t = np.arange(n) / RATE
+            envelope = np.sin(np.pi * np.arange(n) / n) ** 0.6
+            voice = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 5))
+            parts.append(rng.uniform(2500, 6000) * envelope * voice / 2)
+        word = np.concatenate(parts)
+        words.append((cursor / RATE, (cursor + word.size) / RATE))
+        gap = int((rng.uniform(0.3, 0.6) if rng.random() < 0.08 else rng.uniform(0.04, 0.25)) * RATE)
+        out.extend([word, rng.normal(0, 120, gap)])
+        cursor += word.size + gap
+    audio = np.clip(np.concatenate(out) + rng.normal(0, 60, cursor), -32768, 32767).astype("<i2")
+    return audio, words
+
+
+def write_fixture(directory: Path, name: str, seconds: float, seed: int) -> Path:
+    audio, words = synth_speech(seconds, seed)
+    path = directory / f"{name}.wav"
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(RATE)
+        wf.writeframes(audio.tobytes())
+    path.with_suffix(".json").write_text(json.dumps({"words": [[round(a, 4), round(b, 4)] for a, b in words]}))
+    return path
+
+
+def load_fixture(path: Path) -> Tuple[bytes, Optional[List[Interval]]]:
+    with wave.open(str(path), "rb") as wf:
+        if wf.getframerate() != RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError(f"{path.name}: expected {RATE} Hz mono PCM16")
+        audio = wf.readframes(wf.getnframes())
+    sidecar = path.with_suffix(".json")
+    words = [tuple(w) for w in json.loads(sidecar.read_text())["words"]] if sidecar.exists() else None
+    return audio, words
+
+
+# --- Segmentation run ---
+class BoundaryRecorder(Transcriber):
+    """Không gọi API: chỉ ghi lại vị trí (giây) của mỗi ranh giới segment"""
+    def __init__(self, buffer_duration: float) -> None:
+        super().__init__(buffer_duration, partial=False)
+        self.sent = 0
+        self.boundaries: List[float] = []
+        self.lengths: List[float] = []
+
+    async def _transcribe(self, audio_data: bytes) -> str:
+        self.sent += len(audio_data)
+        self.boundaries.append(self.sent / (RATE * 2))
+        self.lengths.append(len(audio_data) / (RATE * 2))
+        return ""
+
+
+async def segment(audio: bytes, buffer: float) -> BoundaryRecorder:
+    recorder = BoundaryRecorder(buffer)
+    step = settings.CHUNK_SIZE * 2
+    for pos in range(0, len(audio), step):
+        await recorder.process_audio(audio[pos:pos + step])
+    return recorder
+
+
+def count_splits(boundaries: List[float], words: Optional[List[Interval]], audio: bytes) -> int:
+    if words is not None:
+        starts = np.array([w[0] for w in words])
+        ends = np.array([w[1] for w in words])
+        cuts = np.array(boundaries)
+        index = np.searchsorted(starts, cuts, side="right") - 1
+        valid = index >= 0
+        return int(np.sum(valid & (cuts < ends[np.clip(index, 0, None)]) & (cuts > starts[np.clip(index, 0, None)])))
+    energy = frame_energy(audio, smooth=3)
+    frames = [min(int(b / 0.02), energy.size - 1) for b in boundaries]
+    return sum(1 for f in frames if energy[f] >= settings.VAD_THRESHOLD)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Word-split rate of segment boundaries")
+    parser.add_argument("--buffers", type=float, nargs="+", default=[1.0, 2.0, 3.0, 5.0])
+    parser.add_argument("--wav", type=Path, nargs="*", default=[])
+    parser.add_argument("--fixtures", type=int, default=4, help="Số fixture tổng hợp (khi không có --wav)")
+    parser.add_argument("--seconds", type=float, default=120.0, help="Độ dài mỗi fixture tổng hợp")
+    parser.add_argument("--keep", type=Path, help="Lưu fixture tổng hợp vào thư mục này")
+    args = parser.parse_args()
+
+    directory = args.keep or Path(tempfile.mkdtemp(prefix="cabin-cuts-"))
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = args.wav or [write_fixture(directory, f"synthetic_{i}", args.seconds, seed=i) for i in range(args.fixtures)]
+    fixtures = [(p.name, *load_fixture(p)) for p in paths]
+    total_seconds = sum(len(audio) / (RATE * 2) for _, audio, _ in fixtures)
+
+    search = settings.MAX_BUFFER_CUT_SEARCH
+    print(f"Fixtures: {len(fixtures)} ({total_seconds:.0f}s audio) | VAD thr {settings.VAD_THRESHOLD}, silence {settings.VAD_SILENCE_DURATION}s")
+    print(f"{'buffer':>6} | {'mode':>12} | {'segments':>8} | {'splits':>6} | {'split rate':>10} | {'mean len':>8} | {'max len':>7}")
+    for buffer in args.buffers:
+        for mode, window in (("hard", 0.0), (f"energy {search:g}s", search)):
+            settings.MAX_BUFFER_CUT_SEARCH = window
+            segments = splits = 0
+            lengths: List[float] = []
+            for _, audio, words in fixtures:
+                recorder = asyncio.run(segment(audio, buffer))
+                segments += len(recorder.boundaries)
+                splits += count_splits(recorder.boundaries, words, audio)
+                lengths.extend(recorder.lengths)
+            rate = splits / segments if segments else math.nan
+            print(f"{buffer:5.1f}s | {mode:>12} | {segments:8d} | {splits:6d} | {rate:9.1%} | {np.mean(lengths):7.2f}s | {max(lengths):6.2f}s")
+    settings.MAX_BUFFER_CUT_SEARCH = search
+    if args.keep:
+        print(f"Fixtures saved in {directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Path: benchmarks/bench_session_memory.py
+"""
+Đo bộ nhớ của các session /ws/cabin đang idle (viewer đã kết nối nhưng chưa Resume):
+RSS tăng thêm mỗi session, số thread của server và bộ nhớ buffer mà /api/sessions báo cáo.
+
+Usage:
+    python benchmarks/bench_session_memory.py --sessions 100 500 1000
+    python benchmarks/bench_session_memory.py --param partial=true --param buffer=10
+"""
+import argparse
+import asyncio
+import json
+import resource
+import shutil
+import sys
+import tempfile
+import urllib.request
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlencode
+
+import websockets
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from loadtest_cabin import AUDIO_NAME, ServerProcess, write_synthetic_audio  # noqa: E402
+
+
+def thread_count(pid: int) -> int:
+    return len(list(Path(f"/proc/{pid}/task").iterdir()))
+
+
+def fetch_sessions(port: int) -> Dict:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/sessions", timeout=30) as resp:
+        return json.loads(resp.read())
+
+
+async def measure(server: ServerProcess, url: str, count: int, settle: float, deflate: bool = True) -> Dict[str, float]:
+    base_rss = server.rss_mb()
+    base_threads = thread_count(server.proc.pid)
+    conns: List[websockets.WebSocketClientProtocol] = []
+    try:
+        for _ in range(count):
+            ws = await websockets.connect(url, max_queue=4, compression="deflate" if deflate else None)
+            await ws.recv()  # {"type": "session"}: session đã được tạo trên server
+            conns.append(ws)
+        await asyncio.sleep(settle)
+        live = await asyncio.to_thread(fetch_sessions, server.port)
+        rss = server.rss_mb() - base_rss
+        return {
+            "sessions": count,
+            "live": live["count"],
+            "rss_mb": rss,
+            "kb_per_session": rss * 1024 / count,
+            "threads": thread_count(server.proc.pid) - base_threads,
+            "buffer_bytes": live["memory_bytes"],
+        }
+    finally:
+        await asyncio.gather(*(ws.close() for ws in conns), return_exceptions=True)
+        await asyncio.sleep(settle)
+
+
+async def run(args: argparse.Namespace) -> None:
+    work_dir = Path(tempfile.mkdtemp(prefix="cabin-mem-"))
+    write_synthetic_audio(work_dir / AUDIO_NAME, 5.0)
+    server_args = argparse.Namespace(stt_latency=0.0, translation_latency=0.0, latency_sigma=0.0, verbose=args.verbose)
+    server = ServerProcess(args.port, work_dir, server_args)
+    params = {"stt_provider": args.stt, "provider": args.translator, "source": f"file:{AUDIO_NAME}"}
+    params.update(dict(p.split("=", 1) for p in args.param))
+    url = f"ws://127.0.0.1:{args.port}/ws/cabin?{urlencode(params)}"
+    try:
+        await asyncio.to_thread(server.wait_ready)
+        # Làm nóng (import provider, cache translator) để không tính vào session đầu tiên
+        await measure(server, url, 5, 0.5, args.deflate)
+        print(f"{'sessions':>8} | {'live':>5} | {'RSS +MB':>8} | {'KB/session':>10} | {'threads +':>9} | {'buffers':>8}")
+        for count in args.sessions:
+            r = await measure(server, url, count, args.settle, args.deflate)
+            print(f"{r['sessions']:8d} | {r['live']:5d} | {r['rss_mb']:8.1f} | {r['kb_per_session']:10.1f} | {r['threads']:9d} | {r['buffer_bytes']:8d}")
+    finally:
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Idle-session memory footprint of /ws/cabin")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--port", type=int, default=18409)
+    parser.add_argument("--stt", default="mock")
+    parser.add_argument("--translator", default="mock")
+    parser.add_argument("--param", action="append", default=[], help="Extra query param key=value")
+    # permessage-deflate giữ zlib window (~45KB phía server) cho mỗi kết nối, kể cả khi idle
+    parser.add_argument("--no-deflate", dest="deflate", action="store_false", help="Không negotiate permessage-deflate")
+    parser.add_argument("--settle", type=float, default=2.0, help="Seconds to wait before sampling")
+    parser.add_argument("--verbose", action="store_true", help="Show server logs")
+    args = parser.parse_args()
+
+    # Mỗi session là một socket ở cả hai phía
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = min(hard, max(args.sessions) * 2 + 256)
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Path: benchmarks/bench_startup.py
+"""
+Đo thời gian import (cold start) của các module chính bằng `python -X importtime`.
+
+Usage:
+    python benchmarks/bench_startup.py [--top 15] [module ...]
+"""
+import argparse
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SRC_DIR = ROOT_DIR / "src"
+DEFAULT_MODULES = ["cabin_app.services", "cabin_app.main"]
+
+# Dòng importtime có dạng: "import time:   self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def run_importtime(module: str) -> Tuple[float, str, int]:
+    """Import module trong process mới, trả về (wall seconds, stderr, returncode)"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=str(ROOT_DIR),
+        env={"PYTHONPATH": str(SRC_DIR)},
+    )
+    return time.perf_counter() - start, proc.stderr, proc.returncode
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Trả về tổng self-time (microseconds) theo top-level package (groq, openai, ...)"""
+    packages: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        top = match.group(3).split(".")[0]
+        packages[top] = packages.get(top, 0) + int(match.group(1))
+    return packages
+
+
+def report(module: str, top: int) -> List[str]:
+    wall, stderr, code = run_importtime(module)
+    lines = [f"== import {module} =="]
+    if code != 0:
+        error = stderr.strip().splitlines()[-1] if stderr.strip() else "unknown error"
+        lines.append(f"   ❌ Import failed: {error}")
+        return lines
+
+    packages = parse_importtime(stderr)
+    total_ms = sum(packages.values()) / 1000
+    lines.append(f"   wall: {wall * 1000:8.1f} ms | import total: {total_ms:8.1f} ms")
+    for name, us in sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        lines.append(f"   {us / 1000:8.1f} ms  {name}")
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Startup import-time report")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=15, help="Số package chậm nhất hiển thị")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        print("\n".join(report(module, args.top)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# Path: benchmarks/bench_translation_memory.py
+"""
+Đo Translation Memory trên một "bài nói" tổng hợp có lặp câu với biến thể kiểu ASR
+(dấu câu, hoa/thường, filler words, thêm "s" số nhiều, thay một từ, đổi số liệu):
+số request LLM tiết kiệm được, tỉ lệ exact/fuzzy/hint, số lần dùng lại sai (khác số liệu)
+và thời gian lookup khi memory đầy.
+
+Usage:
+    python benchmarks/bench_translation_memory.py [--segments 2000] [--entries 5000]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+from cabin_app.services.translation.llm import LLMTranslator  # noqa: E402
+from cabin_app.translation_memory import MemoryTranslator, TranslationMemory  # noqa: E402
+
+PHRASES = [
+    "Thank you all for coming to this session today",
+    "Let me share my screen so you can see the dashboard",
+    "As you can see on this slide the latency dropped by {n} percent",
+    "The next question is about how we deploy the model to production",
+    "We are going to look at the architecture of the inference service",
+    "Please raise your hand if you have any questions",
+    "This is the most important part of the whole talk",
+    "We trained the model on {n} thousand hours of audio",
+    "Let me go back to the previous slide for a second",
+    "So the main takeaway here is that batching really matters",
+]
+FILLERS = ["um", "uh", "you know", "I mean"]
+SWAPS = {"session": "talk", "screen": "slides", "most": "really", "main": "key", "question": "topic"}
+
+
+def vary(phrase: str, rng: random.Random) -> Tuple[str, str]:
+    """Trả về (biến thể giống ASR, loại biến thể)"""
+    kind = rng.choice(["same", "punct", "case", "filler", "plural", "swap", "number"])
+    words = phrase.replace("{n}", "20").split()
+    if kind == "punct":
+        return " ".join(words) + rng.choice([".", "?", "...", ","]), kind
+    if kind == "case":
+        return " ".join(w.lower() if rng.random() < 0.5 else w.capitalize() for w in words), kind
+    if kind == "filler":
+        words.insert(rng.randrange(len(words)), rng.choice(FILLERS) + ",")
+        return " ".join(words), kind
+    if kind == "plural":
+        # ASR nghe nhầm số ít/số nhiều: khác vài trigram, phải được dùng lại qua fuzzy (LSH)
+        i = rng.choice([i for i, w in enumerate(words) if len(w) >= 4 and not w.isdigit()])
+        words[i] += "s"
+        return " ".join(words), kind
+    if kind == "swap":
+        swapped = [SWAPS.get(w, w) for w in words]
+        return " ".join(swapped), kind if swapped != words else "same"
+    if kind == "number" and "{n}" in phrase:
+        return phrase.replace("{n}", str(rng.choice([15, 30, 40]))), kind
+    return " ".join(words), "same"
+
+
+class CountingTranslator(LLMTranslator):
+    """LLM giả: đếm số request và số request có gợi ý từ memory"""
+    def __init__(self) -> None:
+        self.calls = 0
+        self.hinted = 0
+
+    async def _complete(self, system_prompt: str, content: str, json_mode: bool = False) -> str:
+        self.calls += 1
+        self.hinted += "TRANSLATION MEMORY:" in system_prompt
+        return f"VI<{content}>"
+
+    async def translate(self, text: str, glossary: Dict[str, str]) -> str:
+        return await self._complete(self._build_system_prompt(glossary), text)
+
+
+def filler_talk(count: int, rng: random.Random) -> List[str]:
+    """Câu không lặp lại: từ vựng ~2000 từ giả (ghép âm tiết) để độ trùng trigram giống văn nói thật"""
+    syllables = ["da", "ta", "mo", "del", "au", "di", "o", "ser", "vi", "ce", "clou", "stre", "am", "to",
+                 "ken", "bat", "ch", "win", "dow", "sig", "nal", "la", "ten", "cy", "buf", "fer", "pro", "cess"]
+    vocab = ["".join(rng.choice(syllables) for _ in range(rng.randint(1, 3))) for _ in range(2000)]
+    common = ["the", "a", "we", "is", "of", "to", "and", "in", "that", "it"]
+    return [
+        " ".join(rng.choice(common) if rng.random() < 0.35 else rng.choice(vocab) for _ in range(rng.randint(6, 16)))
+        for _ in range(count)
+    ]
+
+
+async def run(args: argparse.Namespace) -> None:
+    rng = random.Random(7)
+    glossary: Dict[str, str] = {}
+    path = Path(tempfile.mkdtemp(prefix="cabin-tm-")) / "tm.jsonl"
+
+    # 1. Hiệu quả: phát lại bài nói, đếm request LLM
+    llm = CountingTranslator()
+    memory = TranslationMemory(path, max_entries=args.entries)
+    translator = MemoryTranslator(llm, memory)
+    wrong = 0
+    kinds: Dict[str, int] = {}
+    unique = filler_talk(args.segments, rng)
+    for i in range(args.segments):
+        if rng.random() < args.repeat:
+            text, kind = vary(rng.choice(PHRASES), rng)
+        else:
+            text, kind = unique[i], "unique"
+        kinds[kind] = kinds.get(kind, 0) + 1
+        result = await translator.translate(text, glossary)
+        if kind == "number" and result != f"VI<{text}>":
+            wrong += 1  # Đã dùng lại bản dịch có số liệu khác
+    memory.flush()
+
+    snap = memory.snapshot()
+    print(f"Segments: {args.segments} ({', '.join(f'{k} {v}' for k, v in sorted(kinds.items()))})")
+    print(f"LLM requests: {llm.calls} ({1 - llm.calls / args.segments:.1%} saved) | with hint: {llm.hinted}")
+    print(f"Memory: exact {snap['exact']} | fuzzy {snap['fuzzy']} | hint {snap['hint']} | miss {snap['miss']} | entries {snap['entries']}")
+    lookups = sum(memory.stats[k] for k in ("exact", "fuzzy", "hint", "miss"))
+    print(f"Hit rate: exact {memory.stats['exact'] / lookups:.1%} | fuzzy {memory.stats['fuzzy'] / lookups:.1%} "
+          f"(of {lookups} lookups)")
+    print(f"Wrong reuse (different numbers): {wrong}")
+
+    # 2. Persist: nạp lại từ file
+    reloaded = TranslationMemory(path, max_entries=args.entries)
+    reloaded.load()
+    print(f"Reloaded {len(reloaded)} entries from {path.name} ({path.stat().st_size / 1024:.0f} KB)")
+
+    # 3. Latency khi memory đầy
+    full = TranslationMemory(path.with_name("full.jsonl"), max_entries=args.entries)
+    for text in filler_talk(args.entries + 500, rng):
+        full.store(text, f"VI<{text}>", glossary)
+    probes = filler_talk(500, rng) + [vary(rng.choice(PHRASES), rng)[0] for _ in range(500)]
+    start = time.perf_counter()
+    for text in probes:
+        full.lookup(text, glossary)
+    per_lookup = (time.perf_counter() - start) / len(probes) * 1e6
+    start = time.perf_counter()
+    for text in probes[:500]:
+        full.store(text + " extra", "VI", glossary)
+    per_store = (time.perf_counter() - start) / 500 * 1e6
+    print(f"Full memory ({len(full)} entries, {full.stats['evicted']} evicted): lookup {per_lookup:.0f} µs | store {per_store:.0f} µs")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Translation memory hit rate and lookup cost")
+    parser.add_argument("--segments", type=int, default=2000)
+    parser.add_argument("--repeat", type=float, default=0.4, help="Tỉ lệ segment là câu lặp lại (có biến thể)")
+    parser.add_argument("--entries", type=int, default=5000, help="TRANSLATION_MEMORY_MAX_ENTRIES")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+# Path: benchmarks/loadtest_cabin.py
+"""
+Load test cho /ws/cabin: mở N session WebSocket đồng thời, phát audio từ file
+(hoặc audio tổng hợp) qua Mock provider có độ trễ giống thật, rồi báo cáo
+p50/p95/p99 độ trễ (speech end -> translation), event-loop lag, CPU/RSS mỗi session
+và điểm bão hòa. CPU tính cả worker process của AudioExecutor; "loop CPU" là riêng thread
+chạy event loop (chạm 100% = process bị giới hạn ở một core).
+
+Usage:
+    python benchmarks/loadtest_cabin.py --sessions 1 2 4 8 16 32 --duration 20
+    python benchmarks/loadtest_cabin.py --audio talk.wav --stt-latency 0.6 --translation-latency 0.9
+    python benchmarks/loadtest_cabin.py --url ws://127.0.0.1:1309   # server có sẵn (không tự khởi động)
+    python benchmarks/loadtest_cabin.py --protocol binary   # cabin.v2 (binary frame, gom message)
+    python benchmarks/loadtest_cabin.py --executor process   # AUDIO_EXECUTOR của server: inline | thread | process
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import wave
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+import websockets
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SRC_DIR = ROOT_DIR / "src"
+RATE = 16000
+sys.path.insert(0, str(SRC_DIR))
+
+from cabin_app.protocol import PROTOCOL_BINARY, decode_batch  # noqa: E402
+AUDIO_NAME = "loadtest.wav"
+
+
+# --- Synthetic Audio ---
+def write_synthetic_audio(path: Path, seconds: float = 30.0, seed: int = 7) -> None:
+    """Các đợt "nói" (tone điều biến + nhiễu) 1.5-4s xen kẽ khoảng lặng 0.4-1.2s"""
+    rng = random.Random(seed)
+    frames = bytearray()
+    total = int(seconds * RATE)
+    while len(frames) // 2 < total:
+        speech = int(rng.uniform(1.5, 4.0) * RATE)
+        base = rng.uniform(120, 260)
+        for i in range(speech):
+            env = 0.5 + 0.5 * math.sin(2 * math.pi * 3 * i / RATE)  # Âm tiết ~3Hz
+            sample = 6000 * env * math.sin(2 * math.pi * base * i / RATE) + rng.gauss(0, 300)
+            frames += struct.pack("<h", max(-32768, min(32767, int(sample))))
+        silence = int(rng.uniform(0.4, 1.2) * RATE)
+        for _ in range(silence):
+            frames += struct.pack("<h", int(rng.gauss(0, 80)))
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(RATE)
+        wf.writeframes(bytes(frames[:total * 2]))
+
+
+# --- Server Process ---
+class ServerProcess:
+    """Khởi động uvicorn trong process riêng để đo CPU/RSS độc lập với load generator"""
+    def __init__(self, port: int, audio_root: Path, args: argparse.Namespace) -> None:
+        self.port = port
+        env = dict(os.environ)
+        env.update({
+            "PYTHONPATH": str(SRC_DIR),
+            "AUDIO_FILE_ROOT": str(audio_root),
+            "JOURNAL_ENABLED": "false",
+            "MOCK_STT_LATENCY": str(args.stt_latency),
+            "MOCK_TRANSLATION_LATENCY": str(args.translation_latency),
+            "MOCK_LATENCY_SIGMA": str(args.latency_sigma),
+        })
+        if getattr(args, "executor", None):
+            env["AUDIO_EXECUTOR"] = args.executor
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "cabin_app.main:app",
+             "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            env=env,
+            cwd=str(ROOT_DIR),
+            # Log INFO của từng session rất nhiều, chỉ hiện khi --verbose
+            stdout=None if args.verbose else subprocess.DEVNULL,
+            stderr=None if args.verbose else subprocess.DEVNULL,
+        )
+
+    def wait_ready(self, timeout: float = 30.0) -> None:
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError("Server exited during startup (re-run with --verbose)")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{self.port}/api/models", timeout=1).read()
+                return
+            except Exception:
+                time.sleep(0.2)
+        raise TimeoutError("Server did not start in time")
+
+    @staticmethod
+    def _stat(path: str) -> List[str]:
+        """Các field của /proc/.../stat sau tên process (field 0 = state, 1 = ppid, 11/12 = utime/stime)"""
+        with open(path) as f:
+            return f.read().rsplit(")", 1)[1].split()
+
+    def _descendants(self) -> List[int]:
+        """Server và mọi process con (worker của AudioExecutor, resource tracker)"""
+        children: Dict[int, List[int]] = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    children.setdefault(int(self._stat(f"/proc/{entry}/stat")[1]), []).append(int(entry))
+                except (OSError, IndexError):
+                    continue  # Process vừa thoát
+        pids, i = [self.proc.pid], 0
+        while i < len(pids):
+            pids.extend(children.get(pids[i], []))
+            i += 1
+        return pids
+
+    def cpu_seconds(self) -> float:
+        ticks = os.sysconf("SC_CLK_TCK")
+        total = 0
+        for pid in self._descendants():
+            try:
+                fields = self._stat(f"/proc/{pid}/stat")
+            except OSError:
+                continue
+            total += int(fields[11]) + int(fields[12])  # utime + stime (mọi thread của process)
+        return total / ticks
+
+    def loop_cpu_seconds(self) -> float:
+        """CPU của main thread (thread chạy event loop của uvicorn)"""
+        fields = self._stat(f"/proc/{self.proc.pid}/task/{self.proc.pid}/stat")
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def rss_mb(self) -> float:
+        with open(f"/proc/{self.proc.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+    def stop(self) -> None:
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+# --- Load Generator ---
+@dataclass
+class StepResult:
+    sessions: int
+    latencies: List[float] = field(default_factory=list)
+    stt_latencies: List[float] = field(default_factory=list)
+    loop_lags: List[float] = field(default_factory=list)
+    dropped_seconds: float = 0.0
+    errors: int = 0
+    cpu_percent: float = 0.0
+    loop_cpu_percent: float = 0.0
+    rss_mb: float = 0.0
+    rss_delta_mb: float = 0.0
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lo, hi = math.floor(k), math.ceil(k)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+async def run_session(url: str, params: Dict[str, str], duration: float, result: StepResult, binary: bool = False) -> None:
+    subprotocols = [PROTOCOL_BINARY] if binary else None
+    try:
+        async with websockets.connect(f"{url}/ws/cabin?{urlencode(params)}", max_size=None, subprotocols=subprotocols) as ws:
+            await ws.send(json.dumps({"command": "resume"}))
+            deadline = time.monotonic() + duration
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                for data in decode_batch(raw) if isinstance(raw, bytes) else [json.loads(raw)]:
+                    if data.get("type") == "translation" and "latency" in data:
+                        result.latencies.append(data["latency"])
+                    elif data.get("type") == "transcript" and "latency" in data:
+                        result.stt_latencies.append(data["latency"])
+                    elif data.get("type") == "overload":
+                        result.dropped_seconds = max(result.dropped_seconds, data.get("dropped_seconds", 0.0))
+                    elif data.get("type") == "error":
+                        result.errors += 1
+    except Exception as e:
+        print(f"   ⚠️ session error: {e}", file=sys.stderr)
+        result.errors += 1
+
+
+async def probe_loop_lag(base_http: str, stop: asyncio.Event, result: StepResult, interval: float) -> None:
+    """Proxy cho event-loop lag: thời gian phản hồi của một endpoint rỗng trên server"""
+    url = f"{base_http}/.well-known/appspecific/com.chrome.devtools.json"
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(lambda: urllib.request.urlopen(url, timeout=5).read())
+            result.loop_lags.append(time.perf_counter() - started)
+        except Exception:
+            result.errors += 1
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_step(
+    url: str, sessions: int, params: Dict[str, str], args: argparse.Namespace,
+    server: Optional[ServerProcess], baseline_rss: float
+) -> StepResult:
+    result = StepResult(sessions=sessions)
+    base_http = url.replace("ws://", "http://").replace("wss://", "https://")
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe_loop_lag(base_http, stop, result, args.probe_interval))
+
+    cpu_start = server.cpu_seconds() if server else 0.0
+    loop_cpu_start = server.loop_cpu_seconds() if server else 0.0
+    wall_start = time.monotonic()
+    # Dàn đều thời điểm mở session để tránh dồn cục VAD
+    tasks = []
+    for i in range(sessions):
+        tasks.append(asyncio.create_task(run_session(url, params, args.duration, result, args.protocol == "binary")))
+        await asyncio.sleep(args.ramp / max(sessions, 1))
+    await asyncio.gather(*tasks)
+    stop.set()
+    await prober
+
+    if server:
+        elapsed = time.monotonic() - wall_start
+        result.cpu_percent = 100 * (server.cpu_seconds() - cpu_start) / elapsed
+        result.loop_cpu_percent = 100 * (server.loop_cpu_seconds() - loop_cpu_start) / elapsed
+        result.rss_mb = server.rss_mb()
+        result.rss_delta_mb = result.rss_mb - baseline_rss
+    return result
+
+
+def is_saturated(step: StepResult, baseline: StepResult, args: argparse.Namespace) -> bool:
+    p95 = percentile(step.latencies, 95)
+    base_p95 = percentile(baseline.latencies, 95)
+    return (
+        not step.latencies
+        or p95 > args.slo
+        or p95 > base_p95 * args.degradation
+        or percentile(step.loop_lags, 95) > args.max_lag
+        or step.dropped_seconds > 0
+    )
+
+
+def format_report(steps: List[StepResult], args: argparse.Namespace) -> str:
+    lines = [
+        f"Load test /ws/cabin | audio={args.audio or 'synthetic'} | duration={args.duration}s/step | "
+        f"mock STT {args.stt_latency}s, translation {args.translation_latency}s, sigma {args.latency_sigma} | "
+        f"executor={args.executor or 'server default'}",
+        "",
+        "| sessions | captions | p50 (s) | p95 (s) | p99 (s) | STT p95 (s) | lag p95 (ms) | CPU % | loop CPU % | CPU %/sess | RSS MB | RSS MB/sess | dropped s | errors |",
+        "|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|",
+    ]
+    saturation: Optional[int] = None
+    for step in steps:
+        per_session_cpu = step.cpu_percent / step.sessions
+        per_session_rss = step.rss_delta_mb / step.sessions
+        lines.append(
+            f"| {step.sessions} | {len(step.latencies)} "
+            f"| {percentile(step.latencies, 50):.2f} | {percentile(step.latencies, 95):.2f} "
+            f"| {percentile(step.latencies, 99):.2f} | {percentile(step.stt_latencies, 95):.2f} "
+            f"| {percentile(step.loop_lags, 95) * 1000:.1f} | {step.cpu_percent:.1f} | {step.loop_cpu_percent:.1f} | {per_session_cpu:.2f} "
+            f"| {step.rss_mb:.1f} | {per_session_rss:.2f} | {step.dropped_seconds:.1f} | {step.errors} |"
+        )
+        if saturation is None and is_saturated(step, steps[0], args):
+            saturation = step.sessions
+
+    lines.append("")
+    if saturation is None:
+        lines.append(f"✅ No saturation up to {steps[-1].sessions} sessions "
+                     f"(SLO p95 <= {args.slo}s, lag p95 <= {args.max_lag * 1000:.0f}ms, no drops).")
+    else:
+        lines.append(f"⚠️ Saturation point: {saturation} sessions "
+                     f"(SLO p95 <= {args.slo}s, <= {args.degradation}x baseline p95, "
+                     f"lag p95 <= {args.max_lag * 1000:.0f}ms, no drops).")
+    return "\n".join(lines)
+
+
+async def run(args: argparse.Namespace) -> str:
+    work_dir = Path(tempfile.mkdtemp(prefix="cabin-loadtest-"))
+    server: Optional[ServerProcess] = None
+    try:
+        if args.audio:
+            shutil.copy(args.audio, work_dir / AUDIO_NAME)
+        else:
+            write_synthetic_audio(work_dir / AUDIO_NAME)
+
+        url = args.url
+        if not url:
+            server = ServerProcess(args.port, work_dir, args)
+            await asyncio.to_thread(server.wait_ready)
+            url = f"ws://127.0.0.1:{args.port}"
+        baseline_rss = server.rss_mb() if server else 0.0
+
+        params = {
+            "stt_provider": args.stt,
+            "provider": args.translator,
+            "buffer": str(args.buffer),
+            "source": f"file:{AUDIO_NAME};pace=realtime;loop=true",
+            **dict(kv.split("=", 1) for kv in args.param),
+        }
+        steps: List[StepResult] = []
+        for sessions in args.sessions:
+            print(f"▶ {sessions} sessions ...", file=sys.stderr)
+            steps.append(await run_step(url, sessions, params, args, server, baseline_rss))
+        return format_report(steps, args)
+    finally:
+        if server:
+            server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for /ws/cabin")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per step")
+    parser.add_argument("--ramp", type=float, default=2.0, help="Seconds to open all sessions of a step")
+    parser.add_argument("--audio", type=Path, help="WAV 16kHz mono (mặc định: audio tổng hợp)")
+    parser.add_argument("--url", help="ws://host:port của server có sẵn (mặc định tự khởi động)")
+    parser.add_argument("--port", type=int, default=18309)
+    parser.add_argument("--stt", default="mock")
+    parser.add_argument("--translator", default="mock")
+    parser.add_argument("--buffer", type=float, default=5.0)
+    parser.add_argument("--param", action="append", default=[], help="Extra query param key=value")
+    parser.add_argument("--executor", choices=["inline", "thread", "process"], help="AUDIO_EXECUTOR của server tự khởi động")
+    parser.add_argument("--protocol", choices=["json", "binary"], default="json", help="cabin.v1 (JSON) hoặc cabin.v2 (binary)")
+    parser.add_argument("--stt-latency", type=float, default=0.5, help="Median mock STT latency (s)")
+    parser.add_argument("--translation-latency", type=float, default=0.8, help="Median mock LLM latency (s)")
+    parser.add_argument("--latency-sigma", type=float, default=0.4, help="Log-normal sigma")
+    parser.add_argument("--probe-interval", type=float, default=0.25)
+    parser.add_argument("--slo", type=float, default=3.0, help="Max acceptable p95 latency (s)")
+    parser.add_argument("--degradation", type=float, default=2.0, help="Max p95 vs 1-session baseline")
+    parser.add_argument("--max-lag", type=float, default=0.1, help="Max acceptable loop lag p95 (s)")
+    parser.add_argument("--verbose", action="store_true", help="Show server logs")
+    args = parser.parse_args()
+
+    print(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
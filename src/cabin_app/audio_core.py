@@ -1,20 +1,31 @@
 # Path: src/cabin_app/audio_core.py
-import pyaudio
 import logging
 import atexit
-from typing import Generator, Optional, List, Dict
+from typing import Generator, Optional, List, Dict, Tuple
 from cabin_app.config import get_settings
+from cabin_app.resampler import AudioConverter
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# PyAudio là optional: server vẫn chạy được (file/socket source)
+# trên máy không có PortAudio
+try:
+    import pyaudio
+    HAS_PYAUDIO = True
+except ImportError:
+    pyaudio = None
+    HAS_PYAUDIO = False
+
 # --- Singleton PyAudio Management ---
 # Khởi tạo PyAudio một lần duy nhất để tránh lỗi PortAudio not initialized
 # khi khởi tạo/hủy liên tục.
-_AUDIO_INSTANCE: Optional[pyaudio.PyAudio] = None
+_AUDIO_INSTANCE: Optional["pyaudio.PyAudio"] = None
 
-def get_pyaudio() -> pyaudio.PyAudio:
+def get_pyaudio() -> "pyaudio.PyAudio":
     global _AUDIO_INSTANCE
+    if not HAS_PYAUDIO:
+        raise ImportError("Please install pyaudio (and PortAudio): pip install pyaudio")
     if _AUDIO_INSTANCE is None:
         _AUDIO_INSTANCE = pyaudio.PyAudio()
     return _AUDIO_INSTANCE
@@ -35,14 +46,16 @@ class AudioStreamer:
     và yield ra các chunk bytes.
     """
     def __init__(self) -> None:
-        self.p = get_pyaudio() # Sử dụng instance chung
-        self.stream: Optional[pyaudio.Stream] = None
+        self.p = get_pyaudio() if HAS_PYAUDIO else None  # Sử dụng instance chung
+        self.stream: Optional["pyaudio.Stream"] = None
 
     def get_input_devices(self) -> List[Dict]:
         """
         Liệt kê danh sách Microphone khả dụng trên hệ thống.
         """
-        devices = []
+        devices: List[Dict] = []
+        if self.p is None:
+            return devices
         try:
             info = self.p.get_host_api_info_by_index(0)
             numdevices = info.get('deviceCount')
@@ -53,38 +66,89 @@ class AudioStreamer:
                     devices.append({
                         "id": i,
                         "name": device_info.get('name'),
-                        "channels": device_info.get('maxInputChannels')
+                        "channels": device_info.get('maxInputChannels'),
+                        "rate": int(device_info.get('defaultSampleRate', 0))
                     })
         except Exception as e:
             logger.error(f"Error listing devices: {e}")
         
         return devices
 
-    def start_stream(self, device_index: Optional[int] = None) -> Generator[bytes, None, None]:
+    def native_format(
+        self, device_index: Optional[int] = None, split: bool = False
+    ) -> Tuple[int, int]:
         """
-        Mở mic và trả về generator chứa raw bytes.
+        (sample rate, channels) gốc của thiết bị, ví dụ (48000, 2) với mic USB/wireless.
+        split: giữ từng kênh riêng (mỗi kênh một người nói),
+        tối đa AUDIO_SPLIT_MAX_CHANNELS kênh.
         """
+        if self.p is None or (not settings.AUDIO_CAPTURE_NATIVE and not split):
+            return settings.RATE, settings.CHANNELS
+        try:
+            if device_index is not None:
+                info = self.p.get_device_info_by_index(device_index)
+            else:
+                info = self.p.get_default_input_device_info()
+            rate = settings.RATE
+            if settings.AUDIO_CAPTURE_NATIVE:
+                rate = int(info.get('defaultSampleRate') or settings.RATE)
+            if split:
+                limit = settings.AUDIO_SPLIT_MAX_CHANNELS
+            else:
+                limit = settings.AUDIO_CAPTURE_MAX_CHANNELS
+            channels = min(int(info.get('maxInputChannels') or 1), limit)
+            return rate, max(channels, settings.CHANNELS)
+        except Exception as e:
+            logger.warning(
+                f"Cannot query device format ({e}), "
+                f"using {settings.RATE} Hz / {settings.CHANNELS} ch"
+            )
+            return settings.RATE, settings.CHANNELS
+
+    def start_stream(
+        self, device_index: Optional[int] = None, split: bool = False
+    ) -> Generator[bytes, None, None]:
+        """
+        Mở mic ở format gốc của thiết bị và trả về generator chứa raw bytes
+        đã chuyển về settings.RATE / settings.CHANNELS.
+        split: giữ nguyên số kênh của thiết bị (PCM interleaved ở settings.RATE)
+        thay vì downmix.
+        """
+        if self.p is None:
+            raise RuntimeError("PyAudio is not available, cannot open microphone")
         try:
             if device_index is not None:
                 logger.info(f"🎤 Opening Microphone ID: {device_index}...")
             else:
                 logger.info("🎤 Opening Default System Microphone...")
 
+            rate, channels = self.native_format(device_index, split)
+            out_channels = channels if split else settings.CHANNELS
+            converter = AudioConverter(rate, channels, out_channels=out_channels)
+            # Đọc lượng frame gốc tương ứng CHUNK_SIZE frame output
+            # để nhịp chunk không đổi
+            frames_per_buffer = converter.frames_for(settings.CHUNK_SIZE)
             self.stream = self.p.open(
                 format=pyaudio.paInt16,
-                channels=settings.CHANNELS,
-                rate=settings.RATE,
+                channels=channels,
+                rate=rate,
                 input=True,
                 input_device_index=device_index,
-                frames_per_buffer=settings.CHUNK_SIZE
+                frames_per_buffer=frames_per_buffer
             )
             
-            logger.info("🎤 Stream started successfully.")
+            logger.info(
+                "🎤 Stream started successfully "
+                f"({rate} Hz / {channels} ch{', split' if split else ''})."
+            )
             
             while True:
                 if self.stream.is_active():
-                    data = self.stream.read(settings.CHUNK_SIZE, exception_on_overflow=False)
-                    yield data
+                    data = self.stream.read(
+                        frames_per_buffer, exception_on_overflow=False
+                    )
+                    if chunk := converter.convert(data):
+                        yield chunk
                 else:
                     break
         except Exception as e:
@@ -93,6 +157,26 @@ class AudioStreamer:
         finally:
             self.stop_stream()
 
+    def pause(self) -> bool:
+        """
+        Dừng stream nhưng không đóng: thiết bị ngừng thu, start lại chỉ mất
+        vài chục ms (không phải mở lại thiết bị)
+        """
+        if self.stream is None:
+            return False
+        try:
+            self.stream.stop_stream()
+            logger.info("🎤 Microphone stream paused.")
+            return True
+        except Exception as e:
+            logger.warning(f"Cannot pause microphone stream: {e}")
+            return False
+
+    def resume(self) -> None:
+        """Gọi trên thread đang đọc stream (không đọc song song với start_stream)"""
+        if self.stream is not None and self.stream.is_stopped():
+            self.stream.start_stream()
+
     def stop_stream(self) -> None:
         """Đóng stream an toàn"""
         try:
@@ -0,0 +1,390 @@
+# Path: src/cabin_app/audio_sources.py
+import abc
+import logging
+import mmap
+import os
+import socket
+import struct
+import time
+import wave
+from pathlib import Path
+from typing import Dict, Generator, Optional, Tuple
+
+from cabin_app.config import get_settings
+from cabin_app.audio_core import AudioStreamer
+from cabin_app.resampler import AudioConverter
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+SAMPLE_WIDTH = 2  # 16-bit PCM
+
+
+class AudioSource(abc.ABC):
+    """
+    Nguồn audio cho pipeline. chunks() là generator BLOCKING (chạy trên thread
+    capture), yield PCM 16-bit little-endian theo settings.RATE / settings.CHANNELS.
+    Source tách kênh (split) yield PCM interleaved `channels` kênh:
+    mỗi kênh là một người nói.
+    """
+    name = "source"
+    # False: source có thể chờ (file replay) nên pipeline áp backpressure thay vì drop
+    live = True
+    channels = settings.CHANNELS  # Số kênh interleaved trong mỗi chunk
+
+    @abc.abstractmethod
+    def chunks(self) -> Generator[bytes, None, None]:
+        pass
+
+    def close(self) -> None:
+        """Giải phóng tài nguyên; phải an toàn khi gọi nhiều lần"""
+        pass
+
+    def suspend(self) -> bool:
+        """
+        Dừng capture khi Pause (gọi trên thread capture, giữa hai lần lấy chunk).
+        False: source không dừng được (ví dụ socket feed) nên thread capture
+        tiếp tục đọc và bỏ data.
+        """
+        return False
+
+    def resume(self) -> None:
+        """Capture lại sau suspend(); chunk kế tiếp của chunks() là audio mới"""
+        pass
+
+    def describe(self) -> str:
+        return self.name
+
+
+class MicrophoneSource(AudioSource):
+    """Thu trực tiếp từ PortAudio (hành vi mặc định trước đây)"""
+    name = "mic"
+
+    def __init__(self, device_index: Optional[int] = None, split: bool = False) -> None:
+        self.device_index = device_index
+        self.streamer = AudioStreamer()
+        self.split = split
+        if split:
+            _, self.channels = self.streamer.native_format(device_index, split=True)
+
+    def chunks(self) -> Generator[bytes, None, None]:
+        yield from self.streamer.start_stream(
+            device_index=self.device_index, split=self.split
+        )
+
+    def close(self) -> None:
+        self.streamer.stop_stream()
+
+    def suspend(self) -> bool:
+        return self.streamer.pause()
+
+    def resume(self) -> None:
+        self.streamer.resume()
+
+    def describe(self) -> str:
+        device = "default" if self.device_index is None else self.device_index
+        return f"mic:{device}{_split_suffix(self.channels)}"
+
+
+def _split_suffix(channels: int) -> str:
+    return f" ({channels} ch split)" if channels > settings.CHANNELS else ""
+
+
+def _find_wav_data(buf: mmap.mmap) -> Tuple[int, int, int, int]:
+    """
+    Duyệt RIFF chunk, trả về (data_offset, data_size, channels, rate)
+    của file WAV PCM16
+    """
+    if buf[0:4] != b"RIFF" or buf[8:12] != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+    offset = 12
+    channels = rate = bits = None
+    while offset + 8 <= len(buf):
+        chunk_id = buf[offset:offset + 4]
+        chunk_size = struct.unpack("<I", buf[offset + 4:offset + 8])[0]
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            fmt_tag, channels, rate = struct.unpack("<HHI", buf[body:body + 8])
+            bits = struct.unpack("<H", buf[body + 14:body + 16])[0]
+            if fmt_tag not in (1, 0xFFFE) or bits != 16:
+                raise ValueError(
+                    "Only PCM 16-bit WAV is supported "
+                    f"(format={fmt_tag}, bits={bits})"
+                )
+        elif chunk_id == b"data":
+            if channels is None or rate is None:
+                raise ValueError("WAV 'data' chunk before 'fmt ' chunk")
+            size = min(chunk_size, len(buf) - body)
+            return body, size, channels, rate
+        offset = body + chunk_size + (chunk_size & 1)  # Chunk được pad về số chẵn
+    raise ValueError("WAV file has no 'data' chunk")
+
+
+class FileSource(AudioSource):
+    """
+    Phát lại file PCM thô hoặc WAV qua mmap (không đọc cả file vào RAM).
+    pace="realtime" giữ đúng nhịp thời gian thực, pace="fast" đẩy nhanh nhất có thể.
+    WAV khác RATE/CHANNELS (ví dụ 44.1 kHz stereo) được resample + downmix khi phát
+    (split: giữ nguyên các kênh, chỉ resample).
+    """
+    name = "file"
+    live = False
+
+    def __init__(
+        self,
+        path: Path,
+        pace: str = "realtime",
+        loop: bool = False,
+        split: bool = False,
+    ) -> None:
+        if pace not in ("realtime", "fast"):
+            raise ValueError(f"Unknown pace '{pace}' (realtime|fast)")
+        self.path = path
+        self.pace = pace
+        self.loop = loop
+        self._closing = False
+        self._file = open(path, "rb")
+        try:
+            if os.fstat(self._file.fileno()).st_size == 0:
+                raise ValueError("empty audio file")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        try:
+            if self._map[0:4] == b"RIFF":
+                self.offset, self.size, channels, rate = _find_wav_data(self._map)
+            else:
+                self.offset, self.size = 0, len(self._map)
+                channels, rate = settings.CHANNELS, settings.RATE
+        except Exception:
+            self.close()  # Header hỏng: đóng mmap + file trước khi raise
+            raise
+
+        if split and channels > settings.AUDIO_SPLIT_MAX_CHANNELS:
+            self.close()
+            raise ValueError(
+                f"{path.name}: {channels} channels exceeds AUDIO_SPLIT_MAX_CHANNELS"
+            )
+        out_channels = channels if split else settings.CHANNELS
+        try:
+            self.converter = AudioConverter(rate, channels, out_channels=out_channels)
+        except ValueError as e:
+            self.close()
+            raise ValueError(f"{path.name}: {e}") from e
+        self.rate, self.in_channels = rate, channels
+        self.channels = self.converter.out_channels
+
+    def chunks(self) -> Generator[bytes, None, None]:
+        frame_bytes = self.in_channels * SAMPLE_WIDTH
+        chunk_bytes = self.converter.frames_for(settings.CHUNK_SIZE) * frame_bytes
+        bytes_per_second = self.rate * frame_bytes
+        view = memoryview(self._map)[self.offset:self.offset + self.size]
+        try:
+            started = time.monotonic()
+            sent = 0
+            while True:
+                for pos in range(0, len(view), chunk_bytes):
+                    chunk = bytes(view[pos:pos + chunk_bytes])
+                    if self.pace == "realtime":
+                        # Tính theo mốc bắt đầu để không bị trôi (drift) theo thời gian
+                        delay = started + sent / bytes_per_second - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+                    sent += len(chunk)
+                    if converted := self.converter.convert(chunk):
+                        yield converted
+                if not self.loop:
+                    break
+        finally:
+            view.release()
+            if self._closing:
+                self.close()
+
+    def close(self) -> None:
+        self._closing = True
+        if not self._map.closed:
+            try:
+                self._map.close()
+            except BufferError:
+                return  # Generator vẫn giữ memoryview, sẽ tự đóng khi kết thúc
+        self._file.close()
+
+    def describe(self) -> str:
+        details = self.pace + (", loop" if self.loop else "")
+        if not self.converter.passthrough:
+            details += f", {self.rate} Hz / {self.in_channels} ch"
+        if self.channels > settings.CHANNELS:
+            details += ", split"
+        return f"file:{self.path.name} ({details})"
+
+
+class SocketSource(AudioSource):
+    """Đọc PCM thô từ một TCP hoặc UNIX socket (ví dụ: ffmpeg ... -f s16le tcp://...)"""
+    name = "socket"
+
+    def __init__(
+        self,
+        address: str,
+        family: int = socket.AF_INET,
+        channels: int = settings.CHANNELS,
+    ) -> None:
+        self.address = address
+        # Feed nhiều kênh (ffmpeg -ac N): PCM interleaved, mỗi kênh một pipeline
+        self.channels = channels
+        if family == socket.AF_UNIX:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(address)
+        else:
+            host, _, port = address.rpartition(":")
+            self._sock = socket.create_connection(
+                (host or "127.0.0.1", int(port)), timeout=5.0
+            )
+            self._sock.settimeout(None)
+
+    def chunks(self) -> Generator[bytes, None, None]:
+        chunk_bytes = settings.CHUNK_SIZE * self.channels * SAMPLE_WIDTH
+        buf = bytearray(chunk_bytes)
+        view = memoryview(buf)
+        while True:
+            filled = 0
+            while filled < chunk_bytes:
+                received = self._sock.recv_into(view[filled:])
+                if received == 0:
+                    return  # Feed đã đóng
+                filled += received
+            yield bytes(buf)
+
+    def close(self) -> None:
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+    def describe(self) -> str:
+        return f"socket:{self.address}{_split_suffix(self.channels)}"
+
+
+class RecorderSource(AudioSource):
+    """Tee: chuyển tiếp audio của source bên trong và đồng thời ghi ra file WAV"""
+    name = "record"
+
+    def __init__(self, inner: AudioSource, path: Path) -> None:
+        self.inner = inner
+        self.live = inner.live
+        # Ghi đủ các kênh (file ghi được replay lại với split=true)
+        self.channels = inner.channels
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        writer = wave.open(str(path), "wb")
+        writer.setnchannels(self.channels)
+        writer.setsampwidth(SAMPLE_WIDTH)
+        writer.setframerate(settings.RATE)
+        self._writer: Optional[wave.Wave_write] = writer
+
+    def chunks(self) -> Generator[bytes, None, None]:
+        for chunk in self.inner.chunks():
+            writer = self._writer
+            if writer is not None:
+                writer.writeframesraw(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        self.inner.close()
+        if self._writer is not None:
+            self._writer.close()  # Cập nhật lại header WAV
+            self._writer = None
+            logger.info(f"💾 Recording saved: {self.path}")
+
+    def suspend(self) -> bool:
+        return self.inner.suspend()
+
+    def resume(self) -> None:
+        self.inner.resume()
+
+    def describe(self) -> str:
+        return f"{self.inner.describe()} -> {self.path.name}"
+
+
+# --- Source Spec ---
+def audio_file_root() -> Path:
+    if settings.AUDIO_FILE_ROOT:
+        return Path(settings.AUDIO_FILE_ROOT)
+    return ROOT_DIR / "recordings"
+
+
+def _resolve_path(raw: str) -> Path:
+    """Giới hạn đường dẫn trong AUDIO_FILE_ROOT: client không đọc/ghi file tùy ý"""
+    root = audio_file_root().resolve()
+    path = (root / raw).resolve()
+    if path != root and root not in path.parents:
+        raise ValueError(f"Path outside audio root: {raw}")
+    return path
+
+
+def _parse_options(parts: list) -> Dict[str, str]:
+    options = {}
+    for part in parts:
+        key, _, value = part.partition("=")
+        options[key.strip().lower()] = value.strip()
+    return options
+
+
+def open_source(spec: Optional[str], device_id: Optional[int] = None) -> AudioSource:
+    """
+    Tạo AudioSource từ spec dạng "scheme:target;option=value;...", ví dụ:
+        mic            | mic:3
+        file:talk.wav;pace=fast;loop=true
+        tcp:127.0.0.1:9000  | unix:/tmp/cabin.sock
+        mic:3;record=session.wav  (tee ra file)
+        mic:3;split=true  | file:panel.wav;split=true  | tcp:127.0.0.1:9000;channels=2
+            (mỗi kênh của thiết bị / file / feed là một người nói, có pipeline riêng)
+    Không có spec -> microphone theo device_id (tương thích ngược).
+    """
+    if not spec:
+        return MicrophoneSource(device_id)
+
+    head, *rest = spec.split(";")
+    scheme, _, target = head.partition(":")
+    scheme = scheme.strip().lower()
+    options = _parse_options(rest)
+
+    if scheme not in settings.AUDIO_SOURCES_ALLOWED:
+        raise ValueError(f"Audio source '{scheme}' is not allowed")
+    record_path: Optional[Path] = None
+    if options.get("record"):
+        if "record" not in settings.AUDIO_SOURCES_ALLOWED:
+            raise ValueError("Recording is not allowed")
+        record_path = _resolve_path(options["record"])
+
+    split = options.get("split", "false").lower() in ("1", "true", "yes")
+    channels = int(options.get("channels") or settings.CHANNELS)
+    if not settings.CHANNELS <= channels <= settings.AUDIO_SPLIT_MAX_CHANNELS:
+        raise ValueError(
+            f"channels must be between {settings.CHANNELS} "
+            f"and {settings.AUDIO_SPLIT_MAX_CHANNELS}"
+        )
+
+    source: AudioSource
+    if scheme == "mic":
+        source = MicrophoneSource(int(target) if target else device_id, split=split)
+    elif scheme == "file":
+        source = FileSource(
+            _resolve_path(target),
+            pace=options.get("pace", "realtime"),
+            loop=options.get("loop", "false").lower() in ("1", "true", "yes"),
+            split=split,
+        )
+    elif scheme == "tcp":
+        source = SocketSource(target, channels=channels)
+    elif scheme == "unix":
+        source = SocketSource(target, family=socket.AF_UNIX, channels=channels)
+    else:
+        raise ValueError(f"Unknown audio source '{scheme}'")
+
+    if record_path is not None:
+        source = RecorderSource(source, record_path)
+    return source
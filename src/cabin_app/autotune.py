@@ -0,0 +1,165 @@
+# Path: src/cabin_app/autotune.py
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from cabin_app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def _ewma(previous: Optional[float], value: float, alpha: float) -> float:
+    return value if previous is None else alpha * value + (1 - alpha) * previous
+
+
+@dataclass(slots=True)
+class Tuning:
+    """Giá trị mới cho Transcriber, kèm lý do (gửi cho Client)"""
+    buffer: float
+    vad_silence: float
+    reason: str
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "type": "tuning",
+            "buffer": self.buffer,
+            "vad_silence": self.vad_silence,
+            "reason": self.reason,
+        }
+
+
+class AutoTuner:
+    """
+    Controller của một session: chỉnh buffer (độ dài segment tối đa) và vad_silence
+    để giảm độ trễ caption. Một từ chờ ~L/2 + silence để segment được cắt,
+    rồi thêm STT RTT + Translation RTT, nên:
+    - buffer: nhỏ nhất mà pipeline vẫn theo kịp. STT và Translation xử lý tuần tự,
+      nên round-trip mỗi segment phải <= AUTOTUNE_TARGET_UTILIZATION x độ dài
+      segment. Backlog audio -> tăng ngay x1.5.
+    - Tỉ lệ segment bị lọc (hallucination, thường do segment quá ngắn) cao
+      -> tăng buffer và silence.
+    - Phần lớn segment bị cắt vì đầy buffer (người nói ít ngừng) -> giảm silence
+      để cắt ở khoảng ngừng ngắn; segment trung bình quá ngắn -> tăng silence.
+    Chỉ đổi sau mỗi AUTOTUNE_INTERVAL_SEGMENTS segment, mỗi lần buffer đổi
+    tối đa 25% (không dao động).
+    """
+    __slots__ = (
+        "buffer", "vad_silence", "buffer_min", "buffer_max", "stt_rtt",
+        "translation_rtt", "segment_seconds", "drop_rate", "max_buffer_rate",
+        "backlog", "changes", "_since_change",
+    )
+
+    ALPHA = 0.3  # Trọng số của quan sát mới trong EWMA
+
+    def __init__(
+        self, buffer: float, vad_silence: float, buffer_max: Optional[float] = None
+    ) -> None:
+        self.buffer = buffer
+        self.vad_silence = vad_silence
+        self.buffer_min = settings.BUFFER_MIN
+        # buffer_max: trần theo ngân sách bộ nhớ của session
+        ceiling = min(settings.BUFFER_MAX, buffer_max or settings.BUFFER_MAX)
+        self.buffer_max = max(self.buffer_min, ceiling)
+        self.stt_rtt: Optional[float] = None  # Seconds mỗi request STT final
+        # Seconds mỗi segment (request / số segment trong batch)
+        self.translation_rtt: Optional[float] = None
+        self.segment_seconds: Optional[float] = None
+        self.drop_rate = 0.0
+        # Tỉ lệ segment bị cắt vì đầy buffer (không phải VAD)
+        self.max_buffer_rate = 0.0
+        self.backlog = 0.0
+        self.changes = 0
+        self._since_change = 0
+
+    def observe_segment(
+        self,
+        audio_seconds: float,
+        reason: str,
+        stt_seconds: Optional[float],
+        dropped: bool,
+    ) -> Optional[Tuning]:
+        """Gọi sau mỗi segment đã gửi STT; trả về Tuning nếu cần đổi tham số"""
+        if stt_seconds is not None:
+            self.stt_rtt = _ewma(self.stt_rtt, stt_seconds, self.ALPHA)
+        self.segment_seconds = _ewma(self.segment_seconds, audio_seconds, self.ALPHA)
+        self.drop_rate = _ewma(self.drop_rate, float(dropped), self.ALPHA)
+        self.max_buffer_rate = _ewma(
+            self.max_buffer_rate, float(reason == "Max_Buffer"), self.ALPHA
+        )
+        self._since_change += 1
+        return self._decide()
+
+    def observe_translation(self, seconds: float, segments: int) -> None:
+        self.translation_rtt = _ewma(
+            self.translation_rtt, seconds / max(1, segments), self.ALPHA
+        )
+
+    def observe_backlog(self, seconds: float) -> None:
+        self.backlog = seconds
+
+    def _decide(self) -> Optional[Tuning]:
+        if self._since_change < settings.AUTOTUNE_INTERVAL_SEGMENTS:
+            return None
+        reasons = []
+        hallucinating = self.drop_rate > settings.AUTOTUNE_MAX_DROP_RATE
+
+        if self.backlog >= settings.AUDIO_BEHIND_SECONDS:
+            buffer = self.buffer * 1.5
+            reasons.append("backlog")
+        else:
+            rtt = max(self.stt_rtt or 0.0, self.translation_rtt or 0.0)
+            target = rtt / settings.AUTOTUNE_TARGET_UTILIZATION
+            if hallucinating:
+                target = max(target, self.buffer * 1.25)
+            buffer = min(max(target, self.buffer * 0.75), self.buffer * 1.25)
+            if hallucinating:
+                reasons.append("hallucinations")
+            elif buffer < self.buffer:
+                reasons.append("latency")
+            elif buffer > self.buffer:
+                reasons.append("throughput")
+
+        silence = self.vad_silence
+        short = (self.segment_seconds or 0.0) < settings.AUTOTUNE_MIN_SEGMENT
+        if short:
+            silence += 0.1
+            reasons.append("short segments")
+        elif hallucinating:
+            # Drop rate cao nhưng segment không ngắn: vẫn tăng silence,
+            # lý do là hallucination (nhánh backlog chưa ghi lý do này)
+            silence += 0.1
+            if "hallucinations" not in reasons:
+                reasons.append("hallucinations")
+        elif self.max_buffer_rate > 0.5:
+            silence -= 0.1
+            reasons.append("pace")
+
+        buffer = round(min(max(buffer, self.buffer_min), self.buffer_max), 1)
+        silence = min(
+            max(silence, settings.AUTOTUNE_SILENCE_MIN), settings.AUTOTUNE_SILENCE_MAX
+        )
+        silence = round(silence, 2)
+        if abs(buffer - self.buffer) < 0.1 and abs(silence - self.vad_silence) < 0.05:
+            return None
+
+        self.buffer, self.vad_silence = buffer, silence
+        self.changes += 1
+        self._since_change = 0
+        return Tuning(buffer, silence, ", ".join(reasons))
+
+    def snapshot(self) -> Dict[str, object]:
+        def r(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value, 3)
+
+        return {
+            "buffer": self.buffer,
+            "vad_silence": self.vad_silence,
+            "buffer_range": [self.buffer_min, round(self.buffer_max, 2)],
+            "stt_rtt": r(self.stt_rtt),
+            "translation_rtt": r(self.translation_rtt),
+            "segment_seconds": r(self.segment_seconds),
+            "drop_rate": r(self.drop_rate),
+            "max_buffer_rate": r(self.max_buffer_rate),
+            "changes": self.changes,
+        }
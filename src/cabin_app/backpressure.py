@@ -0,0 +1,310 @@
+# Path: src/cabin_app/backpressure.py
+import asyncio
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import Enum
+from typing import Awaitable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from cabin_app.config import get_settings
+from cabin_app.tracing import SegmentTrace
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+BYTES_PER_SECOND = settings.RATE * settings.CHANNELS * 2
+
+T = TypeVar("T")
+
+# Chunk rỗng trong AudioQueue: capture vừa Pause,
+# STT gửi nốt segment đang dở rồi giải phóng buffer
+PAUSE_MARKER = b""
+
+# Deadline (time.monotonic()) của request đang chạy trong task hiện tại,
+# 0 = không giới hạn
+_deadline: ContextVar[float] = ContextVar("segment_deadline", default=0.0)
+
+
+async def within_deadline(awaitable: Awaitable[T], deadline: float) -> T:
+    """
+    Chạy `awaitable`, hủy khi tới `deadline` (time.monotonic(), 0 = không giới hạn)
+    và raise asyncio.TimeoutError. Hủy task nên request HTTP đang chờ (client async)
+    và các lần sleep retry / throttle cũng bị hủy theo.
+    """
+    if not deadline:
+        return await awaitable
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()  # Tránh warning "coroutine was never awaited"
+        raise asyncio.TimeoutError()
+    token = _deadline.set(deadline)
+    try:
+        return await asyncio.wait_for(awaitable, remaining)
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> Optional[float]:
+    """Số giây còn lại trước deadline của request hiện tại (None nếu không có)"""
+    deadline = _deadline.get()
+    return deadline - time.monotonic() if deadline else None
+
+
+class OverloadPolicy(str, Enum):
+    """Cách xử lý khi hàng đợi segment chờ dịch bị đầy"""
+    DROP_OLDEST = "drop_oldest"  # Bỏ segment cũ nhất
+    MERGE = "merge"  # Gộp các segment đang chờ thành một request
+    DEGRADE = "degrade"  # Chuyển sang Translator nhanh hơn cho tới khi hết backlog
+
+    @classmethod
+    def parse(cls, value: Optional[str]) -> "OverloadPolicy":
+        try:
+            return cls((value or settings.OVERLOAD_POLICY).lower())
+        except ValueError:
+            logger.warning(
+                f"⚠️ Unknown overload policy '{value}'. Fallback to drop_oldest."
+            )
+            return cls.DROP_OLDEST
+
+
+@dataclass(slots=True)
+class Segment:
+    """Một đoạn transcript chờ dịch, kèm độ dài audio gốc (giây)"""
+    text: str
+    duration: float = 0.0
+    seq: int = 0  # Số thứ tự trong session
+    start: float = 0.0  # Vị trí bắt đầu theo audio clock của session (giây)
+    speech_end: float = 0.0  # time.monotonic() lúc chunk cuối của segment được capture
+    # time.monotonic() mà sau đó bản dịch không còn giá trị (0 = không hạn)
+    deadline: float = 0.0
+    trace: Optional[SegmentTrace] = None
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        if not self.deadline:
+            return False
+        return (time.monotonic() if now is None else now) >= self.deadline
+
+
+@dataclass(slots=True)
+class OverloadStats:
+    # Session nhiều kênh: cộng dồn phần bị mất của từng kênh
+    dropped_audio_seconds: float = 0.0
+    dropped_segments: int = 0
+    merged_segments: int = 0
+    expired_segments: int = 0  # Bỏ vì quá deadline (STT hoặc Translation)
+    degraded: bool = False
+    behind: bool = False
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "dropped_seconds": round(self.dropped_audio_seconds, 2),
+            "dropped_segments": self.dropped_segments,
+            "merged_segments": self.merged_segments,
+            "expired_segments": self.expired_segments,
+            "degraded": self.degraded,
+            "behind": self.behind,
+        }
+
+
+class AudioQueue:
+    """
+    Hàng đợi có giới hạn (theo số giây audio) giữa luồng Capture và STT.
+    Capture không bao giờ được block, nên khi đầy luôn drop chunk cũ nhất
+    và cộng dồn số giây bị mất vào stats.
+    Source tách kênh: mỗi kênh có một queue, cùng giữ tham chiếu tới chunk
+    interleaved `channels` kênh (không copy).
+    """
+    __slots__ = (
+        "stats", "bytes_per_second", "max_bytes", "_chunks", "_size",
+        "last_captured_at", "_ready", "_space", "_closed",
+    )
+
+    def __init__(
+        self,
+        stats: OverloadStats,
+        max_seconds: Optional[float] = None,
+        channels: int = settings.CHANNELS,
+    ) -> None:
+        self.stats = stats
+        self.bytes_per_second = BYTES_PER_SECOND * channels // settings.CHANNELS
+        max_seconds = max_seconds or settings.AUDIO_QUEUE_MAX_SECONDS
+        self.max_bytes = int(self.bytes_per_second * max_seconds)
+        self._chunks: Deque[Tuple[bytes, float]] = deque()  # (chunk, captured_at)
+        self._size = 0
+        self.last_captured_at = 0.0  # time.monotonic() lúc chunk vừa get() được capture
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._closed = False
+
+    @property
+    def backlog_seconds(self) -> float:
+        return self._size / self.bytes_per_second
+
+    @property
+    def nbytes(self) -> int:
+        """Số byte audio đang nằm trong queue"""
+        return self._size
+
+    def put_nowait(self, chunk: bytes, captured_at: Optional[float] = None) -> None:
+        """Gọi trên event loop (loop.call_soon_threadsafe từ thread capture)"""
+        self._chunks.append((chunk, captured_at or time.monotonic()))
+        self._size += len(chunk)
+        while self._size > self.max_bytes and len(self._chunks) > 1:
+            dropped, _ = self._chunks.popleft()
+            self._size -= len(dropped)
+            self.stats.dropped_audio_seconds += len(dropped) / self.bytes_per_second
+        self._ready.set()
+
+    async def put(self, chunk: bytes, captured_at: Optional[float] = None) -> None:
+        """Chờ tới khi queue còn chỗ rồi mới thêm (source không live, không drop)"""
+        while (
+            self._chunks
+            and self._size + len(chunk) > self.max_bytes
+            and not self._closed
+        ):
+            self._space.clear()
+            await self._space.wait()
+        self.put_nowait(chunk, captured_at)
+
+    async def get(self) -> Optional[bytes]:
+        """Trả về chunk tiếp theo, hoặc None khi queue đã đóng và rỗng"""
+        while not self._chunks:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        chunk, self.last_captured_at = self._chunks.popleft()
+        self._size -= len(chunk)
+        self._space.set()
+        return chunk
+
+    def close(self) -> None:
+        self._closed = True
+        self._ready.set()
+        self._space.set()
+
+
+class SegmentQueue:
+    """
+    Hàng đợi có giới hạn giữa STT và Translation, áp dụng OverloadPolicy khi đầy.
+    """
+    __slots__ = (
+        "stats", "policy", "max_size", "_segments", "_ready", "_space", "_closed",
+    )
+
+    def __init__(
+        self,
+        stats: OverloadStats,
+        policy: OverloadPolicy = OverloadPolicy.DROP_OLDEST,
+        max_size: Optional[int] = None,
+    ) -> None:
+        self.stats = stats
+        self.policy = policy
+        self.max_size = max(1, max_size or settings.SEGMENT_QUEUE_MAX)
+        self._segments: Deque[Segment] = deque()
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    @property
+    def is_full(self) -> bool:
+        return len(self._segments) >= self.max_size
+
+    @property
+    def nbytes(self) -> int:
+        """Ước lượng bộ nhớ của text đang chờ dịch"""
+        return sum(len(s.text) for s in self._segments)
+
+    def put_nowait(self, segment: Segment) -> List[Tuple[Segment, str]]:
+        """
+        Thêm segment, áp dụng policy nếu đầy.
+        Trả về các segment bị bỏ / gộp kèm lý do (để báo Client).
+        """
+        discarded = self._relieve() if self.is_full else []
+        self._segments.append(segment)
+        self._ready.set()
+        return discarded
+
+    async def put(self, segment: Segment) -> None:
+        """Chờ tới khi queue còn chỗ (cho source không live, không áp dụng policy)"""
+        while self.is_full and not self._closed:
+            self._space.clear()
+            await self._space.wait()
+        self._segments.append(segment)
+        self._ready.set()
+
+    def unget(self, segment: Segment) -> None:
+        """Trả segment về đầu hàng đợi (không áp dụng policy)"""
+        self._segments.appendleft(segment)
+        self._ready.set()
+
+    def _relieve(self) -> List[Tuple[Segment, str]]:
+        if self.policy == OverloadPolicy.MERGE:
+            first, last = self._segments[0], self._segments[-1]
+            merged = Segment(
+                text=" ".join(s.text for s in self._segments),
+                duration=last.end - first.start,
+                seq=first.seq,
+                start=first.start,
+                speech_end=last.speech_end,
+                deadline=last.deadline,
+                trace=first.trace,
+            )
+            absorbed = list(self._segments)[1:]
+            for segment in absorbed:
+                if segment.trace is not None:
+                    segment.trace.instant("merged", into=first.seq)
+                    segment.trace.close(dropped="merged")
+            self.stats.merged_segments += len(absorbed)  # Số request được tiết kiệm
+            self._segments.clear()
+            self._segments.append(merged)
+            return [(segment, "merged") for segment in absorbed]
+
+        if self.policy == OverloadPolicy.DEGRADE and not self.stats.degraded:
+            # Cho phép backlog vượt ngưỡng một lần;
+            # consumer sẽ chuyển Translator nhanh hơn
+            logger.warning(
+                "⚠️ Translation backlog full. Degrading to fallback provider."
+            )
+            self.stats.degraded = True
+            return []
+
+        # DROP_OLDEST (hoặc DEGRADE nhưng backlog vẫn đầy gấp đôi)
+        degrade = self.policy == OverloadPolicy.DEGRADE
+        if degrade and len(self._segments) < self.max_size * 2:
+            return []
+        dropped = self._segments.popleft()
+        if dropped.trace is not None:
+            dropped.trace.close(dropped="overload")
+        self.stats.dropped_segments += 1
+        self.stats.dropped_audio_seconds += dropped.duration
+        return [(dropped, "dropped")]
+
+    async def get(self) -> Optional[Segment]:
+        while not self._segments:
+            if self._closed:
+                return None
+            if self.stats.degraded:
+                logger.info(
+                    "✅ Translation backlog drained. Restoring primary provider."
+                )
+                self.stats.degraded = False
+            self._ready.clear()
+            await self._ready.wait()
+        self._space.set()
+        return self._segments.popleft()
+
+    def close(self) -> None:
+        self._closed = True
+        self._ready.set()
+        self._space.set()
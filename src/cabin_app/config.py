@@ -15,6 +15,20 @@ class Settings(BaseSettings):
     CHANNELS: int = 1
     RATE: int = 16000
 
+    # Native Capture: mở thiết bị ở sample rate/số kênh gốc,
+    # resample + downmix trong process
+    # False = yêu cầu PortAudio trả đúng RATE/CHANNELS (host API tự resample)
+    AUDIO_CAPTURE_NATIVE: bool = True
+    # Số kênh tối đa mở trên thiết bị (downmix về CHANNELS)
+    AUDIO_CAPTURE_MAX_CHANNELS: int = 2
+    # Source `split=true`: số kênh tối đa,
+    # mỗi kênh một pipeline VAD/STT/Translation riêng
+    AUDIO_SPLIT_MAX_CHANNELS: int = 8
+    # Độ dài FIR mỗi pha: cao hơn = chống alias tốt hơn, tốn CPU hơn
+    RESAMPLER_TAPS_PER_PHASE: int = 32
+    RESAMPLER_ROLLOFF: float = 0.9  # Cutoff = rolloff * Nyquist của rate thấp hơn
+    RESAMPLER_KAISER_BETA: float = 8.0  # Kaiser window (~80 dB stopband)
+
     # API Keys
     DEEPGRAM_API_KEY: str = ""
     GROQ_API_KEY: str = ""
@@ -51,16 +65,157 @@ class Settings(BaseSettings):
         {"id": "mock", "name": "🧪 Mock Test"},
     ]
 
+    # Mock Providers (giả lập độ trễ cho load test, phân phối log-normal quanh median)
+    MOCK_STT_LATENCY: float = 0.0  # Median seconds
+    MOCK_TRANSLATION_LATENCY: float = 0.1  # Median seconds
+    MOCK_LATENCY_SIGMA: float = 0.0  # 0 = cố định; ~0.5 gần với API thật (đuôi dài)
+
     # Buffer Settings (Seconds)
     BUFFER_DEFAULT: float = 5.0
     BUFFER_MIN: float = 1.0
     BUFFER_MAX: float = 10.0
     BUFFER_STEP: float = 0.5
 
+    # Audio Sources (Query param `source` của /ws/cabin)
+    # Bật thêm "tcp", "unix" để nhận PCM từ socket feed
+    AUDIO_SOURCES_ALLOWED: List[str] = ["mic", "file", "record"]
+    # Thư mục cho file replay/recording. Rỗng = <project root>/recordings
+    AUDIO_FILE_ROOT: str = ""
+
+    # Pause / Resume (source live)
+    # Seconds Pause trước khi dừng hẳn mic (giải phóng thiết bị).
+    # 0 = dừng ngay (không có pre-roll)
+    PAUSE_RELEASE_AFTER: float = 10.0
+    # Audio ngay trước Resume được giữ lại khi mic chưa dừng, để không mất từ đầu tiên
+    PAUSE_PREROLL_SECONDS: float = 0.5
+
     # VAD (Smart Buffering)
     VAD_ENABLED: bool = True
     VAD_THRESHOLD: int = 1000  # RMS Threshold (Adjust based on mic)
     VAD_SILENCE_DURATION: float = 0.8  # Seconds of silence to trigger send
+    # Khi buffer đầy: tìm điểm yên lặng nhất trong N giây cuối (0 = cắt cứng)
+    MAX_BUFFER_CUT_SEARCH: float = 0.8
+
+    # Auto-tuning (chỉnh buffer / VAD silence theo độ trễ quan sát được,
+    # bật bằng ?autotune=true)
+    AUTOTUNE_ENABLED: bool = False
+    # Round-trip STT/Translation tối đa so với độ dài segment
+    AUTOTUNE_TARGET_UTILIZATION: float = 0.7
+    # Tỉ lệ segment bị lọc (hallucination) trước khi kéo dài segment
+    AUTOTUNE_MAX_DROP_RATE: float = 0.2
+    # Segment trung bình ngắn hơn (seconds) -> tăng silence
+    AUTOTUNE_MIN_SEGMENT: float = 1.0
+    AUTOTUNE_SILENCE_MIN: float = 0.3
+    AUTOTUNE_SILENCE_MAX: float = 1.5
+    AUTOTUNE_INTERVAL_SEGMENTS: int = 3  # Số segment quan sát giữa hai lần điều chỉnh
+
+    # Partial Transcripts (batch STT: re-transcribe audio đang nói
+    # để hiện kết quả tạm thời)
+    PARTIAL_TRANSCRIPTS_ENABLED: bool = False
+    PARTIAL_INTERVAL: float = 1.0  # Seconds audio mới giữa hai request partial
+    PARTIAL_MIN_AUDIO: float = 1.0  # Seconds audio tối thiểu trước partial đầu tiên
+    # Số từ cuối của phần đã ổn định chưa commit (điểm cắt là ước lượng)
+    PARTIAL_HOLDBACK_WORDS: int = 1
+    # Seconds quanh điểm cắt ước lượng để tìm khoảng lặng giữa hai từ
+    PARTIAL_CUT_SEARCH: float = 0.25
+    # Tail ngắn hơn (sau khi đã commit) thì không gửi request final
+    PARTIAL_MIN_TAIL: float = 0.3
+    # Quota STT mỗi provider (final + partial); partial chỉ dùng phần dư.
+    # 0 = không giới hạn
+    PARTIAL_MAX_REQUESTS_PER_MINUTE: int = 20
+
+    # Hallucination Filter (Whisper repetition loops)
+    HALLUCINATION_LOOP_MAX_NGRAM: int = 6  # Độ dài n-gram tối đa khi dò vòng lặp
+    HALLUCINATION_LOOP_MIN_REPEATS: int = 4  # Số lần lặp liên tiếp tối thiểu
+    # Tổng số từ tối thiểu bị lặp (tránh bắt nhầm "no no no")
+    HALLUCINATION_LOOP_MIN_TOKENS: int = 8
+    # Vòng lặp chiếm >= tỉ lệ này -> bỏ cả segment
+    HALLUCINATION_LOOP_DROP_RATIO: float = 0.5
+
+    # Backpressure (Capture -> STT -> Translation)
+    # Audio tối đa chờ STT, vượt quá sẽ drop oldest
+    AUDIO_QUEUE_MAX_SECONDS: float = 5.0
+    # Backlog audio vượt ngưỡng này = session đang bị trễ
+    AUDIO_BEHIND_SECONDS: float = 1.0
+    SEGMENT_QUEUE_MAX: int = 3  # Số segment tối đa chờ dịch
+    OVERLOAD_POLICY: Literal["drop_oldest", "merge", "degrade"] = "drop_oldest"
+    # Translator nhanh hơn dùng khi policy = degrade
+    OVERLOAD_FALLBACK_PROVIDER: str = "groq"
+    # Seconds giữa các lần báo trạng thái cho Client
+    OVERLOAD_REPORT_INTERVAL: float = 0.5
+    # Speech end -> transcript/bản dịch tối đa;
+    # quá hạn thì hủy request và báo "skipped". 0 = tắt
+    SEGMENT_DEADLINE_SECONDS: float = 8.0
+    # Bytes tối đa cho buffer audio của một session (STT buffer + AudioQueue).
+    # 0 = không giới hạn
+    SESSION_MEMORY_BUDGET: int = 1 << 20
+
+    # Audio Executor (CPU work theo segment: WAV encode, tìm điểm cắt, features)
+    # inline: work hiện tại (~50µs / segment) rẻ hơn chi phí dispatch;
+    # thread / process khi có transform nặng trên máy nhiều core
+    # (process = process pool, audio qua shared memory)
+    AUDIO_EXECUTOR: Literal["inline", "thread", "process"] = "inline"
+    # Số thread / process dùng chung mọi session. 0 = số CPU core
+    AUDIO_EXECUTOR_WORKERS: int = 0
+
+    # WebSocket Protocol (/ws/cabin)
+    # Cho phép negotiate cabin.v2 (binary + gom message); False = luôn JSON
+    WS_BINARY_PROTOCOL: bool = True
+    # Seconds gom message trước khi gửi một frame (0 = trong cùng một vòng event loop)
+    WS_COALESCE_WINDOW: float = 0.0
+    # permessage-deflate (~45KB zlib state mỗi kết nối)
+    WS_PER_MESSAGE_DEFLATE: bool = True
+
+    # Tracing (timeline từng segment, xuất Chrome Trace qua /api/trace)
+    TRACE_ENABLED: bool = True
+    # Ring buffer span dùng chung mọi session (~200 bytes / span)
+    TRACE_BUFFER_SPANS: int = 50000
+
+    # Micro-batching (gộp nhiều segment ngắn vào một request dịch)
+    TRANSLATION_BATCH_ENABLED: bool = False
+    # Seconds chờ thêm segment sau segment đầu tiên
+    TRANSLATION_BATCH_WINDOW: float = 0.3
+    TRANSLATION_BATCH_MAX_TOKENS: int = 400  # Ngân sách token (ước lượng) cho một batch
+    TRANSLATION_BATCH_MAX_SEGMENTS: int = 8
+
+    # Translation Memory (dùng lại bản dịch cho segment gần giống, trước LLM Translator)
+    TRANSLATION_MEMORY_ENABLED: bool = True
+    # Rỗng = <project root>/data/translation_memory.jsonl
+    TRANSLATION_MEMORY_PATH: str = ""
+    # Vượt quá sẽ evict entry ít dùng nhất (LRU)
+    TRANSLATION_MEMORY_MAX_ENTRIES: int = 5000
+    # Jaccard (character trigram) để dùng lại nguyên bản dịch
+    TRANSLATION_MEMORY_REUSE_THRESHOLD: float = 0.9
+    # Jaccard để gửi bản dịch cũ làm gợi ý cho LLM
+    TRANSLATION_MEMORY_HINT_THRESHOLD: float = 0.6
+    # Câu ngắn hơn chỉ dùng lại khi khớp chính xác (sau chuẩn hóa)
+    TRANSLATION_MEMORY_MIN_CHARS: int = 12
+    TRANSLATION_MEMORY_FILLERS: List[str] = [
+        "um", "uh", "erm", "hmm", "you know", "i mean",
+    ]
+
+    # STT Cache (transcript theo hash của segment PCM + provider/model/ngôn ngữ,
+    # đặt trước provider STT)
+    # disk: thêm tier trên đĩa; replay: chỉ đọc đĩa (fixture offline)
+    STT_CACHE_MODE: Literal["off", "memory", "disk", "replay"] = "memory"
+    # Tier memory, vượt quá sẽ evict entry ít dùng nhất (LRU)
+    STT_CACHE_MAX_ENTRIES: int = 2000
+    STT_CACHE_DIR: str = ""  # Rỗng = <project root>/data/stt_cache
+
+    # Session Journal (append-only JSONL, ghi bởi background thread)
+    JOURNAL_ENABLED: bool = True
+    JOURNAL_DIR: str = ""  # Rỗng = <project root>/journal
+    JOURNAL_FLUSH_INTERVAL: float = 0.5  # Seconds tối đa một record nằm trong queue
+    JOURNAL_FSYNC_INTERVAL: float = 2.0  # Seconds giữa các lần fsync
+    JOURNAL_BATCH_MAX: int = 256  # Số record tối đa mỗi lần ghi
+    JOURNAL_MAX_BYTES: int = 5 * 1024 * 1024  # Xoay sang part mới khi vượt
+
+    # Event-loop Monitor (bật/tắt lúc chạy qua POST /api/loop)
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL: float = 0.05  # Seconds giữa các heartbeat
+    LOOP_MONITOR_THRESHOLD: float = 0.1  # Lag vượt ngưỡng -> chụp stack của thread loop
+    LOOP_MONITOR_MAX_SITES: int = 50  # Số call site tối đa được giữ lại
+    LOOP_MONITOR_STACK_DEPTH: int = 12  # Số frame (sâu nhất) lưu cho mỗi call site
 
     # UI UX
     UI_SCROLL_PADDING: int = 30
@@ -0,0 +1,193 @@
+# Path: src/cabin_app/executor.py
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from cabin_app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MODES = ("inline", "thread", "process")
+
+
+# --- Process worker
+# (chạy trong process con, hàm phải import được theo tên module) ---
+def _init_worker() -> None:
+    # Ctrl+C chỉ dành cho server; worker được dừng qua shutdown()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Python < 3.13: attach cũng đăng ký block với resource tracker;
+    # worker dùng chung tracker với server (ensure_running trước khi spawn)
+    # nên đăng ký trùng không gây unlink / cảnh báo
+    return shared_memory.SharedMemory(name=name)
+
+
+def _buffer(shm: shared_memory.SharedMemory) -> memoryview:
+    buf = shm.buf
+    if buf is None:
+        raise RuntimeError(f"Shared memory block {shm.name} is closed")
+    return buf
+
+
+def _run_shared(
+    func: Callable[..., T], name: str, size: int, args: Tuple[Any, ...]
+) -> T:
+    """
+    Gọi func(view, *args) trên audio trong shared memory
+    (không copy / unpickle audio)
+    """
+    shm = _attach(name)
+    view = _buffer(shm)[:size]
+    try:
+        return func(view, *args)
+    finally:
+        view.release()
+        shm.close()
+
+
+def _noop() -> int:
+    return os.getpid()
+
+
+class AudioExecutor:
+    """
+    Nơi chạy CPU work theo segment (WAV encode, tìm điểm cắt, feature extraction)
+    thay vì chạy thẳng trên event loop:
+    - inline: gọi trực tiếp (như trước, một core)
+    - thread: ThreadPoolExecutor, hợp với NumPy / codec nhả GIL; dispatch rẻ
+      nhưng phần Python vẫn tranh GIL với loop
+    - process: ProcessPoolExecutor (spawn), audio được copy một lần vào
+      SharedMemory thay vì pickle qua pipe; worker không dùng chung GIL với loop.
+      Kết quả (offset, bytes đã encode) được trả về bình thường.
+    Work theo từng chunk (RMS cho VAD) vẫn chạy inline:
+    dispatch tốn hơn bản thân phép tính.
+    """
+
+    def __init__(self, mode: str, workers: int) -> None:
+        if mode not in MODES:
+            raise ValueError(f"AUDIO_EXECUTOR must be one of {MODES}, got {mode!r}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.jobs = 0
+        self.failures = 0
+        # Tổng thời gian (wall) từ lúc gửi job tới lúc có kết quả
+        self.busy_seconds = 0.0
+        self.max_in_flight = 0
+        self._in_flight = 0
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.mode == "process":
+                    # Worker kế thừa resource tracker của server
+                    # (nếu chưa chạy, mỗi worker tự mở một cái riêng)
+                    resource_tracker.ensure_running()
+                    # spawn: fork một process đang có event loop + capture thread
+                    # không an toàn
+                    self._pool = ProcessPoolExecutor(
+                        self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        self.workers, thread_name_prefix="audio-worker"
+                    )
+                logger.info(f"🧵 Audio executor: {self.mode} x{self.workers}")
+            return self._pool
+
+    async def start(self) -> None:
+        """
+        Khởi động worker trước
+        (spawn process mất ~0.1-1s, không để segment đầu tiên chịu)
+        """
+        if self.mode == "inline":
+            return
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        await asyncio.gather(
+            *(loop.run_in_executor(pool, _noop) for _ in range(self.workers))
+        )
+
+    async def run(self, func: Callable[..., T], audio: bytes, *args: Any) -> T:
+        """
+        func(audio, *args) ở worker;
+        func phải nhận bytes-like (memoryview) và là hàm cấp module
+        """
+        if self.mode == "inline":
+            return func(audio, *args)
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        started = time.monotonic()
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        self.jobs += 1
+        try:
+            if self.mode == "thread":
+                return await loop.run_in_executor(pool, func, audio, *args)
+            shm = shared_memory.SharedMemory(create=True, size=max(1, len(audio)))
+            try:
+                _buffer(shm)[:len(audio)] = audio
+                return await loop.run_in_executor(
+                    pool, _run_shared, func, shm.name, len(audio), args
+                )
+            finally:
+                shm.close()
+                shm.unlink()
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            self.busy_seconds += time.monotonic() - started
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "jobs": self.jobs,
+            "failures": self.failures,
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "mean_ms": (
+                round(self.busy_seconds / self.jobs * 1000, 3) if self.jobs else None
+            ),
+        }
+
+
+@lru_cache(maxsize=1)
+def get_audio_executor() -> AudioExecutor:
+    return AudioExecutor(settings.AUDIO_EXECUTOR, settings.AUDIO_EXECUTOR_WORKERS)
+
+
+async def offload(func: Callable[..., T], audio: bytes, *args: Any) -> T:
+    """
+    Chạy func(audio, *args) trên AudioExecutor dùng chung
+    (chế độ theo AUDIO_EXECUTOR)
+    """
+    return await get_audio_executor().run(func, audio, *args)
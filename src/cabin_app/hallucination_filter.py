@@ -0,0 +1,173 @@
+# Path: src/cabin_app/hallucination_filter.py
+import re
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+from cabin_app.config import get_settings
+from cabin_app.hallucinations import (
+    HALLUCINATION_PHRASES,
+    HALLUCINATION_PREFIXES,
+    HALLUCINATION_PATTERNS,
+)
+
+settings = get_settings()
+
+# Dấu câu bị bỏ khi chuẩn hóa. Giữ lại [], (), ♪ để regex nhận diện tag kiểu [Music].
+_PUNCTUATION = re.compile(r"[.,!?;:\"'`“”‘’…¡¿\-–—]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Chuẩn hóa để so khớp: NFKC, lowercase, bỏ dấu câu, gộp khoảng trắng"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+@dataclass(frozen=True)
+class RepetitionLoop:
+    start: int  # Vị trí token bắt đầu
+    size: int  # Độ dài n-gram
+    repeats: int  # Số lần lặp liên tiếp
+
+    @property
+    def span(self) -> int:
+        return self.size * self.repeats
+
+
+def find_repetition_loops(
+    keys: List[str], max_ngram: int, min_repeats: int, min_tokens: int
+) -> List[RepetitionLoop]:
+    """
+    Dò các n-gram lặp liên tiếp (lỗi "vòng lặp" kinh điển của Whisper),
+    ví dụ "we will go. we will go. we will go. ...".
+    Greedy, ưu tiên vòng lặp phủ dài nhất.
+    """
+    loops: List[RepetitionLoop] = []
+    total = len(keys)
+    i = 0
+    while i < total:
+        best: Optional[RepetitionLoop] = None
+        for size in range(1, min(max_ngram, (total - i) // 2) + 1):
+            gram = keys[i:i + size]
+            repeats = 1
+            while keys[i + repeats * size:i + (repeats + 1) * size] == gram:
+                repeats += 1
+            if repeats >= min_repeats and size * repeats >= min_tokens:
+                if best is None or size * repeats > best.span:
+                    best = RepetitionLoop(i, size, repeats)
+        if best:
+            loops.append(best)
+            i += best.span
+        else:
+            i += 1
+    return loops
+
+
+class HallucinationFilter:
+    """
+    Bộ lọc ảo giác STT, build một lần từ `hallucinations.py`:
+    - Một regex tổng hợp duy nhất cho Exact / Prefix / Regex trên text đã chuẩn hóa.
+    - Dò vòng lặp n-gram: bỏ cả segment nếu vòng lặp chiếm phần lớn,
+      nếu không thì thu gọn.
+    - Đếm số lần trúng theo từng pattern (thread-safe).
+    """
+    def __init__(
+        self,
+        phrases: Iterable[str] = HALLUCINATION_PHRASES,
+        prefixes: Iterable[str] = HALLUCINATION_PREFIXES,
+        patterns: Iterable[str] = HALLUCINATION_PATTERNS,
+    ) -> None:
+        self._matcher, self._labels = self._compile(phrases, prefixes, patterns)
+        self.hits: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _compile(
+        phrases: Iterable[str], prefixes: Iterable[str], patterns: Iterable[str]
+    ) -> Tuple[Optional[Pattern[str]], Dict[str, str]]:
+        alternatives: List[str] = []
+        labels: Dict[str, str] = {}
+
+        def add(kind: str, source: str, regex: str) -> None:
+            group = f"g{len(alternatives)}"
+            labels[group] = f"{kind}:{source}"
+            alternatives.append(f"(?P<{group}>{regex})")
+
+        # Exact trước để label ưu tiên đúng loại; bỏ trùng sau khi chuẩn hóa
+        for phrase in sorted({normalize_text(p) for p in phrases} - {""}):
+            add("exact", phrase, re.escape(phrase) + r"\Z")
+        for prefix in sorted({normalize_text(p) for p in prefixes} - {""}):
+            add("prefix", prefix, re.escape(prefix))
+        for pattern in patterns:
+            add("regex", pattern, f"(?:{pattern})")
+
+        matcher = re.compile("|".join(alternatives)) if alternatives else None
+        return matcher, labels
+
+    def _hit(self, label: str) -> None:
+        with self._lock:
+            self.hits[label] += 1
+
+    def match(self, text: str) -> Optional[str]:
+        """Trả về label của pattern trúng (ví dụ "prefix:subtitles by"), hoặc None"""
+        normalized = normalize_text(text)
+        if not normalized:
+            return "empty"
+        if self._matcher is None:
+            return None
+        found = self._matcher.match(normalized)
+        if found is None or found.lastgroup is None:
+            return None
+        return self._labels[found.lastgroup]
+
+    def clean(self, text: str) -> str:
+        """
+        Trả về text đã lọc; chuỗi rỗng nghĩa là segment là rác,
+        không được gửi đi dịch
+        """
+        text = text.strip()
+        label = self.match(text)
+        if label:
+            self._hit(label)
+            return ""
+        return self._collapse_loops(text)
+
+    def _collapse_loops(self, text: str) -> str:
+        tokens = text.split()
+        keys = [normalize_text(t) for t in tokens]
+        loops = find_repetition_loops(
+            keys,
+            settings.HALLUCINATION_LOOP_MAX_NGRAM,
+            settings.HALLUCINATION_LOOP_MIN_REPEATS,
+            settings.HALLUCINATION_LOOP_MIN_TOKENS,
+        )
+        if not loops:
+            return text
+
+        self._hit("loop")
+        looped = sum(loop.span - loop.size for loop in loops)
+        if looped >= len(tokens) * settings.HALLUCINATION_LOOP_DROP_RATIO:
+            return ""
+
+        # Giữ lại một lần xuất hiện của mỗi vòng lặp
+        kept: List[str] = []
+        cursor = 0
+        for loop in loops:
+            kept.extend(tokens[cursor:loop.start + loop.size])
+            cursor = loop.start + loop.span
+        kept.extend(tokens[cursor:])
+        return " ".join(kept)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.hits.most_common())
+
+
+@lru_cache()
+def get_hallucination_filter() -> HallucinationFilter:
+    return HallucinationFilter()
@@ -22,3 +22,14 @@ HALLUCINATION_PREFIXES = [
     "copyright",
     "all rights reserved"
 ]
+
+# 3. Regex (match từ đầu chuỗi) - Áp dụng trên text đã chuẩn hóa:
+#    lowercase, bỏ dấu câu .,!?;:"' và gộp khoảng trắng (giữ lại [], (), ♪)
+#    Dùng group không bắt (?:...) thay vì (...) để không xung đột với matcher tổng.
+HALLUCINATION_PATTERNS = [
+    r"\[[^\]]*\]\Z",          # [Music], [BLANK_AUDIO], [Applause]
+    r"\([^)]*\)\Z",           # (upbeat music), (silence)
+    r"[♪♫\s]+\Z",              # Chỉ có ký hiệu nhạc
+    r"please (?:like and )?subscribe\b",
+    r"(?:thanks|thank you) for watching\b",
+]
@@ -0,0 +1,273 @@
+# Path: src/cabin_app/loop_monitor.py
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cabin_app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+# Upper bound (ms) của từng bucket histogram; phần vượt bucket cuối rơi vào "+Inf"
+LAG_BUCKETS_MS: Tuple[float, ...] = (
+    1, 2, 5, 10, 20, 50, 100, 250, 500, 1000, 2500, 5000,
+)
+
+
+def _describe(frame: traceback.FrameSummary) -> str:
+    path = Path(frame.filename)
+    try:
+        name = str(path.resolve().relative_to(PACKAGE_DIR.parent))
+    except ValueError:
+        name = path.name
+    return f"{name}:{frame.lineno} in {frame.name}"
+
+
+def _is_idle(stack: traceback.StackSummary) -> bool:
+    """Loop đang chờ I/O trong selector = không bị block (chỉ là timer trễ)"""
+    innermost = stack[-1]
+    return (
+        innermost.name in ("select", "poll", "control")
+        and Path(innermost.filename).name == "selectors.py"
+    )
+
+
+def _call_site(stack: traceback.StackSummary) -> traceback.FrameSummary:
+    """
+    Frame sâu nhất thuộc code của app (nơi gọi hàm blocking);
+    nếu không có thì frame sâu nhất
+    """
+    for frame in reversed(stack):
+        path = Path(frame.filename).resolve()
+        if PACKAGE_DIR in path.parents and path.name != "loop_monitor.py":
+            return frame
+    return stack[-1]
+
+
+@dataclass
+class LagHistogram:
+    counts: List[int] = field(
+        default_factory=lambda: [0] * (len(LAG_BUCKETS_MS) + 1)
+    )
+    total: int = 0
+    sum_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def observe(self, lag_ms: float) -> None:
+        index = bisect.bisect_left(LAG_BUCKETS_MS, lag_ms)
+        self.counts[index] += 1
+        self.total += 1
+        self.sum_ms += lag_ms
+        self.max_ms = max(self.max_ms, lag_ms)
+
+    def quantile(self, q: float) -> float:
+        """Ước lượng theo upper bound của bucket (đủ chính xác cho cảnh báo)"""
+        if not self.total:
+            return 0.0
+        rank = q * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                if index < len(LAG_BUCKETS_MS):
+                    return LAG_BUCKETS_MS[index]
+                return self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, object]:
+        labels = [f"<={bound:g}ms" for bound in LAG_BUCKETS_MS] + ["+Inf"]
+        return {
+            "count": self.total,
+            "mean_ms": round(self.sum_ms / self.total, 2) if self.total else 0.0,
+            "p50_ms": self.quantile(0.50),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_ms, 1),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+@dataclass
+class BlockingSite:
+    location: str  # Frame của app đã gọi hàm blocking
+    blocked_in: str  # Frame sâu nhất lúc chụp (thường nằm trong thư viện)
+    stack: List[str]
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_seen: float = 0.0
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "location": self.location,
+            "blocked_in": self.blocked_in,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "max_ms": round(self.max_ms, 1),
+            "last_seen": round(self.last_seen, 3),
+            "stack": self.stack,
+        }
+
+
+class LoopMonitor:
+    """
+    Đo event-loop lag liên tục và tìm call site đang block loop.
+    - Heartbeat (trên loop): sleep(interval), độ trễ so với hạn = lag -> histogram.
+    - Watchdog (thread riêng): nếu heartbeat quá hạn > threshold, chụp stack của
+      thread loop bằng sys._current_frames() ngay lúc loop đang bị giữ, rồi cộng
+      dồn thời gian block theo call site.
+    Chi phí khi loop khỏe: một timer mỗi interval và một thread ngủ;
+    stack chỉ được chụp khi có stall.
+    """
+    def __init__(
+        self,
+        interval: float = settings.LOOP_MONITOR_INTERVAL,
+        threshold: float = settings.LOOP_MONITOR_THRESHOLD,
+        max_sites: int = settings.LOOP_MONITOR_MAX_SITES,
+        stack_depth: int = settings.LOOP_MONITOR_STACK_DEPTH,
+    ) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.max_sites = max_sites
+        self.stack_depth = stack_depth
+        self.histogram = LagHistogram()
+        self.sites: Dict[str, BlockingSite] = {}
+        self.stalls = 0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._beat = 0  # Số heartbeat đã hoàn thành
+        self._due: Optional[float] = None  # Thời điểm heartbeat hiện tại phải chạy
+        # Heartbeat đã được chụp stack (mỗi stall chỉ chụp một lần)
+        self._captured_beat = -1
+        self._pending: Optional[BlockingSite] = None  # Site của stall đang diễn ra
+
+    @property
+    def enabled(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Gọi từ bên trong event loop cần theo dõi"""
+        if self.enabled:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._due = None
+        # Event mới cho mỗi lần bật để watchdog cũ chắc chắn thoát
+        self._stop = threading.Event()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        threading.Thread(
+            target=self._watch,
+            args=(self._stop,),
+            name="cabin-loop-watchdog",
+            daemon=True,
+        ).start()
+        logger.info(
+            f"🩺 Loop monitor on (interval {self.interval * 1000:.0f}ms, "
+            f"threshold {self.threshold * 1000:.0f}ms)"
+        )
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._stop.set()  # Watchdog tự thoát sau tối đa một chu kỳ
+        self._due = None
+        logger.info("🩺 Loop monitor off")
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histogram = LagHistogram()
+            self.sites.clear()
+            self.stalls = 0
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._due = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self._record(max(0.0, time.monotonic() - self._due))
+
+    def _record(self, lag: float) -> None:
+        lag_ms = lag * 1000
+        with self._lock:
+            self.histogram.observe(lag_ms)
+            site, self._pending = self._pending, None
+            self._beat += 1
+            if site is None:
+                return
+            # Watchdog đã chụp stack trong stall này: giờ mới biết stall kéo dài bao lâu
+            site.total_ms += lag_ms
+            site.max_ms = max(site.max_ms, lag_ms)
+        if site.count == 1:
+            logger.warning(
+                f"🐢 Event loop blocked {lag_ms:.0f}ms at {site.location} "
+                f"(in {site.blocked_in})"
+            )
+
+    def _watch(self, stop: threading.Event) -> None:
+        period = min(self.interval, self.threshold) / 2
+        while not stop.wait(period):
+            due = self._due
+            if due is None or time.monotonic() - due < self.threshold:
+                continue
+            with self._lock:
+                if self._captured_beat == self._beat:
+                    continue
+                self._captured_beat = self._beat
+            self._capture()
+
+    def _capture(self) -> None:
+        thread_id = self._loop_thread_id
+        if thread_id is None:
+            return
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame, limit=self.stack_depth)
+        del frame
+        if not stack or _is_idle(stack):
+            return
+
+        location = _describe(_call_site(stack))
+        with self._lock:
+            self.stalls += 1
+            site = self.sites.get(location)
+            if site is None:
+                if len(self.sites) >= self.max_sites:
+                    # Bỏ site ít tốn thời gian nhất để giữ bộ nhớ có giới hạn
+                    weakest = min(self.sites.values(), key=lambda s: s.total_ms)
+                    del self.sites[weakest.location]
+                site = BlockingSite(
+                    location, _describe(stack[-1]), [_describe(f) for f in stack]
+                )
+                self.sites[location] = site
+            site.count += 1
+            site.last_seen = time.time()
+            self._pending = site
+
+    def snapshot(self, top: int = 20) -> Dict[str, object]:
+        with self._lock:
+            ranked = sorted(
+                self.sites.values(), key=lambda s: s.total_ms, reverse=True
+            )[:top]
+            return {
+                "enabled": self.enabled,
+                "interval_ms": self.interval * 1000,
+                "threshold_ms": self.threshold * 1000,
+                "stalls": self.stalls,
+                "lag": self.histogram.to_dict(),
+                "blocking_sites": [site.to_dict() for site in ranked],
+            }
+
+
+@lru_cache()
+def get_loop_monitor() -> LoopMonitor:
+    return LoopMonitor()
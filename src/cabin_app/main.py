@@ -3,31 +3,41 @@ import asyncio
 import logging
 import json
 import warnings
+from contextlib import asynccontextmanager
 # Suppress Pydantic V1 warnings from Deepgram SDK running on newer Python versions
 warnings.filterwarnings("ignore", message="Core Pydantic V1 functionality isn't compatible")
 
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 import uvicorn
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi import FastAPI, WebSocket, Query, HTTPException
+from fastapi.responses import (
+    HTMLResponse, JSONResponse, FileResponse, PlainTextResponse,
+)
 from fastapi.staticfiles import StaticFiles
 
 from cabin_app.config import get_settings
 from cabin_app.audio_core import AudioStreamer
+from cabin_app.audio_sources import AudioSource, open_source
 from cabin_app.model_manager import ModelManager
+from cabin_app.hallucination_filter import get_hallucination_filter
+from cabin_app.session import CabinSession, live_sessions, plan_memory
+from cabin_app.protocol import negotiate
+from cabin_app.session_journal import (
+    list_sessions, read_session, export_srt, export_vtt,
+)
+from cabin_app.loop_monitor import get_loop_monitor
+from cabin_app.translation_memory import MemoryTranslator, get_translation_memory
+from cabin_app.tracing import get_tracer
+from cabin_app.executor import get_audio_executor
+from cabin_app.stt_cache import get_stt_cache
 
-# --- NEW SERVICES IMPORT STRUCTURE ---
+# --- SERVICES (Lazy Registry: SDK chỉ được import khi provider được dùng) ---
 from cabin_app.services import (
-    Transcriber, Translator,
-    # STT
-    GroqTranscriber, DeepgramTranscriber, GoogleTranscriber, MockTranscriber,
-    HAS_DEEPGRAM, HAS_GOOGLE_SPEECH,
-    # Translation
-    GroqTranslator, OpenAITranslator, GoogleTranslator, MockTranslator,
-    HAS_GOOGLE_GENAI
+    Transcriber, Translator, stt_registry, translation_registry,
 )
+from cabin_app.services.translation.llm import LLMTranslator
 
 # --- CONFIG LOGGING ---
 logging.basicConfig(level=logging.INFO)
@@ -38,9 +48,25 @@ logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("httpcore").setLevel(logging.WARNING)
 logging.getLogger("google.auth").setLevel(logging.WARNING) # Suppress Google Auth logs
 
-app = FastAPI()
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.LOOP_MONITOR_ENABLED:
+        get_loop_monitor().start()
+    if settings.TRANSLATION_MEMORY_ENABLED:
+        await asyncio.to_thread(get_translation_memory().load)
+    await get_audio_executor().start()
+    yield
+    get_loop_monitor().stop()
+    get_audio_executor().shutdown()
+    if settings.TRANSLATION_MEMORY_ENABLED:
+        await asyncio.to_thread(get_translation_memory().flush)
+
+
+app = FastAPI(lifespan=lifespan)
+
 BASE_DIR = Path(__file__).resolve().parent
 TEMPLATE_DIR = BASE_DIR / "templates"
 TEMPLATE_PATH = TEMPLATE_DIR / "index.html"
@@ -59,15 +85,6 @@ def load_glossary() -> Dict[str, str]:
 
 global_glossary = load_glossary()
 
-# --- 2. Initialize Translators Map ---
-# Khởi tạo sẵn các Translator (trừ khi cần tham số động)
-translators_map: Dict[str, Translator] = {
-    "mock": MockTranslator(),
-    "groq": GroqTranslator(),
-    "openai": OpenAITranslator(),
-    "google": GoogleTranslator() if HAS_GOOGLE_GENAI else MockTranslator()
-}
-
 if STATIC_DIR.exists():
     app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 
@@ -86,8 +103,8 @@ async def get():
     if not TEMPLATE_PATH.exists():
         return HTMLResponse(content="Error", status_code=404)
     
-    with open(TEMPLATE_PATH, "r", encoding="utf-8") as f:
-        html_content = f.read()
+    # Đọc file trong thread để không block event loop
+    html_content = await asyncio.to_thread(TEMPLATE_PATH.read_text, encoding="utf-8")
     
     # Inject Configs
     html_content = html_content.replace("{{UI_SCROLL_PADDING}}", str(settings.UI_SCROLL_PADDING))
@@ -110,19 +127,26 @@ async def get():
     
     return HTMLResponse(content=html_content)
 
-@app.get("/api/devices")
-async def get_devices():
+
+def _list_input_devices() -> List[Dict]:
     temp = AudioStreamer()
     devices = temp.get_input_devices()
     temp.stop_stream()
-    return JSONResponse(content=devices)
+    return devices
+
+
+@app.get("/api/devices")
+async def get_devices():
+    # Khởi tạo PortAudio quét toàn bộ thiết bị (có thể mất hàng trăm ms)
+    return JSONResponse(content=await asyncio.to_thread(_list_input_devices))
 
 @app.get("/api/models")
 async def get_models():
     """Dynamic Model Fetching"""
     # 1. Fetch Google Models
-    google_models = ModelManager.get_google_models()
-    
+    # Network call
+    google_models = await asyncio.to_thread(ModelManager.get_google_models)
+
     # 2. Merge with Default Options
     # Tạo danh sách options mới, thay thế mục 'google' tĩnh bằng danh sách động
     ai_options = []
@@ -144,143 +168,299 @@ async def get_models():
          # Fallback if fetch fails
          ai_options.append({"id": "google", "name": "✨ Google Gemini (Default)"})
 
-    return JSONResponse(content={"ai": ai_options, "stt": settings.STT_OPTIONS})
+    # Add Plugin Providers (đăng ký qua entry points, chưa có trong Registry UI)
+    stt_options = list(settings.STT_OPTIONS)
+    ai_options.extend(_plugin_options(translation_registry, settings.AI_OPTIONS))
+    stt_options.extend(_plugin_options(stt_registry, settings.STT_OPTIONS))
 
+    return JSONResponse(content={"ai": ai_options, "stt": stt_options})
 
-# --- 3. WebSocket with Dynamic Provider & Pause Logic ---
-@app.websocket("/ws/cabin")
-async def websocket_endpoint(
-    websocket: WebSocket, 
-    device_id: Optional[int] = Query(None),
-    provider: str = Query("mock"), # Can be "google:gemini-2.0" or just "groq"
-    stt_provider: str = Query("groq"), # STT Model
-    buffer: float = Query(settings.BUFFER_DEFAULT), # Buffer Duration (seconds)
-    vad_threshold: int = Query(settings.VAD_THRESHOLD),
-    vad_silence: float = Query(settings.VAD_SILENCE_DURATION)
+
+@app.get("/api/hallucinations")
+async def get_hallucination_stats():
+    """Số lần trúng của từng pattern lọc ảo giác (kể cả vòng lặp n-gram)"""
+    return JSONResponse(content=get_hallucination_filter().stats())
+
+
+@app.get("/api/loop")
+async def get_loop_stats(top: int = Query(20, ge=1, le=100)):
+    """
+    Histogram event-loop lag và danh sách call site đã block loop
+    (xếp theo tổng thời gian)
+    """
+    return JSONResponse(content=get_loop_monitor().snapshot(top))
+
+
+@app.post("/api/loop")
+async def set_loop_monitor(
+    enabled: Optional[bool] = Query(None), reset: bool = Query(False)
 ):
-    await websocket.accept()
-    
-    # 0. Parse Provider & Model
+    """Bật/tắt monitor lúc đang chạy, ví dụ POST /api/loop?enabled=false"""
+    monitor = get_loop_monitor()
+    if reset:
+        monitor.reset()
+    if enabled is True:
+        monitor.start()
+    elif enabled is False:
+        monitor.stop()
+    return JSONResponse(content=monitor.snapshot())
+
+
+@app.get("/api/executor")
+async def get_executor_stats():
+    """
+    AudioExecutor (AUDIO_EXECUTOR): số job theo segment đã offload,
+    số job đang chạy, thời gian trung bình
+    """
+    return JSONResponse(content=get_audio_executor().snapshot())
+
+
+@app.get("/api/sessions")
+async def get_live_sessions():
+    """Các session /ws/cabin đang mở, kèm kích thước buffer và bộ nhớ đang giữ"""
+    sessions = [session.describe() for session in list(live_sessions.values())]
+    return JSONResponse(content={
+        "count": len(sessions),
+        "memory_bytes": sum(s["memory"]["total"] for s in sessions),
+        "sessions": sessions,
+    })
+
+
+@app.get("/api/translation-memory")
+async def get_translation_memory_stats():
+    """Số entry và tỉ lệ dùng lại của Translation Memory (exact/fuzzy/hint/miss)"""
+    return JSONResponse(content=get_translation_memory().snapshot())
+
+
+@app.get("/api/stt-cache")
+async def get_stt_cache_stats():
+    """
+    Tỉ lệ hit (memory / disk) của STT cache và số giây audio
+    không phải gửi lại provider
+    """
+    cache = get_stt_cache()
+    if cache is None:
+        return JSONResponse(content={"mode": "off"})
+    return JSONResponse(content=cache.snapshot())
+
+
+@app.get("/api/trace")
+async def export_trace(
+    session: Optional[str] = Query(None),
+    seconds: Optional[float] = Query(None, gt=0)
+):
+    """
+    Timeline các segment gần đây (Chrome Trace Event JSON):
+    mở bằng ui.perfetto.dev hoặc chrome://tracing.
+    Lọc theo session id (xem /api/sessions) và/hoặc N giây gần nhất.
+    """
+    trace = get_tracer().export(session, seconds)
+    filename = f"cabin-trace-{session or 'all'}.json"
+    disposition = f'attachment; filename="{filename}"'
+    return JSONResponse(content=trace, headers={"Content-Disposition": disposition})
+
+
+@app.get("/api/journal")
+async def get_journal_sessions():
+    return JSONResponse(content=await asyncio.to_thread(list_sessions))
+
+
+@app.get("/api/journal/{session_id}")
+async def export_journal(
+    session_id: str,
+    format: str = Query("jsonl", pattern="^(jsonl|srt|vtt)$"),
+    lang: str = Query("both", pattern="^(source|target|both)$")
+):
+    """Xuất transcript/translation của một session dưới dạng JSONL, SRT hoặc VTT"""
+    try:
+        records = await asyncio.to_thread(read_session, session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not records:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    if format == "srt":
+        return PlainTextResponse(
+            export_srt(records, lang), media_type="application/x-subrip"
+        )
+    if format == "vtt":
+        return PlainTextResponse(export_vtt(records, lang), media_type="text/vtt")
+    body = "\n".join(json.dumps(r, ensure_ascii=False) for r in records) + "\n"
+    return PlainTextResponse(body, media_type="application/x-ndjson")
+
+
+def _plugin_options(
+    registry, known: List[Dict[str, str]]
+) -> List[Dict[str, str]]:
+    known_ids = {opt["id"] for opt in known}
+    return [
+        {"id": name, "name": f"🔌 {name}"}
+        for name in registry.names()
+        if name not in known_ids
+    ]
+
+
+def build_translator(provider: str) -> Translator:
+    """Tạo Translator từ chuỗi provider, ví dụ "google:gemini-2.0" hoặc "groq" """
     if ":" in provider:
         provider_type, model_id = provider.split(":", 1)
     else:
         provider_type = provider
         model_id = None
 
-    # 1. Chọn Translator
-    selected_translator: Translator
+    kwargs = {"model_name": model_id} if model_id else {}
+    try:
+        translator_cls = translation_registry.load(provider_type)
+        if translator_cls.is_available():
+            return translator_cls(**kwargs)
+        logger.warning(
+            f"{provider_type} translation requested but SDK/API Key missing. "
+            "Fallback to Mock."
+        )
+    except KeyError:
+        logger.warning(
+            f"Unknown translation provider '{provider_type}'. Fallback to Mock."
+        )
+    except Exception as e:
+        logger.error(
+            f"Failed to init {provider_type} translator: {e}. Fallback to Mock."
+        )
+    return translation_registry.load("mock")()
+
+
+_translators: Dict[str, Translator] = {}
+
+
+def get_translator(provider: str) -> Translator:
+    """
+    Translator không giữ state theo session nên mọi session cùng provider
+    dùng chung một instance (và connection pool)
+    """
+    if provider not in _translators:
+        translator = build_translator(provider)
+        use_memory = settings.TRANSLATION_MEMORY_ENABLED
+        if use_memory and isinstance(translator, LLMTranslator):
+            translator = MemoryTranslator(translator)
+        _translators[provider] = translator
+    return _translators[provider]
+
+
+def build_transcriber(stt_choice: str, **t_kwargs) -> Transcriber:
+    """Tạo Transcriber theo tên provider, fallback về Mock nếu thiếu SDK/Key"""
+    mock_cls = stt_registry.load("mock")
+    try:
+        transcriber_cls = stt_registry.load(stt_choice)
+    except KeyError:
+        return mock_cls(**t_kwargs)
+    except ImportError as e:
+        logger.warning(
+            f"{stt_choice} STT request but SDK missing ({e}). Fallback to Mock."
+        )
+        return mock_cls(**t_kwargs)
+
+    if not transcriber_cls.is_available():
+        logger.warning(
+            f"{stt_choice} STT request but SDK/API Key missing. Fallback to Mock."
+        )
+        return mock_cls(**t_kwargs)
+
+    try:
+        return transcriber_cls(**t_kwargs)
+    except Exception as e:
+        logger.error(f"Failed to init {stt_choice} STT: {e}")
+        return mock_cls(**t_kwargs)
+
+
+# --- 3. WebSocket with Dynamic Provider & Pause Logic ---
+@app.websocket("/ws/cabin")
+async def websocket_endpoint(
+    websocket: WebSocket, 
+    device_id: Optional[int] = Query(None),
+    # Audio source spec, e.g. "file:talk.wav;pace=fast" (thay cho device_id)
+    source: Optional[str] = Query(None),
+    provider: str = Query("mock"),  # Can be "google:gemini-2.0" or just "groq"
+    stt_provider: str = Query("groq"),  # STT Model
+    buffer: float = Query(settings.BUFFER_DEFAULT),  # Buffer Duration (seconds)
+    vad_threshold: int = Query(settings.VAD_THRESHOLD),
+    vad_silence: float = Query(settings.VAD_SILENCE_DURATION),
+    overload_policy: str = Query(settings.OVERLOAD_POLICY),
+    batch: bool = Query(settings.TRANSLATION_BATCH_ENABLED),  # Micro-batch translation
+    # Interim transcripts (re-transcription)
+    partial: bool = Query(settings.PARTIAL_TRANSCRIPTS_ENABLED),
+    # Freshness deadline (seconds, 0 = tắt;
+    # mặc định SEGMENT_DEADLINE_SECONDS cho source live)
+    deadline: Optional[float] = Query(None, ge=0),
+    # Tự chỉnh buffer / vad_silence theo độ trễ quan sát được
+    autotune: bool = Query(settings.AUTOTUNE_ENABLED),
+    # Source tách kênh: nhãn người nói theo kênh, phân cách bằng dấu phẩy
+    speakers: Optional[str] = Query(None),
+):
+    # Protocol: cabin.v2 (binary, gom message) nếu client đề nghị, không thì JSON
+    protocol = negotiate(websocket.scope.get("subprotocols", []))
+    await websocket.accept(subprotocol=protocol)
     
-    if provider_type == "google":
-        selected_translator = GoogleTranslator(model_name=model_id)
-    elif provider_type == "openai":
-        selected_translator = OpenAITranslator() # Add model support later if needed
-    elif provider_type == "groq":
-        selected_translator = GroqTranslator()
-    else:
-        selected_translator = MockTranslator()
+    # 1. Chọn Translator (dùng chung giữa các session cùng provider)
+    selected_translator = get_translator(provider)
     
-    # 2. Chọn Transcriber (Dynamic instantiation per connection)
-    current_transcriber: Transcriber
+    # 2. Mở audio source trước: source tách kênh cần một Transcriber cho mỗi kênh
+    try:
+        audio_source: AudioSource = await asyncio.to_thread(
+            open_source, source, device_id
+        )
+    except Exception as e:
+        logger.error(f"❌ Audio source error ({source}): {e}")
+        await websocket.send_json({"type": "error", "text": f"Audio source error: {e}"})
+        await websocket.close()
+        return
+    logger.info(f"🎧 Audio source: {audio_source.describe()}")
+
+    # 3. Chọn Transcriber (Dynamic instantiation per connection, mỗi kênh một instance)
     stt_choice = stt_provider.lower()
-    
+
+    # Ngân sách bộ nhớ: có thể giảm buffer / AudioQueue so với yêu cầu của Client
+    # (chia đều cho các kênh)
+    budget = settings.SESSION_MEMORY_BUDGET // audio_source.channels
+    memory = plan_memory(buffer, partial, budget)
+    if memory["buffer"] < buffer:
+        logger.warning(
+            f"⚠️ Buffer {buffer}s exceeds session memory budget. "
+            f"Clamped to {memory['buffer']:.2f}s"
+        )
+
     # VAD Params for Transcriber
-    t_kwargs = {
-        "buffer_duration": buffer,
-        "vad_threshold": vad_threshold,
-        "vad_silence": vad_silence
-    }
-
-    if stt_choice == "deepgram":
-        if HAS_DEEPGRAM and settings.DEEPGRAM_API_KEY:
-            try:
-                current_transcriber = DeepgramTranscriber(**t_kwargs)
-            except Exception as e:
-                logger.error(f"Deepgram Init Error: {e}")
-                current_transcriber = MockTranscriber(**t_kwargs)
-        else:
-            reason = "SDK missing" if not HAS_DEEPGRAM else "API Key missing"
-            logger.warning(f"Deepgram request failed: {reason}. Fallback to Mock.")
-            current_transcriber = MockTranscriber(**t_kwargs)
-            
-    elif stt_choice == "google":
-        if HAS_GOOGLE_SPEECH: # Google Client tự tìm Credential
-            try:
-                current_transcriber = GoogleTranscriber(**t_kwargs)
-            except Exception as e:
-                logger.error(f"Failed to init Google STT: {e}")
-                current_transcriber = MockTranscriber(**t_kwargs)
-        else:
-            logger.warning("Google STT request but google-cloud-speech missing. Fallback to Mock.")
-            current_transcriber = MockTranscriber(**t_kwargs)
-
-    elif stt_choice == "groq":
-        if settings.GROQ_API_KEY:
-            current_transcriber = GroqTranscriber(**t_kwargs)
-        else:
-            logger.warning("Groq STT request but Key missing. Fallback to Mock.")
-            current_transcriber = MockTranscriber(**t_kwargs)
-            
-    else:
-        current_transcriber = MockTranscriber(**t_kwargs)
-    
-    logger.info(f"🔗 Connected | Mic: {device_id} | STT: {stt_choice} (Buf: {buffer}s VAD: {vad_threshold}) | AI: {provider}")
-    
-    audio_streamer = AudioStreamer()
-    
-    # Pause Control Logic
-    pause_event = asyncio.Event()
-    # Default to PAUSED state (event not set)
+    transcribers = [
+        build_transcriber(
+            stt_choice,
+            buffer_duration=memory["buffer"],
+            vad_threshold=vad_threshold,
+            vad_silence=vad_silence,
+            partial=partial
+        )
+        for _ in range(audio_source.channels)
+    ]
 
-    async def listen_for_commands():
-        """Task chạy nền để nhận lệnh từ Client (Pause/Resume)"""
-        try:
-            async for raw_msg in websocket.iter_json():
-                command = raw_msg.get("command")
-                if command == "pause":
-                    pause_event.clear()
-                    logger.info("⏸️ Paused")
-                    await websocket.send_json({"type": "status", "paused": True})
-                elif command == "resume":
-                    pause_event.set()
-                    logger.info("▶️ Resumed")
-                    await websocket.send_json({"type": "status", "paused": False})
-        except Exception:
-            pass 
+    logger.info(
+        f"🔗 Connected | Source: {source or device_id} "
+        f"| STT: {stt_choice} x{len(transcribers)} "
+        f"(Buf: {memory['buffer']:g}s VAD: {vad_threshold}) | AI: {provider}"
+    )
 
-    command_task = asyncio.create_task(listen_for_commands())
-    
-    try:
-        audio_generator = audio_streamer.start_stream(device_index=device_id)
-        
-        for chunk in audio_generator:
-            if websocket.client_state.name == "DISCONNECTED":
-                break
-
-            # Kiểm tra trạng thái Pause
-            if not pause_event.is_set():
-                await asyncio.sleep(0.1) 
-                continue
-
-            # STT Processing
-            english_text = await current_transcriber.process_audio(chunk)
-
-            if english_text:
-                await websocket.send_json({"type": "transcript", "text": english_text})
-                
-                # Translation
-                vietnamese_text = await selected_translator.translate(english_text, global_glossary)
-                
-                await websocket.send_json({"type": "translation", "text": vietnamese_text})
-            
-            await asyncio.sleep(0)
-
-    except WebSocketDisconnect:
-        logger.info("Disconnected")
-    except Exception as e:
-        logger.error(f"WS Error: {e}")
-    finally:
-        command_task.cancel()
-        audio_streamer.stop_stream()
+    session = CabinSession(
+        websocket,
+        audio_source,
+        transcribers,
+        selected_translator,
+        fallback_factory=get_translator,
+        glossary=global_glossary,
+        overload_policy=overload_policy,
+        batch=batch,
+        queue_seconds=memory["audio_queue"],
+        protocol=protocol,
+        deadline=deadline,
+        autotune=autotune,
+        speakers=[name.strip() for name in speakers.split(",")] if speakers else None,
+    )
+    await session.run()
 
 def start():
     src_dir = BASE_DIR.parent 
@@ -289,7 +469,8 @@ def start():
         host=settings.HOST, 
         port=settings.PORT, 
         reload=True,
-        reload_dirs=[str(src_dir)]
+        reload_dirs=[str(src_dir)],
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE
     )
 
 if __name__ == "__main__":
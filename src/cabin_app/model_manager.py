@@ -3,13 +3,6 @@ import logging
 import os
 from typing import List, Dict
 
-# Import Clients
-try:
-    from google import genai
-    HAS_GOOGLE = True
-except ImportError:
-    HAS_GOOGLE = False
-
 from cabin_app.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -18,7 +11,13 @@ settings = get_settings()
 class ModelManager:
     @staticmethod
     def get_google_models() -> List[Dict[str, str]]:
-        if not HAS_GOOGLE or not settings.GOOGLE_API_KEY:
+        if not settings.GOOGLE_API_KEY:
+            return []
+
+        try:
+            # Import khi cần để không làm chậm startup
+            from google import genai
+        except ImportError:
             return []
         
         try:
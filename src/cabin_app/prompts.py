@@ -15,3 +15,25 @@ STRICT RULES:
 4. If the input is incomplete, noise, or just silence, output nothing (empty string).
 5. Do not output conversational fillers like "Okay", "So", "Well" unless they are part of the core meaning.
 """
+
+
+# Batch Mode: nối thêm vào System Prompt khi nhiều segment được gom vào một request
+BATCH_PROMPT_SUFFIX = """
+BATCH MODE (overrides the output format of rule 1):
+The input is a JSON array of consecutive caption segments:
+[{"id": 0, "text": "..."}, ...].
+Translate every segment separately, using the neighbouring segments only as context.
+Return ONLY a JSON object: {"translations": [{"id": 0, "text": "..."}, ...]}
+with exactly one entry per input id, in the same order. Use "" for noise segments.
+"""
+
+
+# Translation Memory: nối thêm vào System Prompt
+# khi có một segment cũ gần giống (khớp một phần)
+MEMORY_HINT_PROMPT_SUFFIX = """
+TRANSLATION MEMORY:
+A similar segment was translated earlier in this talk. Keep its wording and terminology
+where the meaning is the same, but translate every difference faithfully:
+EN: {source}
+VI: {target}
+"""
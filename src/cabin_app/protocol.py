@@ -0,0 +1,258 @@
+# Path: src/cabin_app/protocol.py
+"""
+Giao thức WebSocket của /ws/cabin, chọn qua subprotocol
+(header Sec-WebSocket-Protocol):
+
+- cabin.v1 (mặc định, client cũ): mỗi message là một JSON text frame.
+- cabin.v2: binary frame, mỗi frame chứa nhiều record (gom trong một send tick).
+  Record = [type: u8][fields]. Số nguyên là varint (LEB128 không dấu),
+  chuỗi là varint độ dài + UTF-8.
+    0 JSON         : str(json)
+                     -> message ít gặp (session, status, overload, error...)
+    1 transcript   : seq, latency_ms, str(text)
+    2 translation  : seq, latency_ms, str(text)
+    3 partial      : seq, str(text), str(stable)
+    4 channel      : channel
+                     -> prefix: record compact ngay sau thuộc kênh này
+                        (session tách kênh)
+  static/js/main.js có bộ decode tương ứng (decodeBatch).
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+from cabin_app.config import get_settings
+from cabin_app.tracing import SegmentTrace
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PROTOCOL_JSON = "cabin.v1"
+PROTOCOL_BINARY = "cabin.v2"
+
+RECORD_JSON = 0
+RECORD_TRANSCRIPT = 1
+RECORD_TRANSLATION = 2
+RECORD_PARTIAL = 3
+RECORD_CHANNEL = 4
+
+# Message có đúng các field này được mã hóa compact, còn lại đi qua record JSON
+_COMPACT = {
+    "transcript": (RECORD_TRANSCRIPT, frozenset({"type", "text", "seq", "latency"})),
+    "translation": (RECORD_TRANSLATION, frozenset({"type", "text", "seq", "latency"})),
+    "partial": (RECORD_PARTIAL, frozenset({"type", "text", "stable", "seq"})),
+}
+_TYPES = {RECORD_TRANSCRIPT: "transcript", RECORD_TRANSLATION: "translation"}
+
+# (payload, trace của segment, lúc vào hàng chờ, có phải message cuối của segment)
+Pending = Tuple[Dict[str, Any], Optional[SegmentTrace], float, bool]
+
+
+def negotiate(offered: Iterable[str]) -> Optional[str]:
+    """
+    Subprotocol trả lời client: cabin.v2 nếu client đề nghị (và server bật),
+    không thì cabin.v1 / None
+    """
+    offered = list(offered)
+    if settings.WS_BINARY_PROTOCOL and PROTOCOL_BINARY in offered:
+        return PROTOCOL_BINARY
+    if PROTOCOL_JSON in offered:
+        return PROTOCOL_JSON
+    return None  # Client không gửi subprotocol: JSON như trước
+
+
+# --- Encoding ---
+def _varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _string(out: bytearray, text: str) -> None:
+    data = text.encode("utf-8")
+    _varint(out, len(data))
+    out += data
+
+
+def encode_record(out: bytearray, payload: Dict[str, Any]) -> None:
+    kind = payload.get("type")
+    compact = _COMPACT.get(kind) if isinstance(kind, str) else None
+    channel = payload.get("channel")
+    keys = payload.keys() if channel is None else payload.keys() - {"channel"}
+    if compact is not None and keys == compact[1]:
+        if channel is not None:
+            out.append(RECORD_CHANNEL)
+            _varint(out, int(channel))
+        record = compact[0]
+        out.append(record)
+        _varint(out, max(0, int(payload["seq"])))
+        if record == RECORD_PARTIAL:
+            _string(out, payload["text"])
+            _string(out, payload["stable"])
+        else:
+            _varint(out, max(0, int(round(payload["latency"] * 1000))))
+            _string(out, payload["text"])
+        return
+    out.append(RECORD_JSON)
+    _string(out, json.dumps(payload, separators=(",", ":"), ensure_ascii=False))
+
+
+def encode_batch(payloads: List[Dict[str, Any]]) -> bytes:
+    out = bytearray()
+    for payload in payloads:
+        encode_record(out, payload)
+    return bytes(out)
+
+
+# --- Decoding (client Python: load test, benchmark) ---
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _read_string(data: bytes, pos: int) -> Tuple[str, int]:
+    size, pos = _read_varint(data, pos)
+    return data[pos:pos + size].decode("utf-8"), pos + size
+
+
+def decode_batch(data: bytes) -> List[Dict[str, Any]]:
+    messages: List[Dict[str, Any]] = []
+    pos = 0
+    channel: Optional[int] = None
+    while pos < len(data):
+        kind = data[pos]
+        pos += 1
+        if kind == RECORD_CHANNEL:
+            channel, pos = _read_varint(data, pos)
+            continue
+        if kind == RECORD_JSON:
+            raw, pos = _read_string(data, pos)
+            messages.append(json.loads(raw))
+            continue
+        seq, pos = _read_varint(data, pos)
+        if kind == RECORD_PARTIAL:
+            text, pos = _read_string(data, pos)
+            stable, pos = _read_string(data, pos)
+            messages.append(
+                {"type": "partial", "text": text, "stable": stable, "seq": seq}
+            )
+        elif kind in _TYPES:
+            latency, pos = _read_varint(data, pos)
+            text, pos = _read_string(data, pos)
+            messages.append({
+                "type": _TYPES[kind],
+                "text": text,
+                "seq": seq,
+                "latency": latency / 1000,
+            })
+        else:
+            raise ValueError(f"Unknown record type {kind} at byte {pos - 1}")
+        if channel is not None:
+            messages[-1]["channel"] = channel
+            channel = None
+    return messages
+
+
+class MessageChannel:
+    """
+    Gửi message tới một client theo protocol đã negotiate.
+    cabin.v2: message được gom lại và gửi thành MỘT binary frame mỗi send tick
+    (WS_COALESCE_WINDOW giây, 0 = cuối vòng event loop hiện tại), nên transcript
+    + translation + partial phát ra cùng lúc chỉ tốn một frame
+    (và một lần nén permessage-deflate).
+    """
+    __slots__ = (
+        "websocket", "protocol", "window", "_lock", "_pending", "_flush_task",
+        "_error",
+    )
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        protocol: Optional[str],
+        window: Optional[float] = None,
+    ) -> None:
+        self.websocket = websocket
+        self.protocol = protocol or PROTOCOL_JSON
+        self.window = settings.WS_COALESCE_WINDOW if window is None else window
+        # STT và Translation chạy song song nên cần serialize việc gửi
+        self._lock = asyncio.Lock()
+        self._pending: List[Pending] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+
+    @property
+    def binary(self) -> bool:
+        return self.protocol == PROTOCOL_BINARY
+
+    async def send(
+        self,
+        payload: Dict[str, Any],
+        trace: Optional[SegmentTrace] = None,
+        final: bool = False,
+    ) -> None:
+        """
+        `trace`: ghi span send_<type> (chờ lock + coalesce + ghi socket);
+        `final` đóng trace sau khi gửi
+        """
+        if self._error is not None:
+            raise self._error  # Lần gửi trước đã lỗi (client ngắt kết nối)
+        if not self.binary:
+            start = time.monotonic()
+            async with self._lock:
+                await self.websocket.send_json(payload)
+            if trace is not None:
+                trace.add(f"send_{payload.get('type')}", start)
+                if final:
+                    trace.close()
+            return
+        self._pending.append((payload, trace, time.monotonic(), final))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        await self._flush()
+
+    async def _flush(self) -> None:
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        frame = encode_batch([payload for payload, _, _, _ in batch])
+        try:
+            async with self._lock:
+                await self.websocket.send_bytes(frame)
+        except Exception as e:
+            self._error = e
+            return
+        sent = time.monotonic()
+        for payload, trace, enqueued, final in batch:
+            if trace is not None:
+                trace.add(
+                    f"send_{payload.get('type')}",
+                    enqueued,
+                    sent,
+                    frame_messages=len(batch),
+                )
+                if final:
+                    trace.close()
+
+    async def drain(self) -> None:
+        """Gửi nốt các message đang chờ (trước khi đóng kết nối)"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._error is None:
+            await self._flush()
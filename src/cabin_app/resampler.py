@@ -0,0 +1,130 @@
+# Path: src/cabin_app/resampler.py
+import logging
+from functools import lru_cache
+from math import gcd
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from cabin_app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=16)
+def design_filter_bank(up: int, down: int, taps_per_phase: int) -> np.ndarray:
+    """
+    Low-pass windowed-sinc (Kaiser) cho tỉ lệ up/down, tách thành `up` pha.
+    Trả về mảng (up, taps_per_phase), mỗi hàng đã đảo chiều để nhân trực tiếp
+    với cửa sổ input.
+    """
+    length = up * taps_per_phase
+    # Cutoff theo sample rate sau khi upsample;
+    # rolloff < 1 để chừa transition band trước Nyquist
+    cutoff = settings.RESAMPLER_ROLLOFF * 0.5 / max(up, down)
+    m = np.arange(length) - (length - 1) / 2
+    window = np.kaiser(length, settings.RESAMPLER_KAISER_BETA)
+    h = 2 * cutoff * np.sinc(2 * cutoff * m) * window
+    h *= up / h.sum()  # Bù gain của việc chèn (up - 1) số 0
+    bank = h.reshape(taps_per_phase, up).T  # bank[p, k] = h[p + k * up]
+    return np.ascontiguousarray(bank[:, ::-1], dtype=np.float32)
+
+
+class StreamResampler:
+    """
+    Polyphase resampler cho luồng mono float32, giữ state giữa các chunk
+    (history của input và vị trí output) nên ranh giới chunk không gây
+    click/lệch pha. Output n lấy input tại vị trí n * down / up; mọi output của
+    một chunk được tính một lần bằng sliding window + phép nhân ma trận theo hàng
+    (không loop Python theo sample).
+    """
+    def __init__(
+        self, in_rate: int, out_rate: int, taps_per_phase: Optional[int] = None
+    ) -> None:
+        divisor = gcd(in_rate, out_rate)
+        self.up = out_rate // divisor
+        self.down = in_rate // divisor
+        taps_per_phase = taps_per_phase or settings.RESAMPLER_TAPS_PER_PHASE
+        self.taps = taps_per_phase
+        self.bank = design_filter_bank(self.up, self.down, taps_per_phase)
+        self._history = np.zeros(taps_per_phase - 1, dtype=np.float32)
+        self._consumed = 0  # Tổng số sample input đã nhận
+        self._produced = 0  # Tổng số sample output đã trả về
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if samples.size == 0:
+            return samples
+        extended = np.concatenate((self._history, samples))
+        base = self._consumed - (self.taps - 1)  # Vị trí tuyệt đối của extended[0]
+        self._consumed += samples.size
+
+        # Mọi output có input index floor(n * down / up) đã nằm trong dữ liệu hiện có
+        end = (self._consumed * self.up - 1) // self.down + 1
+        positions = np.arange(self._produced, end, dtype=np.int64) * self.down
+        self._produced = end
+        self._history = extended[-(self.taps - 1):] if self.taps > 1 else extended[:0]
+        if positions.size == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        # Index (trong extended) của sample mới nhất mỗi cửa sổ
+        newest = positions // self.up - base
+        windows = sliding_window_view(extended, self.taps)[newest - (self.taps - 1)]
+        return np.einsum("ij,ij->i", windows, self.bank[positions % self.up])
+
+
+class AudioConverter:
+    """
+    Chuyển PCM16 interleaved ở format gốc của thiết bị/file về
+    settings.RATE / settings.CHANNELS: downmix (trung bình các kênh) rồi resample.
+    Trùng format thì trả nguyên bytes.
+    """
+    def __init__(
+        self,
+        in_rate: int,
+        in_channels: int,
+        out_rate: int = settings.RATE,
+        out_channels: int = settings.CHANNELS,
+    ) -> None:
+        if out_channels not in (1, in_channels):
+            raise ValueError(f"Cannot convert {in_channels} ch to {out_channels} ch")
+        self.in_rate = in_rate
+        self.in_channels = in_channels
+        self.out_rate = out_rate
+        self.out_channels = out_channels
+        self.passthrough = in_rate == out_rate and in_channels == out_channels
+        self._resamplers = [] if in_rate == out_rate else [
+            StreamResampler(in_rate, out_rate) for _ in range(out_channels)
+        ]
+        if not self.passthrough:
+            logger.info(
+                f"🔁 Audio conversion: {in_rate} Hz / {in_channels} ch "
+                f"-> {out_rate} Hz / {out_channels} ch"
+            )
+
+    def frames_for(self, out_frames: int) -> int:
+        """
+        Số frame input tương ứng với `out_frames` frame output
+        (để chọn kích thước đọc)
+        """
+        return max(1, round(out_frames * self.in_rate / self.out_rate))
+
+    def convert(self, data: bytes) -> bytes:
+        if self.passthrough or not data:
+            return data
+        frames = np.frombuffer(data, dtype="<i2")
+        whole = frames.size - frames.size % self.in_channels
+        frames = frames[:whole].reshape(-1, self.in_channels)
+        if self.out_channels == 1 and self.in_channels > 1:
+            channels = [frames.mean(axis=1, dtype=np.float32)]
+        else:
+            channels = [
+                frames[:, c].astype(np.float32) for c in range(self.in_channels)
+            ]
+
+        if self._resamplers:
+            channels = [r.process(ch) for r, ch in zip(self._resamplers, channels)]
+
+        out = channels[0] if len(channels) == 1 else np.stack(channels, axis=1).ravel()
+        return np.clip(np.rint(out), -32768, 32767).astype("<i2").tobytes()
@@ -1,23 +1,30 @@
+import importlib
+from typing import Any
+
 from .base import Transcriber, Translator
-from .stt import (
-    GroqTranscriber, 
-    DeepgramTranscriber, 
-    GoogleTranscriber,
-    MockTranscriber, 
-    HAS_DEEPGRAM,
-    HAS_GOOGLE_SPEECH
-)
-from .translation import (
-    GroqTranslator, 
-    OpenAITranslator, 
-    GoogleTranslator,
-    MockTranslator,
-    HAS_GOOGLE_GENAI
-)
+from .registry import stt_registry, translation_registry, ProviderRegistry
+
+# Provider được import động (PEP 562) để tránh kéo theo toàn bộ SDK
+# (groq, openai, deepgram, google-*) khi chỉ cần một provider.
+_LAZY_EXPORTS = {
+    "GroqTranscriber": ".stt", "DeepgramTranscriber": ".stt",
+    "GoogleTranscriber": ".stt", "MockTranscriber": ".stt",
+    "HAS_DEEPGRAM": ".stt", "HAS_GOOGLE_SPEECH": ".stt",
+    "GroqTranslator": ".translation", "OpenAITranslator": ".translation",
+    "GoogleTranslator": ".translation", "MockTranslator": ".translation",
+    "HAS_GOOGLE_GENAI": ".translation",
+}
 
 __all__ = [
     "Transcriber", "Translator",
+    "ProviderRegistry", "stt_registry", "translation_registry",
     "GroqTranscriber", "DeepgramTranscriber", "GoogleTranscriber", "MockTranscriber",
     "GroqTranslator", "OpenAITranslator", "GoogleTranslator", "MockTranslator",
     "HAS_DEEPGRAM", "HAS_GOOGLE_SPEECH", "HAS_GOOGLE_GENAI"
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
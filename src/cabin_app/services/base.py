@@ -1,56 +1,183 @@
 # Path: src/cabin_app/services/base.py
 import abc
+import asyncio
+import io
 import logging
-import struct
 import math
-from typing import Dict
+import random
+import time
+import wave
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
 from cabin_app.config import get_settings
-from cabin_app.hallucinations import HALLUCINATION_PHRASES, HALLUCINATION_PREFIXES
+from cabin_app.hallucination_filter import get_hallucination_filter
+from .partial import agreed_prefix, get_request_budget, strip_overlap
+from .segmentation import find_flush_cut, find_word_boundary
+from cabin_app.tracing import SegmentTrace, activate, new_trace, span
+from cabin_app.backpressure import within_deadline
+from cabin_app.executor import offload
+from cabin_app.stt_cache import audio_key, get_stt_cache
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
 # Thay thế audioop.rms (đã bị xóa trong Python 3.13+)
-def calculate_rms(audio_chunk: bytes) -> int:
+def calculate_rms(audio_chunk: "AudioChunk") -> int:
     """Tính Root Mean Square (RMS) amplitude cho 16-bit PCM data"""
-    if not audio_chunk:
-        return 0
-        
-    count = len(audio_chunk) // 2
-    if count == 0:
-        return 0
-    
-    try:
-        # Unpack bytes thành list các số integer 16-bit (signed short: 'h')
-        # '<' = little-endian (chuẩn của wav/pcm thông thường)
-        shorts = struct.unpack(f"<{count}h", audio_chunk)
-        
-        sum_squares = sum(s**2 for s in shorts)
-        rms = math.sqrt(sum_squares / count)
-        return int(rms)
-    except Exception:
+    # Gọi cho mỗi chunk trên event loop:
+    # NumPy thay vì unpack + sum trong Python (~10x nhanh hơn)
+    if isinstance(audio_chunk, np.ndarray):
+        samples = audio_chunk
+    else:
+        samples = np.frombuffer(audio_chunk, dtype="<i2", count=len(audio_chunk) // 2)
+    if samples.size == 0:
         return 0
+    values = samples.astype(np.float32)
+    return int(math.sqrt(float(np.dot(values, values)) / samples.size))
+
+
+def encode_wav(audio_data: bytes) -> bytes:
+    """
+    PCM16 (RATE / CHANNELS) -> file WAV; chạy trên AudioExecutor
+    (nhận cả memoryview từ shared memory)
+    """
+    wav_buffer = io.BytesIO()
+    with wave.open(wav_buffer, 'wb') as wf:
+        wf.setnchannels(settings.CHANNELS)
+        wf.setsampwidth(2)
+        wf.setframerate(settings.RATE)
+        wf.writeframes(audio_data)
+    return wav_buffer.getvalue()
+
+
+def mock_latency(median: float) -> float:
+    """Độ trễ giả lập cho Mock provider: log-normal quanh median (MOCK_LATENCY_SIGMA)"""
+    if median <= 0:
+        return 0.0
+    if settings.MOCK_LATENCY_SIGMA <= 0:
+        return median
+    return random.lognormvariate(math.log(median), settings.MOCK_LATENCY_SIGMA)
+
+
+BYTES_PER_SECOND = settings.RATE * settings.CHANNELS * 2
+
+# PCM16 bytes, hoặc một kênh của chunk nhiều kênh:
+# view int16 (strided) trên chunk interleaved
+AudioChunk = Union[bytes, np.ndarray]
+
+# Callback nhận (text đầy đủ của segment đang nói, phần text đã ổn định/commit)
+PartialCallback = Callable[[str, str], Awaitable[None]]
+# Callback nhận (stage, reason) khi một segment bị bỏ (ví dụ STT quá deadline)
+SkipCallback = Callable[[str, str], Awaitable[None]]
+# Callback sau mỗi segment đã cắt: (audio seconds, lý do cắt,
+# STT seconds hoặc None nếu không gửi request, bị lọc)
+SegmentCallback = Callable[[float, str, Optional[float], bool], Awaitable[None]]
 
 class Transcriber(abc.ABC):
-    def __init__(self, buffer_duration: float = 5.0, vad_threshold: int = None, vad_silence: float = None):
+    # Mỗi viewer giữ một Transcriber: __slots__ để state của session idle nhỏ nhất
+    __slots__ = (
+        "vad_threshold", "vad_silence", "buffer_threshold", "buffer",
+        "last_segment_duration", "silence_chunks_count", "required_silence_chunks",
+        "partial_enabled", "on_partial", "budget",
+        "_partial_task", "_partial_mark", "_segment_id", "_hypothesis",
+        "_committed", "_committed_bytes", "_partial_shown",
+        "trace_session", "last_trace", "_segment_started",
+        "deadline_seconds", "on_skipped", "_captured_at", "on_segment",
+    )
+
+    def __init__(
+        self,
+        buffer_duration: float = 5.0,
+        vad_threshold: Optional[int] = None,
+        vad_silence: Optional[float] = None,
+        partial: Optional[bool] = None,
+    ):
         # Default fallback to settings if None
         self.vad_threshold = vad_threshold if vad_threshold is not None else settings.VAD_THRESHOLD
         self.vad_silence = vad_silence if vad_silence is not None else settings.VAD_SILENCE_DURATION
         
         # Buffer Duration đóng vai trò là Max Duration (Fallback)
-        self.buffer_threshold = int(settings.RATE * settings.CHANNELS * 2 * buffer_duration)
+        self.buffer_threshold = int(BYTES_PER_SECOND * buffer_duration)
         self.buffer = bytearray()
+        self.last_segment_duration = 0.0  # Độ dài (giây) của segment vừa gửi STT
         
         # VAD State
         self.silence_chunks_count = 0
         chunk_duration = settings.CHUNK_SIZE / settings.RATE
         self.required_silence_chunks = int(self.vad_silence / chunk_duration)
-        
+
+        # Partial Mode: re-transcribe phần audio đang lớn dần, commit các từ ổn định
+        self.partial_enabled = (
+            settings.PARTIAL_TRANSCRIPTS_ENABLED if partial is None else partial
+        )
+        self.on_partial: Optional[PartialCallback] = None
+        self.budget = get_request_budget(self.__class__.__name__)
+        self._partial_task: Optional[asyncio.Task] = None
+        self._partial_mark = 0  # len(buffer) lúc gửi partial gần nhất
+        # Tăng mỗi lần flush: kết quả partial của segment cũ bị bỏ
+        self._segment_id = 0
+        self._hypothesis: List[str] = []  # Các từ chưa commit của partial gần nhất
+        self._committed: List[str] = []
+        self._committed_bytes = 0  # Audio đã commit (đã cắt khỏi buffer)
+        self._partial_shown = False
+
+        # Tracing: session gán trace_session;
+        # mỗi segment cắt ra có một SegmentTrace (last_trace)
+        self.trace_session: Optional[str] = None
+        self.last_trace: Optional[SegmentTrace] = None
+        # time.monotonic() lúc audio đầu tiên của segment vào buffer
+        self._segment_started = 0.0
+
+        # Deadline: STT phải xong trong deadline_seconds kể từ lúc chunk cuối
+        # của segment được capture (0 = không hạn)
+        self.deadline_seconds = settings.SEGMENT_DEADLINE_SECONDS
+        self.on_skipped: Optional[SkipCallback] = None
+        self._captured_at = 0.0
+        # Auto-tuning quan sát độ dài segment / STT RTT
+        self.on_segment: Optional[SegmentCallback] = None
+
         # Log init info
-        logger.info(f"Initialized {self.__class__.__name__} | VAD: {settings.VAD_ENABLED} | Thr: {self.vad_threshold} | Sil: {self.vad_silence}s | MaxBuf: {buffer_duration}s")
+        logger.info(
+            f"Initialized {self.__class__.__name__} | VAD: {settings.VAD_ENABLED} "
+            f"| Thr: {self.vad_threshold} | Sil: {self.vad_silence}s "
+            f"| MaxBuf: {buffer_duration}s | Partial: {self.partial_enabled}"
+        )
+
+    def retune(self, buffer_duration: float, vad_silence: float) -> None:
+        """
+        Đổi Max Buffer / silence khi đang chạy (auto-tuning);
+        segment đang dở áp dụng ngay giá trị mới
+        """
+        self.buffer_threshold = int(BYTES_PER_SECOND * buffer_duration)
+        self.vad_silence = vad_silence
+        chunk_duration = settings.CHUNK_SIZE / settings.RATE
+        self.required_silence_chunks = int(vad_silence / chunk_duration)
+
+    @property
+    def segment_bytes(self) -> int:
+        """Độ dài segment hiện tại, kể cả phần đã commit qua partial"""
+        return self._committed_bytes + len(self.buffer)
 
-    async def process_audio(self, audio_chunk: bytes) -> str:
-        self.buffer.extend(audio_chunk)
+    async def process_audio(
+        self, audio_chunk: AudioChunk, captured_at: Optional[float] = None
+    ) -> str:
+        """
+        `captured_at`: time.monotonic() lúc chunk được capture (mốc tính deadline),
+        mặc định là bây giờ
+        """
+        self._captured_at = captured_at or time.monotonic()
+        if self.segment_bytes == 0:
+            self._segment_started = self._captured_at
+        if isinstance(audio_chunk, np.ndarray):
+            # Một kênh của chunk interleaved: gom thẳng sample vào buffer,
+            # không tạo bytes trung gian
+            start = len(self.buffer)
+            self.buffer.extend(bytes(audio_chunk.nbytes))
+            np.frombuffer(self.buffer, dtype="<i2", offset=start)[:] = audio_chunk
+        else:
+            self.buffer.extend(audio_chunk)
         
         # 1. Tính RMS
         rms = calculate_rms(audio_chunk)
@@ -68,41 +195,273 @@ class Transcriber(abc.ABC):
         # Điều kiện 1: Phát hiện khoảng lặng đủ dài (VAD)
         if settings.VAD_ENABLED and self.silence_chunks_count >= self.required_silence_chunks:
             # Chỉ gửi nếu buffer có dữ liệu "đủ dùng"
-            if len(self.buffer) > (settings.RATE * 2 * 0.5):
+            if self.segment_bytes > (settings.RATE * 2 * 0.5):
                 should_send = True
                 reason = "VAD_Pause"
         
         # Điều kiện 2: Buffer đầy (Fallback)
-        if len(self.buffer) >= self.buffer_threshold:
+        if self.segment_bytes >= self.buffer_threshold:
             should_send = True
             reason = "Max_Buffer"
             
         if should_send:
             # logger.debug(f"Transcribing trigger: {reason} (Buf: {len(self.buffer)} bytes)")
-            data = bytes(self.buffer)
-            self.buffer = bytearray() # Clear ngay lập tức
-            self.silence_chunks_count = 0
-            
-            raw_text = await self._transcribe(data)
-            if not raw_text:
-                return ""
-                
-            clean_text = raw_text.strip()
-            
-            # Filter Hallucinations (Exact Match)
-            if clean_text in HALLUCINATION_PHRASES:
-                return ""
-                
-            # Filter Subtitle Credits (Prefix Match)
-            lower_text = clean_text.lower()
-            for prefix in HALLUCINATION_PREFIXES:
-                if lower_text.startswith(prefix):
-                    return ""
-                
-            return clean_text
+            if reason == "Max_Buffer":
+                # Cắt tại điểm yên lặng nhất trong cửa sổ cuối thay vì cắt ngang một từ
+                # (cửa sổ tối đa nửa buffer để phần mang sang không chiếm gần hết
+                # segment sau)
+                search = min(
+                    settings.MAX_BUFFER_CUT_SEARCH,
+                    self.buffer_threshold / BYTES_PER_SECOND / 2,
+                )
+                committed_bytes = self._committed_bytes
+                cut = await offload(find_flush_cut, bytes(self.buffer), search)
+                # Partial commit trong lúc chờ worker đã cắt bớt đầu buffer:
+                # dời điểm cắt theo
+                cut = max(0, cut - (self._committed_bytes - committed_bytes))
+                return await self._flush_buffer(cut, reason)
+            return await self._flush_buffer(reason=reason)
+
+        if self._partial_due():
+            self._start_partial()
             
         return ""
 
+    async def flush(self) -> str:
+        """
+        Gửi phần audio còn lại trong buffer
+        (khi source kết thúc, ví dụ hết file replay)
+        """
+        if self.segment_bytes > (settings.RATE * 2 * 0.5):
+            return await self._flush_buffer(reason="End_Of_Source")
+        self.buffer = bytearray()
+        self._reset_partial()
+        return ""
+
+    async def suspend(self) -> str:
+        """
+        Pause: gửi nốt segment đang dở (nếu đủ dài) rồi trả bộ nhớ buffer,
+        giữ nguyên cấu hình VAD
+        """
+        text = await self.flush()
+        self.buffer = bytearray()  # bytearray cũ vẫn giữ capacity của cả segment
+        self.silence_chunks_count = 0
+        self._segment_started = 0.0
+        return text
+
+    @property
+    def buffered_seconds(self) -> float:
+        """
+        Audio đã nhận nhưng chưa thuộc segment nào đã gửi
+        (ví dụ phần mang sang sau Max_Buffer)
+        """
+        return self.segment_bytes / BYTES_PER_SECOND
+
+    async def _flush_buffer(self, cut: Optional[int] = None, reason: str = "") -> str:
+        """Gửi buffer[:cut] đi STT; phần sau `cut` giữ lại làm đầu segment kế tiếp"""
+        now = time.monotonic()
+        trace = new_trace(self.trace_session, self._segment_started or now)
+        self.last_trace = trace
+        if trace is not None:
+            trace.add("buffer", trace.started, now, reason=reason)
+        cut = len(self.buffer) if cut is None else cut
+        data = bytes(self.buffer[:cut])
+        # Clear ngay lập tức (chỉ giữ phần mang sang)
+        self.buffer = self.buffer[cut:]
+        committed = self._committed
+        committed_bytes = self._committed_bytes
+        shown = self._partial_shown
+        self._reset_partial()
+        self.last_segment_duration = (committed_bytes + len(data)) / BYTES_PER_SECOND
+        self.silence_chunks_count = 0
+        # Phần mang sang là đầu segment kế tiếp
+        self._segment_started = (
+            now - len(self.buffer) / BYTES_PER_SECOND if self.buffer else 0.0
+        )
+
+        # Phần đầu đã commit qua partial: request final chỉ cần phần tail chưa ổn định
+        raw_text = ""
+        stt_seconds: Optional[float] = None
+        deadline = 0.0
+        if self.deadline_seconds > 0:
+            deadline = (self._captured_at or now) + self.deadline_seconds
+        audio_seconds = round(len(data) / BYTES_PER_SECOND, 2)
+        with activate(trace):
+            min_tail = BYTES_PER_SECOND * settings.PARTIAL_MIN_TAIL
+            if not committed or len(data) >= min_tail:
+                self.budget.record()
+                provider = self.__class__.__name__
+                with span("stt", provider=provider, audio_seconds=audio_seconds):
+                    started = time.monotonic()
+                    try:
+                        raw_text = await within_deadline(
+                            self._transcribe_cached(data), deadline
+                        )
+                    except asyncio.TimeoutError:
+                        # Quá hạn: hủy request; phần đã commit qua partial vẫn dùng được
+                        logger.warning(
+                            f"⏭️ STT missed deadline ({self.deadline_seconds:g}s). "
+                            "Segment skipped."
+                        )
+                        if not committed:
+                            if trace is not None:
+                                trace.close(dropped="deadline")
+                            if self.on_skipped is not None:
+                                await self.on_skipped("stt", "deadline")
+                            if self.on_segment is not None:
+                                await self.on_segment(
+                                    self.last_segment_duration,
+                                    reason,
+                                    time.monotonic() - started,
+                                    False,
+                                )
+                            return ""
+                    stt_seconds = time.monotonic() - started
+            if committed:
+                tail = strip_overlap(committed, raw_text.split())
+                raw_text = " ".join(committed + tail)
+
+            # Filter Hallucinations (Exact / Prefix / Regex / Repetition Loop)
+            # trước khi trả về để rác không bao giờ tốn một lượt gọi LLM
+            with span("filter"):
+                text = get_hallucination_filter().clean(raw_text) if raw_text else ""
+        if trace is not None and not text:
+            trace.close(dropped="empty" if not raw_text else "hallucination")
+        if self.on_segment is not None:
+            filtered = bool(raw_text) and not text
+            await self.on_segment(
+                self.last_segment_duration, reason, stt_seconds, filtered
+            )
+        if not text and shown and self.on_partial is not None:
+            # Segment bị bỏ: xóa dòng tạm đã hiện trên Client
+            await self.on_partial("", "")
+        return text
+
+    # --- Partial Mode ---
+    def _partial_due(self) -> bool:
+        return (
+            self.partial_enabled
+            and self.on_partial is not None
+            and self._partial_task is None
+            # Đang nói; khi im lặng thì final sắp tới
+            and self.silence_chunks_count == 0
+            and len(self.buffer) >= BYTES_PER_SECOND * settings.PARTIAL_MIN_AUDIO
+            and len(self.buffer) - self._partial_mark
+            >= BYTES_PER_SECOND * settings.PARTIAL_INTERVAL
+        )
+
+    def _start_partial(self) -> None:
+        self._partial_mark = len(self.buffer)
+        if not self.budget.try_acquire():
+            return  # Hết quota partial trong phút này, chờ interval tiếp theo
+        self._partial_task = asyncio.create_task(
+            self._run_partial(self._segment_id, bytes(self.buffer))
+        )
+
+    async def _run_partial(self, segment_id: int, data: bytes) -> None:
+        """Chạy nền để không chặn việc nhận audio trong lúc chờ provider"""
+        try:
+            try:
+                text = await self._transcribe_cached(data)
+            except Exception as e:
+                logger.debug(f"Partial transcription failed: {e}")
+                text = ""
+            if segment_id != self._segment_id or not text:
+                return
+            if get_hallucination_filter().match(text):
+                return
+
+            words = strip_overlap(self._committed, text.split())
+            # Local agreement: tiền tố giống nhau giữa hai partial liên tiếp được coi
+            # là ổn định, giữ lại vài từ cuối vì điểm cắt audio chỉ là ước lượng
+            agreed = agreed_prefix(self._hypothesis, words)
+            stable = agreed - settings.PARTIAL_HOLDBACK_WORDS
+            if stable > 0:
+                # _partial_task vẫn được giữ trong lúc chờ worker:
+                # không partial nào khác commit xen vào
+                cut = await offload(
+                    find_word_boundary,
+                    data,
+                    stable / len(words),
+                    self.vad_threshold,
+                    settings.PARTIAL_CUT_SEARCH,
+                )
+                if segment_id != self._segment_id:
+                    return  # Segment đã flush trong lúc chờ worker
+                self._commit(words[:stable], cut)
+                words = words[stable:]
+            self._hypothesis = words
+        finally:
+            if segment_id == self._segment_id:
+                self._partial_task = None
+
+        on_partial = self.on_partial
+        if on_partial is None:
+            return
+        committed_text = " ".join(self._committed)
+        self._partial_shown = True
+        await on_partial(" ".join(self._committed + words), committed_text)
+
+    def _commit(self, words: List[str], cut: int) -> None:
+        """
+        Cắt phần audio của các từ đã ổn định khỏi buffer
+        (buffer chỉ được append từ sau snapshot)
+        """
+        del self.buffer[:cut]
+        self._partial_mark = max(0, self._partial_mark - cut)
+        self._committed.extend(words)
+        self._committed_bytes += cut
+
+    def _reset_partial(self) -> None:
+        self._segment_id += 1
+        if self._partial_task is not None:
+            self._partial_task.cancel()
+            self._partial_task = None
+        self._partial_mark = 0
+        self._hypothesis = []
+        self._committed = []
+        self._committed_bytes = 0
+        self._partial_shown = False
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Provider đã có đủ SDK/Credential để khởi tạo chưa (override ở subclass)"""
+        return True
+
+    # --- STT Cache ---
+    # False: kết quả không phụ thuộc audio (Mock), cache chỉ làm sai load test
+    cacheable = True
+    language = "en"
+
+    def cache_namespace(self) -> str:
+        """Transcript phụ thuộc provider + model + ngôn ngữ, không chỉ audio"""
+        return f"{type(self).__name__}:{getattr(self, 'model', '')}:{self.language}"
+
+    async def _transcribe_cached(self, audio_data: bytes) -> str:
+        """
+        _transcribe qua STT cache: segment PCM đã gửi trước đó
+        (replay, kết nối lại) được trả lời tại chỗ
+        """
+        cache = get_stt_cache() if self.cacheable else None
+        if cache is None:
+            return await self._transcribe(audio_data)
+        namespace = self.cache_namespace()
+        audio_seconds = len(audio_data) / BYTES_PER_SECOND
+        with span("stt_cache", mode=cache.mode):
+            key = audio_key(namespace, audio_data)
+            text = await cache.lookup(key, audio_seconds)
+        if text is not None:
+            return text
+        if cache.mode == "replay":
+            logger.warning(
+                f"📼 STT cache miss in replay mode ({namespace}, "
+                f"{audio_seconds:.2f}s). Provider not called."
+            )
+            return ""
+        text = await self._transcribe(audio_data)
+        await cache.store(key, text, namespace, audio_seconds)
+        return text
+
     @abc.abstractmethod
     async def _transcribe(self, audio_data: bytes) -> str:
         """
@@ -115,3 +474,17 @@ class Translator(abc.ABC):
     @abc.abstractmethod
     async def translate(self, text: str, glossary: Dict[str, str]) -> str:
         pass
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Provider đã có đủ SDK/Credential để khởi tạo chưa (override ở subclass)"""
+        return True
+
+    async def translate_batch(
+        self, texts: List[str], glossary: Dict[str, str]
+    ) -> List[str]:
+        """
+        Dịch nhiều segment liên tiếp. Mặc định dịch lần lượt từng segment;
+        provider hỗ trợ gộp request (LLM) sẽ override.
+        """
+        return [await self.translate(text, glossary) for text in texts]
@@ -0,0 +1,76 @@
+# Path: src/cabin_app/services/partial.py
+import time
+from collections import deque
+from typing import Deque, Dict, List
+
+from cabin_app.config import get_settings
+from cabin_app.hallucination_filter import normalize_text
+
+settings = get_settings()
+
+
+class RequestBudget:
+    """
+    Giới hạn số request STT mỗi phút của một provider, dùng chung cho mọi session
+    (cùng API key). Request final luôn được gửi và luôn được tính;
+    request partial chỉ dùng phần quota còn dư.
+    """
+    def __init__(self, per_minute: int) -> None:
+        self.per_minute = per_minute  # <= 0: không giới hạn
+        self._stamps: Deque[float] = deque()
+
+    def _trim(self, now: float) -> None:
+        while self._stamps and now - self._stamps[0] >= 60.0:
+            self._stamps.popleft()
+
+    def record(self) -> None:
+        now = time.monotonic()
+        self._trim(now)
+        self._stamps.append(now)
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self._trim(now)
+        if 0 < self.per_minute <= len(self._stamps):
+            return False
+        self._stamps.append(now)
+        return True
+
+    @property
+    def used(self) -> int:
+        self._trim(time.monotonic())
+        return len(self._stamps)
+
+
+_budgets: Dict[str, RequestBudget] = {}
+
+
+def get_request_budget(provider: str) -> RequestBudget:
+    if provider not in _budgets:
+        _budgets[provider] = RequestBudget(settings.PARTIAL_MAX_REQUESTS_PER_MINUTE)
+    return _budgets[provider]
+
+
+def agreed_prefix(previous: List[str], current: List[str]) -> int:
+    """Số từ đầu giống nhau giữa hai hypothesis liên tiếp (so sánh sau chuẩn hóa)"""
+    count = 0
+    for a, b in zip(previous, current):
+        if normalize_text(a) != normalize_text(b):
+            break
+        count += 1
+    return count
+
+
+def strip_overlap(
+    committed: List[str], words: List[str], max_overlap: int = 3
+) -> List[str]:
+    """
+    Điểm cắt audio chỉ là ước lượng nên đoạn tail có thể bắt đầu bằng từ đã commit.
+    Bỏ phần đầu của `words` trùng với phần cuối của `committed`.
+    """
+    for size in range(min(max_overlap, len(committed), len(words)), 0, -1):
+        tail = [normalize_text(w) for w in committed[-size:]]
+        head = [normalize_text(w) for w in words[:size]]
+        if tail == head:
+            return words[size:]
+    return words
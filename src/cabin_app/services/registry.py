@@ -0,0 +1,99 @@
+# Path: src/cabin_app/services/registry.py
+import importlib
+import logging
+from importlib.metadata import entry_points
+from typing import Dict, Generic, List, Type, TypeVar, Union
+
+from .base import Transcriber, Translator
+
+logger = logging.getLogger(__name__)
+
+# Entry-point groups cho provider bên thứ ba, ví dụ trong pyproject.toml của plugin:
+#   [project.entry-points."cabin_ai.stt"]
+#   whisper_local = "my_plugin.stt:LocalWhisperTranscriber"
+STT_ENTRY_POINT_GROUP = "cabin_ai.stt"
+TRANSLATION_ENTRY_POINT_GROUP = "cabin_ai.translation"
+
+T = TypeVar("T")
+
+
+class ProviderRegistry(Generic[T]):
+    """
+    Registry ánh xạ tên provider -> class, import module của provider
+    (và SDK đi kèm) chỉ khi provider được dùng lần đầu.
+    """
+    def __init__(self, kind: str, entry_point_group: str) -> None:
+        self.kind = kind
+        self.entry_point_group = entry_point_group
+        self._targets: Dict[str, Union[str, Type[T]]] = {}
+        self._loaded: Dict[str, Type[T]] = {}
+        self._discovered = False
+
+    def register(self, name: str, target: Union[str, Type[T]]) -> None:
+        """target: class hoặc chuỗi "package.module:ClassName" (lazy)"""
+        name = name.lower()
+        self._targets[name] = target
+        self._loaded.pop(name, None)
+
+    def names(self) -> List[str]:
+        self._discover()
+        return list(self._targets)
+
+    def __contains__(self, name: str) -> bool:
+        self._discover()
+        return name.lower() in self._targets
+
+    def load(self, name: str) -> Type[T]:
+        """
+        Import provider theo tên.
+        Raise KeyError nếu chưa đăng ký, ImportError nếu thiếu SDK.
+        """
+        name = name.lower()
+        if name in self._loaded:
+            return self._loaded[name]
+
+        self._discover()
+        target = self._targets[name]
+        if isinstance(target, str):
+            module_path, _, attr = target.partition(":")
+            cls = getattr(importlib.import_module(module_path), attr)
+        else:
+            cls = target
+
+        self._loaded[name] = cls
+        return cls
+
+    def _discover(self) -> None:
+        """Quét entry points một lần duy nhất (chỉ đọc metadata, không import plugin)"""
+        if self._discovered:
+            return
+        self._discovered = True
+        try:
+            for ep in entry_points(group=self.entry_point_group):
+                if ep.name.lower() in self._targets:
+                    logger.info(
+                        f"🔌 Plugin overrides built-in {self.kind} provider '{ep.name}'"
+                    )
+                self._targets[ep.name.lower()] = ep.value
+        except Exception as e:
+            logger.error(f"Error discovering {self.kind} plugins: {e}")
+
+
+_STT = "cabin_app.services.stt"
+_TRANSLATION = "cabin_app.services.translation"
+
+stt_registry: ProviderRegistry[Transcriber] = ProviderRegistry(
+    "stt", STT_ENTRY_POINT_GROUP
+)
+stt_registry.register("groq", f"{_STT}.groq:GroqTranscriber")
+stt_registry.register("deepgram", f"{_STT}.deepgram:DeepgramTranscriber")
+stt_registry.register("google", f"{_STT}.google:GoogleTranscriber")
+stt_registry.register("mock", f"{_STT}.mock:MockTranscriber")
+
+translation_registry: ProviderRegistry[Translator] = ProviderRegistry(
+    "translation", TRANSLATION_ENTRY_POINT_GROUP
+)
+translation_registry.register("groq", f"{_TRANSLATION}.groq:GroqTranslator")
+translation_registry.register("openai", f"{_TRANSLATION}.openai:OpenAITranslator")
+translation_registry.register("google", f"{_TRANSLATION}.google:GoogleTranslator")
+translation_registry.register("mock", f"{_TRANSLATION}.mock:MockTranslator")
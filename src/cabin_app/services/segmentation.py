@@ -0,0 +1,78 @@
+# Path: src/cabin_app/services/segmentation.py
+import numpy as np
+
+from cabin_app.config import get_settings
+
+settings = get_settings()
+
+FRAME_SECONDS = 0.02  # Độ phân giải khi tìm điểm cắt (20ms)
+FRAME_BYTES = int(settings.RATE * FRAME_SECONDS) * settings.CHANNELS * 2
+
+
+def frame_energy(audio: bytes, smooth: int = 1) -> np.ndarray:
+    """
+    RMS của từng frame 20ms; smooth > 1 lấy trung bình trượt để bỏ qua
+    các chỗ lõm rất ngắn trong một từ
+    """
+    samples = np.frombuffer(audio, dtype="<i2")
+    frame = FRAME_BYTES // 2
+    count = samples.size // frame
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:count * frame].reshape(count, frame).astype(np.float32)
+    energy = np.sqrt(np.mean(frames ** 2, axis=1))
+    if smooth > 1:
+        # Pad bằng giá trị biên: pad 0 sẽ làm hai đầu trông "yên lặng" giả
+        pad = smooth // 2
+        padded = np.pad(energy, (pad, smooth - 1 - pad), mode="edge")
+        kernel = np.ones(smooth, dtype=np.float32) / smooth
+        energy = np.convolve(padded, kernel, mode="valid")
+    return energy
+
+
+def quietest_frame(energy: np.ndarray, lo: int, hi: int) -> int:
+    """
+    Frame có năng lượng thấp nhất trong [lo, hi);
+    hòa nhau thì lấy frame muộn nhất (segment dài hơn)
+    """
+    window = energy[lo:hi]
+    return hi - 1 - int(np.argmin(window[::-1]))
+
+
+def find_flush_cut(audio: bytes, search: float) -> int:
+    """
+    Điểm cắt (byte offset) cho lần flush cưỡng bức khi buffer đầy: frame yên lặng
+    nhất trong `search` giây cuối, để không cắt đôi một từ.
+    Trả về len(audio) nếu không tìm được.
+    """
+    span = int(search / FRAME_SECONDS)
+    frames = len(audio) // FRAME_BYTES
+    if span <= 0 or frames <= span:
+        return len(audio)
+    start = (frames - span) * FRAME_BYTES  # Chỉ tính năng lượng cho cửa sổ cuối
+    energy = frame_energy(audio[start:frames * FRAME_BYTES], smooth=3)
+    best = quietest_frame(energy, 0, energy.size)
+    # Cắt ở giữa frame yên lặng nhất: phần trước gửi đi, phần sau mang sang
+    # segment kế tiếp (320 sample/frame nên nửa frame vẫn thẳng hàng sample)
+    return start + best * FRAME_BYTES + FRAME_BYTES // 2
+
+
+def find_word_boundary(
+    audio: bytes, fraction: float, threshold: int, radius: float
+) -> int:
+    """
+    Byte offset (chia hết cho 2) của điểm cắt sau `fraction` phần lời nói trong `audio`.
+    Ước lượng theo tỉ lệ trên đoạn có tiếng (bỏ im lặng đầu/cuối), rồi dịch tới frame
+    năng lượng thấp nhất trong ±radius giây để không cắt giữa một từ.
+    """
+    energy = frame_energy(audio)
+    voiced = np.flatnonzero(energy >= threshold)
+    if voiced.size == 0:
+        return 0
+
+    first, last = int(voiced[0]), int(voiced[-1]) + 1
+    target = first + int(round(fraction * (last - first)))
+    span = max(1, int(radius / FRAME_SECONDS))
+    lo, hi = max(first, target - span), min(energy.size, target + span + 1)
+    best = quietest_frame(energy, lo, hi) if hi > lo else target
+    return best * FRAME_BYTES
@@ -1,6 +1,20 @@
-from .groq import GroqTranscriber
-from .deepgram import DeepgramTranscriber, HAS_DEEPGRAM
-from .google import GoogleTranscriber, HAS_GOOGLE_SPEECH
-from .mock import MockTranscriber
+import importlib
+from typing import Any
 
-__all__ = ["GroqTranscriber", "DeepgramTranscriber", "GoogleTranscriber", "MockTranscriber", "HAS_DEEPGRAM", "HAS_GOOGLE_SPEECH"]
+_LAZY_EXPORTS = {
+    "GroqTranscriber": ".groq",
+    "DeepgramTranscriber": ".deepgram", "HAS_DEEPGRAM": ".deepgram",
+    "GoogleTranscriber": ".google", "HAS_GOOGLE_SPEECH": ".google",
+    "MockTranscriber": ".mock",
+}
+
+__all__ = [
+    "GroqTranscriber", "DeepgramTranscriber", "GoogleTranscriber", "MockTranscriber",
+    "HAS_DEEPGRAM", "HAS_GOOGLE_SPEECH",
+]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,12 @@
 # Path: src/cabin_app/services/stt/deepgram.py
 import logging
 import io
-import wave
 import asyncio
+from functools import lru_cache
 from cabin_app.config import get_settings
-from ..base import Transcriber
+from cabin_app.tracing import span
+from cabin_app.executor import offload
+from ..base import Transcriber, encode_wav
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -19,7 +21,19 @@ except Exception as e:
     logger.error(f"Unexpected error importing deepgram: {e}")
     HAS_DEEPGRAM = False
 
+
+@lru_cache(maxsize=1)
+def get_client() -> "DeepgramClient":
+    """Một client dùng chung cho mọi session"""
+    try:
+        return DeepgramClient(api_key=settings.DEEPGRAM_API_KEY)
+    except TypeError:
+        return DeepgramClient()
+
+
 class DeepgramTranscriber(Transcriber):
+    __slots__ = ("client", "model")
+
     def __init__(self, buffer_duration: float = 5.0, **kwargs):
         super().__init__(buffer_duration, **kwargs)
         
@@ -29,27 +43,23 @@ class DeepgramTranscriber(Transcriber):
         if not settings.DEEPGRAM_API_KEY:
             logger.warning("⚠️ DEEPGRAM_API_KEY missing!")
         
-        try:
-            self.client = DeepgramClient(api_key=settings.DEEPGRAM_API_KEY)
-        except TypeError:
-             self.client = DeepgramClient()
+        self.client = get_client()
 
         self.model = settings.DEEPGRAM_MODEL
 
+    @classmethod
+    def is_available(cls) -> bool:
+        return HAS_DEEPGRAM and bool(settings.DEEPGRAM_API_KEY)
+
     async def _transcribe(self, audio_data: bytes) -> str:
         try:
-            wav_buffer = io.BytesIO()
-            with wave.open(wav_buffer, 'wb') as wf:
-                wf.setnchannels(settings.CHANNELS)
-                wf.setsampwidth(2)
-                wf.setframerate(settings.RATE)
-                wf.writeframes(audio_data)
-            wav_buffer.seek(0)
+            with span("encode", format="wav"):
+                wav_buffer = io.BytesIO(await offload(encode_wav, audio_data))
             
             options = {
                 "model": self.model,
                 "smart_format": True,
-                "language": "en"
+                "language": self.language
             }
 
             response = await asyncio.to_thread(
@@ -1,5 +1,7 @@
 # Path: src/cabin_app/services/stt/google.py
+import asyncio
 import logging
+from functools import lru_cache
 from cabin_app.config import get_settings
 from ..base import Transcriber
 
@@ -12,7 +14,17 @@ try:
 except ImportError:
     HAS_GOOGLE_SPEECH = False
 
+
+@lru_cache(maxsize=1)
+def get_client() -> "speech.SpeechClient":
+    """Một client (gRPC channel) dùng chung cho mọi session"""
+    return speech.SpeechClient()
+
 class GoogleTranscriber(Transcriber):
+    __slots__ = ("client", "config")
+    model = "latest_long"
+    language = "en-US"
+
     def __init__(self, buffer_duration: float = 5.0, **kwargs):
         super().__init__(buffer_duration, **kwargs)
         
@@ -20,26 +32,33 @@ class GoogleTranscriber(Transcriber):
             raise ImportError("Please install google-cloud-speech: pip install google-cloud-speech")
         
         try:
-            self.client = speech.SpeechClient()
+            self.client = get_client()
             self.config = speech.RecognitionConfig(
                 encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
                 sample_rate_hertz=settings.RATE,
-                language_code="en-US",
-                model="latest_long" 
+                language_code=self.language,
+                model=self.model
             )
         except Exception as e:
             logger.error(f"❌ Google Cloud STT Init Failed (Check JSON Key): {e}")
             self.client = None # Mark as failed
 
+    @classmethod
+    def is_available(cls) -> bool:
+        return HAS_GOOGLE_SPEECH  # Google Client tự tìm Credential
+
     async def _transcribe(self, audio_data: bytes) -> str:
         if not self.client:
             return "[Lỗi Auth Google STT]"
 
         try:
             audio = speech.RecognitionAudio(content=audio_data)
-            # Synchronous call (blocking), consider running in executor if slow
-            response = self.client.recognize(config=self.config, audio=audio)
-            
+            # SDK chỉ có API đồng bộ (gRPC blocking):
+            # chạy trong thread để không giữ event loop
+            response = await asyncio.to_thread(
+                self.client.recognize, config=self.config, audio=audio
+            )
+
             transcript = ""
             for result in response.results:
                 transcript += result.alternatives[0].transcript + " "
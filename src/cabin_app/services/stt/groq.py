@@ -1,40 +1,48 @@
 # Path: src/cabin_app/services/stt/groq.py
 import logging
 import io
-import wave
+from functools import lru_cache
 from groq import AsyncGroq
 from cabin_app.config import get_settings
-from ..base import Transcriber
+from cabin_app.tracing import span
+from cabin_app.executor import offload
+from ..base import Transcriber, encode_wav
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+
+@lru_cache(maxsize=1)
+def get_client() -> AsyncGroq:
+    """Một client (connection pool) dùng chung cho mọi session"""
+    return AsyncGroq(api_key=settings.GROQ_API_KEY)
+
 class GroqTranscriber(Transcriber):
+    __slots__ = ("client", "model")
+
     def __init__(self, buffer_duration: float = 5.0, **kwargs):
         super().__init__(buffer_duration, **kwargs)
         
         if not settings.GROQ_API_KEY:
             logger.warning("⚠️ GROQ_API_KEY missing! STT will fail.")
-        self.client = AsyncGroq(api_key=settings.GROQ_API_KEY)
+        self.client = get_client()
         self.model = settings.GROQ_STT_MODEL 
 
+    @classmethod
+    def is_available(cls) -> bool:
+        return bool(settings.GROQ_API_KEY)
+
     async def _transcribe(self, audio_data: bytes) -> str:
         try:
-            wav_buffer = io.BytesIO()
-            with wave.open(wav_buffer, 'wb') as wf:
-                wf.setnchannels(settings.CHANNELS)
-                wf.setsampwidth(2)
-                wf.setframerate(settings.RATE)
-                wf.writeframes(audio_data)
-            
-            wav_buffer.seek(0)
+            with span("encode", format="wav"):
+                wav_buffer = io.BytesIO(await offload(encode_wav, audio_data))
             wav_buffer.name = "audio.wav" 
 
             transcription = await self.client.audio.transcriptions.create(
                 file=wav_buffer,
                 model=self.model,
                 response_format="text",
-                language="en"
+                language=self.language
             )
             return transcription.strip()
         except Exception as e:
@@ -1,11 +1,28 @@
 # Path: src/cabin_app/services/stt/mock.py
-from ..base import Transcriber
+import asyncio
+from cabin_app.config import get_settings
+from cabin_app.executor import offload
+from cabin_app.tracing import span
+from ..base import Transcriber, encode_wav, mock_latency
+
+settings = get_settings()
 
 class MockTranscriber(Transcriber):
+    __slots__ = ("counter",)
+    # Transcript không phụ thuộc audio; load test gửi cùng audio cho mọi session
+    cacheable = False
+
     def __init__(self, buffer_duration: float = 5.0, **kwargs) -> None:
         super().__init__(buffer_duration, **kwargs)
         self.counter = 0
 
     async def _transcribe(self, audio_data: bytes) -> str:
         self.counter += 1
-        return f"This is a simulated sentence number {self.counter} triggered by smart VAD."
\ No newline at end of file
+        # Encode như provider thật (upload WAV) để load test tính cả CPU của bước này
+        with span("encode", format="wav"):
+            await offload(encode_wav, audio_data)
+        await asyncio.sleep(mock_latency(settings.MOCK_STT_LATENCY))
+        return (
+            f"This is a simulated sentence number {self.counter} "
+            "triggered by smart VAD."
+        )
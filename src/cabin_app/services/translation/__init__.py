@@ -1,6 +1,20 @@
-from .groq import GroqTranslator
-from .openai import OpenAITranslator
-from .google import GoogleTranslator, HAS_GOOGLE_GENAI
-from .mock import MockTranslator
+import importlib
+from typing import Any
 
-__all__ = ["GroqTranslator", "OpenAITranslator", "GoogleTranslator", "MockTranslator", "HAS_GOOGLE_GENAI"]
+_LAZY_EXPORTS = {
+    "GroqTranslator": ".groq",
+    "OpenAITranslator": ".openai",
+    "GoogleTranslator": ".google", "HAS_GOOGLE_GENAI": ".google",
+    "MockTranslator": ".mock",
+}
+
+__all__ = [
+    "GroqTranslator", "OpenAITranslator", "GoogleTranslator", "MockTranslator",
+    "HAS_GOOGLE_GENAI",
+]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,10 @@
 # Path: src/cabin_app/services/translation/google.py
 import logging
 import asyncio
-from typing import Dict
+from typing import Any, Dict, Optional
 from cabin_app.config import get_settings
+from cabin_app.tracing import span
+from cabin_app.backpressure import time_left
 from .llm import LLMTranslator
 
 logger = logging.getLogger(__name__)
@@ -18,67 +20,114 @@ except ImportError:
 
 import time
 
+
 class GoogleTranslator(LLMTranslator):
-    def __init__(self, model_name: str = None):
+    def __init__(self, model_name: Optional[str] = None):
+        # Luôn gán đủ attribute: instance thiếu SDK/Key vẫn gọi được _complete
+        # (báo lỗi rõ ràng thay vì AttributeError)
+        self.client: Optional[Any] = None
+        self.model_name = model_name or settings.GOOGLE_MODEL
+
+        # Client-side Rate Limiting (Free Tier ~15 RPM -> Safe 10 RPM -> 6s interval)
+        self.last_call_time = 0.0
+        self.min_interval = 6.0
+
         if not HAS_GOOGLE_GENAI:
-            logger.warning("⚠️ google-genai package missing. Run `pip install google-genai`")
+            logger.warning(
+                "⚠️ google-genai package missing. Run `pip install google-genai`"
+            )
             return
 
         if not settings.GOOGLE_API_KEY:
             logger.warning("⚠️ GOOGLE_API_KEY missing!")
             return
-            
+
         self.client = genai.Client(api_key=settings.GOOGLE_API_KEY)
-        self.model_name = model_name or settings.GOOGLE_MODEL
-        
-        # Client-side Rate Limiting (Free Tier ~15 RPM -> Safe 10 RPM -> 6s interval)
-        self.last_call_time = 0
-        self.min_interval = 6.0 
 
-    async def translate(self, text: str, glossary: Dict[str, str]) -> str:
-        if not HAS_GOOGLE_GENAI or not settings.GOOGLE_API_KEY:
-            return "[Google AI chưa cấu hình]"
+    @classmethod
+    def is_available(cls) -> bool:
+        return HAS_GOOGLE_GENAI and bool(settings.GOOGLE_API_KEY)
+
+    async def _complete(
+        self, system_prompt: str, content: str, json_mode: bool = False
+    ) -> str:
+        if self.client is None:
+            raise RuntimeError(
+                "Google AI chưa cấu hình (thiếu google-genai hoặc GOOGLE_API_KEY)"
+            )
 
-        if not text.strip(): return ""
-        
         # Enforce Rate Limit
         elapsed = time.time() - self.last_call_time
         if elapsed < self.min_interval:
             wait_time = self.min_interval - elapsed
+            left = time_left()
+            if left is not None and wait_time >= left:
+                # Chờ hết throttle thì segment đã quá hạn
+                raise asyncio.TimeoutError()
             # logger.info(f"⏳ Throttling Google API ({wait_time:.1f}s)...")
-            await asyncio.sleep(wait_time)
-            
-        self.last_call_time = time.time() # Update timestamp BEFORE call to count wait time correctly
-        
-        system_instruction = self._build_system_prompt(glossary)
+            with span("throttle", wait=round(wait_time, 2)):
+                await asyncio.sleep(wait_time)
+
+        # Update timestamp BEFORE call to count wait time correctly
+        self.last_call_time = time.time()
+
+        extra = {"response_mime_type": "application/json"} if json_mode else {}
         max_retries = 3
-        
+
         for attempt in range(max_retries):
             try:
                 response = await self.client.aio.models.generate_content(
                     model=self.model_name,
-                    contents=text,
+                    contents=content,
                     config=types.GenerateContentConfig(
-                        system_instruction=system_instruction,
-                        temperature=0.3
+                        system_instruction=system_prompt,
+                        temperature=0.3,
+                        **extra
                     )
                 )
                 return response.text.strip()
-                
+
             except Exception as e:
                 error_msg = str(e)
-                if "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg:
-                    if attempt < max_retries - 1:
-                        wait_time = 5 * (attempt + 1) # Increase backoff: 5s, 10s...
-                        logger.warning(f"⚠️ Google Rate Limit (429). Retrying in {wait_time}s... (Attempt {attempt+1}/{max_retries})")
+                rate_limited = "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg
+                if rate_limited and attempt < max_retries - 1:
+                    wait_time = 5 * (attempt + 1)  # Increase backoff: 5s, 10s...
+                    left = time_left()
+                    if left is not None and wait_time >= left:
+                        # Retry sau deadline vô ích: bỏ luôn,
+                        # nhường Translator cho segment mới hơn
+                        logger.warning(
+                            f"⚠️ Google Rate Limit (429). Backoff {wait_time}s "
+                            "exceeds segment deadline, giving up."
+                        )
+                        raise asyncio.TimeoutError()
+                    logger.warning(
+                        f"⚠️ Google Rate Limit (429). Retrying in {wait_time}s... "
+                        f"(Attempt {attempt+1}/{max_retries})"
+                    )
+                    with span("retry_backoff", attempt=attempt + 1, wait=wait_time):
                         await asyncio.sleep(wait_time)
-                        continue
-                    else:
-                        logger.error(f"❌ Google Gemini Quota Exceeded: {error_msg}")
-                        return "[Lỗi Quota Google - Vui lòng đợi]"
-                
-                # Các lỗi khác (404, 500...)
-                logger.error(f"Google Gemini Error: {e}")
-                return f"[Lỗi dịch]: {text}"
-        
+                    continue
+                raise
+
         return ""
+
+    async def translate(self, text: str, glossary: Dict[str, str]) -> str:
+        if not HAS_GOOGLE_GENAI or not settings.GOOGLE_API_KEY:
+            return "[Google AI chưa cấu hình]"
+
+        if not text.strip(): return ""
+
+        try:
+            return await self._complete(self._build_system_prompt(glossary), text)
+        except asyncio.TimeoutError:
+            raise  # Quá deadline: caller báo "skipped" thay vì hiện lỗi
+        except Exception as e:
+            error_msg = str(e)
+            if "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg:
+                logger.error(f"❌ Google Gemini Quota Exceeded: {error_msg}")
+                return "[Lỗi Quota Google - Vui lòng đợi]"
+
+            # Các lỗi khác (404, 500...)
+            logger.error(f"Google Gemini Error: {e}")
+            return f"[Lỗi dịch]: {text}"
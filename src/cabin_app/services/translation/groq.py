@@ -1,6 +1,6 @@
 # Path: src/cabin_app/services/translation/groq.py
 import logging
-from typing import Dict
+from typing import Any, Dict, Optional
 from groq import AsyncGroq
 from cabin_app.config import get_settings
 from .llm import LLMTranslator
@@ -9,25 +9,34 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 
 class GroqTranslator(LLMTranslator):
-    def __init__(self):
+    def __init__(self, model_name: Optional[str] = None):
         if not settings.GROQ_API_KEY:
             logger.warning("⚠️ GROQ_API_KEY missing! Translation will fail.")
         self.client = AsyncGroq(api_key=settings.GROQ_API_KEY)
-        self.model = settings.GROQ_MODEL
+        self.model = model_name or settings.GROQ_MODEL
+
+    async def _complete(
+        self, system_prompt: str, content: str, json_mode: bool = False
+    ) -> str:
+        extra: Dict[str, Any] = (
+            {"response_format": {"type": "json_object"}} if json_mode else {}
+        )
+        chat_completion = await self.client.chat.completions.create(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": content}
+            ],
+            model=self.model,
+            temperature=0.3,
+            max_tokens=1024,
+            **extra
+        )
+        return chat_completion.choices[0].message.content.strip()
 
     async def translate(self, text: str, glossary: Dict[str, str]) -> str:
         if not text.strip(): return ""
         try:
-            chat_completion = await self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": self._build_system_prompt(glossary)},
-                    {"role": "user", "content": text}
-                ],
-                model=self.model,
-                temperature=0.3,
-                max_tokens=1024,
-            )
-            return chat_completion.choices[0].message.content.strip()
+            return await self._complete(self._build_system_prompt(glossary), text)
         except Exception as e:
             logger.error(f"Groq Translate Error: {e}")
             return f"[Lỗi dịch]: {text}"
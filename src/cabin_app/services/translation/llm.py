@@ -1,8 +1,23 @@
 # Path: src/cabin_app/services/translation/llm.py
+import abc
+import asyncio
 import json
-from typing import Dict
+import logging
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
 from ..base import Translator
-from cabin_app.prompts import SYSTEM_PROMPT_TEMPLATE
+from cabin_app.prompts import (
+    SYSTEM_PROMPT_TEMPLATE, BATCH_PROMPT_SUFFIX, MEMORY_HINT_PROMPT_SUFFIX
+)
+
+logger = logging.getLogger(__name__)
+
+# Gợi ý từ Translation Memory cho request hiện tại.
+# ContextVar (theo task) vì Translator dùng chung giữa các session
+_memory_hint: ContextVar[Optional[Tuple[str, str]]] = ContextVar(
+    "memory_hint", default=None
+)
+
 
 class LLMTranslator(Translator):
     def _build_system_prompt(self, glossary: Dict[str, str]) -> str:
@@ -11,4 +26,79 @@ class LLMTranslator(Translator):
         sử dụng template từ cabin_app.prompts
         """
         glossary_text = json.dumps(glossary, ensure_ascii=False, indent=2)
-        return SYSTEM_PROMPT_TEMPLATE.format(glossary_json=glossary_text)
\ No newline at end of file
+        prompt = SYSTEM_PROMPT_TEMPLATE.format(glossary_json=glossary_text)
+        hint = _memory_hint.get()
+        if hint is not None:
+            prompt += MEMORY_HINT_PROMPT_SUFFIX.format(source=hint[0], target=hint[1])
+        return prompt
+
+    async def translate_with_hint(
+        self, text: str, glossary: Dict[str, str], source: str, target: str
+    ) -> str:
+        """
+        Dịch `text` kèm một cặp (source, target) gần giống đã dịch trước đó
+        làm gợi ý
+        """
+        token = _memory_hint.set((source, target))
+        try:
+            return await self.translate(text, glossary)
+        finally:
+            _memory_hint.reset(token)
+
+    @abc.abstractmethod
+    async def _complete(
+        self, system_prompt: str, content: str, json_mode: bool = False
+    ) -> str:
+        """
+        Gọi API của Provider với một cặp system/user message.
+        json_mode=True yêu cầu Provider trả về JSON (Structured Output).
+        Raise exception khi lỗi để caller tự quyết định cách xử lý.
+        """
+        pass
+
+    async def translate_batch(
+        self, texts: List[str], glossary: Dict[str, str]
+    ) -> List[str]:
+        """
+        Gộp nhiều segment vào MỘT request, yêu cầu output JSON rồi tách lại theo id.
+        Nếu kết quả không hợp lệ thì fallback dịch từng segment.
+        """
+        if len(texts) <= 1:
+            return [await self.translate(text, glossary) for text in texts]
+
+        payload = json.dumps(
+            [{"id": i, "text": text} for i, text in enumerate(texts)],
+            ensure_ascii=False,
+        )
+        system_prompt = self._build_system_prompt(glossary) + BATCH_PROMPT_SUFFIX
+        try:
+            raw = await self._complete(system_prompt, payload, json_mode=True)
+            return self._parse_batch(raw, len(texts))
+        except asyncio.TimeoutError:
+            raise  # Hết deadline: fallback từng segment cũng không kịp
+        except Exception as e:
+            logger.warning(
+                f"⚠️ Batch translation failed ({e}). Fallback to per-segment requests."
+            )
+            return await super().translate_batch(texts, glossary)
+
+    @staticmethod
+    def _parse_batch(raw: str, expected: int) -> List[str]:
+        raw = raw.strip()
+        if raw.startswith("```"):
+            # Bỏ code fence ```json ... ``` nếu model vẫn thêm vào
+            raw = raw.strip("`").removeprefix("json").strip()
+
+        data = json.loads(raw)
+        items = data["translations"] if isinstance(data, dict) else data
+        results: Dict[int, str] = {}
+        for position, item in enumerate(items):
+            if isinstance(item, dict):
+                text = str(item.get("text", "")).strip()
+                results[int(item.get("id", position))] = text
+            else:
+                results[position] = str(item).strip()
+
+        if sorted(results) != list(range(expected)):
+            raise ValueError(f"expected ids 0..{expected - 1}, got {sorted(results)}")
+        return [results[i] for i in range(expected)]
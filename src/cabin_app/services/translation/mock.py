@@ -1,9 +1,19 @@
 # Path: src/cabin_app/services/translation/mock.py
 import asyncio
-from typing import Dict
-from ..base import Translator
+from typing import Dict, List
+from cabin_app.config import get_settings
+from ..base import Translator, mock_latency
+
+settings = get_settings()
 
 class MockTranslator(Translator):
     async def translate(self, text: str, glossary: Dict[str, str]) -> str:
-        await asyncio.sleep(0.1)
+        await asyncio.sleep(mock_latency(settings.MOCK_TRANSLATION_LATENCY))
         return f"[Mock]: {text}"
+
+    async def translate_batch(
+        self, texts: List[str], glossary: Dict[str, str]
+    ) -> List[str]:
+        # Giả lập một request duy nhất cho cả batch
+        await asyncio.sleep(mock_latency(settings.MOCK_TRANSLATION_LATENCY))
+        return [f"[Mock]: {text}" for text in texts]
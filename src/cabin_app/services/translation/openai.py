@@ -1,6 +1,6 @@
 # Path: src/cabin_app/services/translation/openai.py
 import logging
-from typing import Dict
+from typing import Any, Dict, Optional
 from openai import AsyncOpenAI
 from cabin_app.config import get_settings
 from .llm import LLMTranslator
@@ -9,24 +9,33 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 
 class OpenAITranslator(LLMTranslator):
-    def __init__(self):
+    def __init__(self, model_name: Optional[str] = None):
         if not settings.OPENAI_API_KEY:
             logger.warning("⚠️ OPENAI_API_KEY missing!")
         self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.model = settings.OPENAI_MODEL
+        self.model = model_name or settings.OPENAI_MODEL
+
+    async def _complete(
+        self, system_prompt: str, content: str, json_mode: bool = False
+    ) -> str:
+        extra: Dict[str, Any] = (
+            {"response_format": {"type": "json_object"}} if json_mode else {}
+        )
+        response = await self.client.chat.completions.create(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": content}
+            ],
+            model=self.model,
+            temperature=0.3,
+            **extra
+        )
+        return response.choices[0].message.content.strip()
 
     async def translate(self, text: str, glossary: Dict[str, str]) -> str:
         if not text.strip(): return ""
         try:
-            response = await self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": self._build_system_prompt(glossary)},
-                    {"role": "user", "content": text}
-                ],
-                model=self.model,
-                temperature=0.3
-            )
-            return response.choices[0].message.content.strip()
+            return await self._complete(self._build_system_prompt(glossary), text)
         except Exception as e:
             logger.error(f"OpenAI Translate Error: {e}")
             return f"[Lỗi dịch]: {text}"
@@ -0,0 +1,757 @@
+# Path: src/cabin_app/session.py
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi import WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
+
+from cabin_app.config import get_settings
+from cabin_app.audio_sources import AudioSource
+from cabin_app.backpressure import (
+    AudioQueue, SegmentQueue, Segment, OverloadStats, OverloadPolicy,
+    BYTES_PER_SECOND, PAUSE_MARKER, within_deadline,
+)
+from cabin_app.translation_batcher import MicroBatcher
+from cabin_app.session_journal import SessionJournal
+from cabin_app.protocol import MessageChannel
+from cabin_app.services import Transcriber, Translator
+from cabin_app.services.base import AudioChunk
+from cabin_app.tracing import SegmentTrace, activate, span
+from cabin_app.autotune import AutoTuner
+
+settings = get_settings()
+logger = logging.getLogger("CabinServer")
+
+# Session đang mở, cho endpoint introspection (/api/sessions)
+live_sessions: Dict[str, "CabinSession"] = {}
+
+
+def buffer_ceiling(budget: int, partial: bool, queue_seconds: float) -> float:
+    """Buffer lớn nhất vừa ngân sách bộ nhớ khi AudioQueue giữ `queue_seconds` giây"""
+    if budget <= 0:
+        return settings.BUFFER_MAX
+    return (budget / BYTES_PER_SECOND - queue_seconds) / (3 if partial else 2)
+
+
+def plan_memory(buffer: float, partial: bool, budget: int) -> Dict[str, float]:
+    """
+    Chia ngân sách bộ nhớ của session cho các buffer audio (phần chiếm gần hết
+    bộ nhớ). Worst case: buffer của Transcriber + bản copy gửi STT
+    (+ snapshot partial) + AudioQueue.
+    Ưu tiên giữ `buffer` người dùng chọn, thu nhỏ AudioQueue trước (tối thiểu 1s),
+    rồi mới giảm buffer.
+    """
+    copies = 3 if partial else 2
+    queue = settings.AUDIO_QUEUE_MAX_SECONDS
+    if budget > 0:
+        budget_seconds = budget / BYTES_PER_SECOND
+        queue = max(1.0, min(queue, budget_seconds - copies * buffer))
+        ceiling = buffer_ceiling(budget, partial, queue)
+        buffer = max(settings.BUFFER_MIN, min(buffer, ceiling))
+    return {
+        "buffer": buffer,
+        "audio_queue": queue,
+        "worst_case_bytes": int((copies * buffer + queue) * BYTES_PER_SECOND),
+    }
+
+
+class ChannelPipeline:
+    """
+    STT -> SegmentQueue -> Translation của một kênh audio.
+    Source tách kênh (mixer xuất mỗi micro một kênh): mỗi kênh / người nói có VAD,
+    buffer, seq và auto-tuner riêng; Translator, deadline, journal và WebSocket
+    dùng chung của session. Source một kênh có đúng một pipeline.
+    """
+    __slots__ = (
+        "session", "index", "speaker", "transcriber", "audio_queue",
+        "segment_queue", "batcher", "tuner", "buffer_seconds",
+    )
+
+    def __init__(
+        self,
+        session: "CabinSession",
+        index: int,
+        speaker: str,
+        transcriber: Transcriber,
+        queue_seconds: Optional[float],
+        batch: Optional[bool],
+        autotune: bool,
+    ) -> None:
+        self.session = session
+        self.index = index
+        self.speaker = speaker
+        self.transcriber = transcriber
+        self.buffer_seconds = transcriber.buffer_threshold / BYTES_PER_SECOND
+        transcriber.deadline_seconds = session.deadline_seconds
+        transcriber.trace_session = session.id
+        # Mọi kênh nhận cùng chunk interleaved: queue chỉ giữ tham chiếu,
+        # mỗi kênh tự lấy phần của mình
+        channels = session.audio_source.channels
+        self.audio_queue = AudioQueue(session.stats, queue_seconds, channels)
+        self.segment_queue = SegmentQueue(session.stats, session.policy)
+        # Auto-tuning: buffer / silence theo RTT quan sát được,
+        # trong phần ngân sách bộ nhớ của kênh
+        self.tuner: Optional[AutoTuner] = None
+        if autotune:
+            budget = session.memory_budget // channels
+            queue = self.audio_queue
+            queue_seconds = queue.max_bytes / queue.bytes_per_second
+            ceiling = buffer_ceiling(budget, transcriber.partial_enabled, queue_seconds)
+            self.tuner = AutoTuner(
+                self.buffer_seconds, transcriber.vad_silence, ceiling
+            )
+        self.batcher = MicroBatcher(self.segment_queue, enabled=batch)
+
+    async def send(
+        self, payload: Dict, trace: Optional[SegmentTrace] = None, final: bool = False
+    ) -> None:
+        if self.session.multichannel:
+            payload["channel"] = self.index
+        await self.session.send(payload, trace, final)
+
+    async def skip(self, seq: int, stage: str, reason: str) -> None:
+        """
+        Báo Client segment `seq` sẽ không có transcript / bản dịch
+        (quá hạn, bị drop hoặc đã gộp vào segment trước)
+        """
+        if reason == "deadline":
+            self.session.stats.expired_segments += 1
+        await self.send(
+            {"type": "skipped", "seq": seq, "stage": stage, "reason": reason}
+        )
+
+    def record(self, kind: str, segment: Segment, text: str) -> None:
+        journal = self.session.journal
+        if self.session.multichannel:
+            journal.record(
+                kind, segment.seq, text, segment.start, segment.end,
+                self.index, self.speaker,
+            )
+        else:
+            journal.record(kind, segment.seq, text, segment.start, segment.end)
+
+    # --- Tasks ---
+    async def transcribe_audio(self) -> None:
+        session, transcriber, queue = self.session, self.transcriber, self.audio_queue
+        channels = session.audio_source.channels
+        audio_clock = 0.0  # Số giây audio đã đưa vào STT (mốc thời gian cho SRT/VTT)
+        seq = 0
+
+        async def emit(english_text: str) -> None:
+            nonlocal seq
+            seq += 1
+            duration = transcriber.last_segment_duration
+            # Audio mang sang segment sau (cắt theo năng lượng) chưa thuộc segment này
+            end = audio_clock - transcriber.buffered_seconds
+            segment = Segment(
+                english_text, duration, seq=seq, start=end - duration,
+                speech_end=queue.last_captured_at, trace=transcriber.last_trace
+            )
+            if session.deadline_seconds > 0:
+                segment.deadline = segment.speech_end + session.deadline_seconds
+            if segment.trace is not None:
+                segment.trace.seq = seq
+            self.record("transcript", segment, english_text)
+            await self.send({
+                "type": "transcript", "text": english_text, "seq": seq,
+                # Speech end -> transcript
+                "latency": round(time.monotonic() - segment.speech_end, 3),
+            }, segment.trace)
+            if segment.trace is not None:
+                segment.trace.queued_at = time.monotonic()
+            if session.audio_source.live:
+                for discarded, reason in self.segment_queue.put_nowait(segment):
+                    await self.skip(discarded.seq, "translation", reason)
+            else:
+                await self.segment_queue.put(segment)
+
+        async def emit_partial(text: str, stable: str) -> None:
+            # Kết quả tạm thời của segment kế tiếp;
+            # Client thay thế khi có transcript final cùng seq
+            await self.send(
+                {"type": "partial", "text": text, "stable": stable, "seq": seq + 1}
+            )
+
+        async def emit_skipped(stage: str, reason: str) -> None:
+            nonlocal seq
+            # Segment bị bỏ vẫn chiếm một seq để Client biết có một đoạn không hiện
+            seq += 1
+            await self.skip(seq, stage, reason)
+
+        transcriber.on_partial = emit_partial
+        transcriber.on_skipped = emit_skipped
+        if self.tuner is not None:
+            transcriber.on_segment = self.observe_segment
+        try:
+            while (chunk := await queue.get()) is not None:
+                if chunk == PAUSE_MARKER:
+                    if english_text := await transcriber.suspend():
+                        await emit(english_text)
+                    continue
+                audio_clock += len(chunk) / queue.bytes_per_second
+                # Tách kênh: view strided trên chunk interleaved (không copy),
+                # Transcriber gom thẳng vào buffer
+                audio: AudioChunk
+                if channels == 1:
+                    audio = chunk
+                else:
+                    frames = np.frombuffer(chunk, dtype="<i2").reshape(-1, channels)
+                    audio = frames[:, self.index]
+                # STT Processing
+                english_text = await transcriber.process_audio(
+                    audio, queue.last_captured_at
+                )
+
+                if english_text:
+                    await emit(english_text)
+
+            # Source kết thúc (hết file / socket đóng): xử lý nốt phần audio còn lại
+            if english_text := await transcriber.flush():
+                await emit(english_text)
+        finally:
+            self.segment_queue.close()
+
+    async def translate_segments(self) -> None:
+        session = self.session
+        while (segments := await self.batcher.next_batch()) is not None:
+            translator = session.current_translator()
+
+            dequeued = time.monotonic()
+            for segment in segments:
+                if segment.trace is not None:
+                    segment.trace.add(
+                        "translation_queue",
+                        segment.trace.queued_at or dequeued,
+                        dequeued,
+                        batch=len(segments),
+                    )
+            # Segment đã quá hạn khi tới lượt: bỏ luôn, không tốn request
+            for segment in [s for s in segments if s.expired(dequeued)]:
+                await self.skip_translation(segment)
+            segments = [s for s in segments if not s.expired(dequeued)]
+            if not segments:
+                continue
+
+            texts = [segment.text for segment in segments]
+            traces = [s.trace for s in segments if s.trace is not None]
+            provider = type(getattr(translator, "inner", translator)).__name__
+            # Batch chạy tới deadline muộn nhất:
+            # segment mới hơn trong batch vẫn còn giá trị
+            deadline = 0.0
+            if all(s.deadline for s in segments):
+                deadline = max(s.deadline for s in segments)
+            glossary = session.glossary
+            started = time.monotonic()
+            try:
+                translate_span = span(
+                    "translate", batch=len(segments), provider=provider
+                )
+                with activate(*traces), translate_span:
+                    if len(texts) == 1:
+                        translations = [await within_deadline(
+                            translator.translate(texts[0], glossary), deadline
+                        )]
+                    else:
+                        translations = await within_deadline(
+                            translator.translate_batch(texts, glossary), deadline
+                        )
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "⏭️ Translation missed deadline "
+                    f"({session.deadline_seconds:g}s). "
+                    f"Skipped {len(segments)} segment(s)."
+                )
+                for segment in segments:
+                    await self.skip_translation(segment)
+                continue
+            if self.tuner is not None:
+                self.tuner.observe_translation(
+                    time.monotonic() - started, len(segments)
+                )
+
+            for segment, vietnamese_text in zip(segments, translations):
+                self.record("translation", segment, vietnamese_text)
+                await self.send({
+                    "type": "translation", "text": vietnamese_text, "seq": segment.seq,
+                    # Speech end -> translation
+                    "latency": round(time.monotonic() - segment.speech_end, 3),
+                }, segment.trace, final=True)
+
+    async def observe_segment(
+        self,
+        audio_seconds: float,
+        reason: str,
+        stt_seconds: Optional[float],
+        dropped: bool,
+    ) -> None:
+        """
+        Transcriber vừa xử lý một segment: cập nhật auto-tuner,
+        áp dụng và báo Client nếu tham số đổi
+        """
+        tuner = self.tuner
+        if tuner is None:
+            return
+        tuner.observe_backlog(self.audio_queue.backlog_seconds)
+        tuning = tuner.observe_segment(
+            audio_seconds, reason, stt_seconds, dropped
+        )
+        if tuning is None:
+            return
+        self.transcriber.retune(tuning.buffer, tuning.vad_silence)
+        self.buffer_seconds = tuning.buffer
+        logger.info(
+            f"🎛️ Auto-tuned {self.speaker}: buffer {tuning.buffer:g}s "
+            f"| silence {tuning.vad_silence:g}s ({tuning.reason})"
+        )
+        await self.send(tuning.to_dict())
+
+    async def skip_translation(self, segment: Segment) -> None:
+        if segment.trace is not None:
+            segment.trace.close(dropped="deadline")
+        await self.skip(segment.seq, "translation", "deadline")
+
+    # --- Introspection ---
+    def memory_usage(self) -> Dict[str, int]:
+        channels = self.session.audio_source.channels
+        return {
+            "transcriber_buffer": sys.getsizeof(self.transcriber.buffer),
+            # Chunk interleaved dùng chung giữa các kênh: mỗi kênh tính phần của mình
+            "audio_queue": self.audio_queue.nbytes // channels,
+            "segment_queue": self.segment_queue.nbytes,
+        }
+
+    def describe(self) -> Dict[str, object]:
+        return {
+            "channel": self.index,
+            "speaker": self.speaker,
+            "buffer_seconds": round(self.buffer_seconds, 2),
+            "segment_seconds": round(self.transcriber.buffered_seconds, 2),
+            "backlog_seconds": round(self.audio_queue.backlog_seconds, 2),
+            "pending_segments": len(self.segment_queue),
+            "tuning": self.tuner.snapshot() if self.tuner is not None else None,
+        }
+
+
+class CabinSession:
+    """
+    Toàn bộ state của một kết nối /ws/cabin:
+    Capture -> AudioQueue -> STT -> SegmentQueue -> Translation.
+    Pipeline (thread capture + các task) chỉ được khởi động ở lần Resume đầu tiên,
+    nên session đang chờ (viewer chưa bấm Resume) chỉ tốn một task đọc lệnh.
+    Source tách kênh: một lần mở thiết bị, một thread capture,
+    một ChannelPipeline cho mỗi kênh.
+    """
+    __slots__ = (
+        "id", "websocket", "audio_source", "pipelines", "translator",
+        "fallback_factory", "fallback_translator", "glossary", "policy", "stats",
+        "journal", "memory_budget", "pause_event", "stop_capture",
+        "channel", "done", "command_task", "capture_thread", "tasks", "created_at",
+        "deadline_seconds", "capture_state", "command_at", "pause_latency",
+        "release_latency", "resume_latency", "preroll_seconds",
+        "__weakref__",
+    )
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        audio_source: AudioSource,
+        transcribers: Sequence[Transcriber],
+        translator: Translator,
+        fallback_factory: Callable[[str], Translator],
+        glossary: Dict[str, str],
+        overload_policy: Optional[str] = None,
+        batch: Optional[bool] = None,
+        queue_seconds: Optional[float] = None,
+        memory_budget: Optional[int] = None,
+        protocol: Optional[str] = None,
+        deadline: Optional[float] = None,
+        autotune: Optional[bool] = None,
+        speakers: Optional[Sequence[str]] = None,
+    ) -> None:
+        """
+        `transcribers`: một Transcriber cho mỗi kênh của source;
+        `speakers`: nhãn theo kênh (mặc định CH1, CH2...)
+        """
+        if len(transcribers) != audio_source.channels:
+            raise ValueError(
+                f"Expected {audio_source.channels} transcribers (one per channel), "
+                f"got {len(transcribers)}"
+            )
+        self.websocket = websocket
+        self.audio_source = audio_source
+        self.translator = translator
+        self.fallback_factory = fallback_factory
+        self.fallback_translator: Optional[Translator] = None
+        self.glossary = glossary
+        if memory_budget is None:
+            memory_budget = settings.SESSION_MEMORY_BUDGET
+        self.memory_budget = memory_budget
+        # Deadline mặc định chỉ cho source live: file replay cần dịch đủ mọi segment,
+        # trừ khi Client chỉ định `deadline`
+        if deadline is None:
+            deadline = settings.SEGMENT_DEADLINE_SECONDS if audio_source.live else 0.0
+        self.deadline_seconds = deadline
+
+        # Backpressure: Capture -> AudioQueue -> STT -> SegmentQueue -> Translation
+        # (mỗi kênh một bộ queue)
+        self.stats = OverloadStats()
+        self.policy = OverloadPolicy.parse(overload_policy)
+        self.journal = SessionJournal()
+        self.id = self.journal.session_id
+        autotune = settings.AUTOTUNE_ENABLED if autotune is None else autotune
+        labels = list(speakers or [])
+        labels += [""] * (len(transcribers) - len(labels))
+        self.pipelines = [
+            ChannelPipeline(
+                self, index, labels[index] or f"CH{index + 1}",
+                transcriber, queue_seconds, batch, autotune,
+            )
+            for index, transcriber in enumerate(transcribers)
+        ]
+
+        # Pause Control: thread capture đọc trực tiếp.
+        # Default to PAUSED state (event not set)
+        self.pause_event = threading.Event()
+        self.stop_capture = threading.Event()
+        self.channel = MessageChannel(websocket, protocol)
+        self.done = asyncio.Event()  # Client ngắt kết nối hoặc pipeline đã xử lý hết
+        self.command_task: Optional[asyncio.Task] = None
+        self.capture_thread: Optional[threading.Thread] = None
+        self.tasks: List[asyncio.Task] = []
+        self.created_at = time.time()
+
+        # Pause/Resume: thread capture cập nhật
+        # (đo từ lúc nhận lệnh, cho /api/sessions và benchmark)
+        # idle | running | standby (Pause, mic vẫn chạy, giữ pre-roll) | released
+        self.capture_state = "idle"
+        self.command_at = 0.0  # time.monotonic() lúc nhận lệnh pause/resume gần nhất
+        # Lệnh pause -> audio ngừng vào pipeline
+        self.pause_latency: Optional[float] = None
+        # Lệnh pause -> source đã dừng capture
+        self.release_latency: Optional[float] = None
+        # Lệnh resume -> chunk đầu tiên vào AudioQueue
+        self.resume_latency: Optional[float] = None
+        # Audio pre-roll đã đưa vào pipeline ở lần Resume gần nhất
+        self.preroll_seconds = 0.0
+
+    @property
+    def multichannel(self) -> bool:
+        return len(self.pipelines) > 1
+
+    @property
+    def transcriber(self) -> Transcriber:
+        return self.pipelines[0].transcriber
+
+    @property
+    def audio_queue(self) -> AudioQueue:
+        return self.pipelines[0].audio_queue
+
+    def current_translator(self) -> Translator:
+        """Translator chính, hoặc fallback (rẻ hơn) khi session đang quá tải"""
+        if not self.stats.degraded:
+            return self.translator
+        if self.fallback_translator is None:
+            self.fallback_translator = self.fallback_factory(
+                settings.OVERLOAD_FALLBACK_PROVIDER
+            )
+        return self.fallback_translator
+
+    # --- Lifecycle ---
+    async def run(self) -> None:
+        live_sessions[self.id] = self
+        queue = self.audio_queue
+        try:
+            await self.send({
+                "type": "session", "id": self.id,
+                "buffer": round(self.pipelines[0].buffer_seconds, 2),
+                "audio_queue": round(queue.max_bytes / queue.bytes_per_second, 2),
+                "memory_budget": self.memory_budget,
+                "deadline": self.deadline_seconds,
+                "autotune": self.pipelines[0].tuner is not None,
+                "channels": [
+                    {"channel": p.index, "speaker": p.speaker} for p in self.pipelines
+                ],
+            })
+            self.command_task = asyncio.create_task(self.listen_for_commands())
+            await self.done.wait()
+            for task in (self.command_task, *self.tasks):
+                if task.done() and not task.cancelled():
+                    exc = task.exception()
+                    if exc is not None:
+                        raise exc
+        except WebSocketDisconnect:
+            logger.info("Disconnected")
+        except Exception as e:
+            logger.error(f"WS Error: {e}")
+        finally:
+            await self.close()
+
+    def start_pipeline(self) -> None:
+        if self.capture_thread is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self.capture_thread = threading.Thread(
+            target=self.capture_audio, args=(loop,), name="cabin-capture", daemon=True
+        )
+        self.capture_thread.start()
+        translating = [
+            asyncio.create_task(p.translate_segments()) for p in self.pipelines
+        ]
+        self.tasks = [
+            *(asyncio.create_task(p.transcribe_audio()) for p in self.pipelines),
+            *translating,
+            asyncio.create_task(self.report_overload()),
+        ]
+        # Kết thúc session khi mọi kênh đã dịch hết (source kết thúc / lỗi)
+        finished = asyncio.gather(*translating, return_exceptions=True)
+        finished.add_done_callback(lambda _: self.done.set())
+
+    async def close(self) -> None:
+        live_sessions.pop(self.id, None)
+        self.stop_capture.set()
+        self.pause_event.set()  # Đánh thức thread capture đang chờ Resume
+        if self.command_task is not None:
+            self.command_task.cancel()
+        for task in self.tasks:
+            task.cancel()
+        if self.capture_thread is not None:
+            await asyncio.to_thread(self.capture_thread.join, 0.5)
+        if self.capture_thread is None or self.capture_thread.is_alive():
+            # Chưa từng Resume, hoặc source đang block (socket recv, mic read):
+            # đóng để giải phóng
+            self.audio_source.close()
+            if self.capture_thread is not None:
+                await asyncio.to_thread(self.capture_thread.join, 1.0)
+        self.journal.close()
+        if self.websocket.client_state == WebSocketState.CONNECTED:
+            # Pipeline tự kết thúc (hết file replay / source lỗi):
+            # gửi nốt rồi đóng kết nối chủ động
+            try:
+                await self.channel.drain()
+                await self.websocket.close()
+            except Exception:
+                pass
+        if self.stats.dropped_audio_seconds:
+            logger.warning(
+                f"⚠️ Session dropped {self.stats.dropped_audio_seconds:.1f}s of audio "
+                f"({self.stats.dropped_segments} segments)"
+            )
+
+    async def send(
+        self, payload: Dict, trace: Optional[SegmentTrace] = None, final: bool = False
+    ) -> None:
+        await self.channel.send(payload, trace, final)
+
+    # --- Tasks ---
+    async def listen_for_commands(self) -> None:
+        """Task chạy nền để nhận lệnh từ Client (Pause/Resume)"""
+        try:
+            async for raw_msg in self.websocket.iter_json():
+                command = raw_msg.get("command")
+                if command == "pause":
+                    self.pause()
+                    logger.info("⏸️ Paused")
+                    await self.send({"type": "status", "paused": True})
+                elif command == "resume":
+                    self.resume()
+                    logger.info("▶️ Resumed")
+                    await self.send({"type": "status", "paused": False})
+        except Exception:
+            pass
+        finally:
+            self.done.set()
+
+    def pause(self) -> None:
+        self.command_at = time.monotonic()
+        self.pause_event.clear()
+
+    def resume(self) -> None:
+        self.command_at = time.monotonic()
+        self.pause_event.set()
+        self.start_pipeline()
+
+    def capture_audio(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Chạy trên thread riêng: đọc audio source liên tục, không bao giờ phải chờ STT.
+        Pause (source live): giữ mic chạy PAUSE_RELEASE_AFTER giây với pre-roll
+        PAUSE_PREROLL_SECONDS (Resume ngay sau đó không mất từ đầu tiên),
+        rồi suspend() source: thread chỉ chờ Resume, không tốn CPU.
+        """
+        source = self.audio_source
+        chunk_seconds = settings.CHUNK_SIZE / settings.RATE
+        preroll_chunks = round(settings.PAUSE_PREROLL_SECONDS / chunk_seconds)
+        preroll: Deque[Tuple[bytes, float]] = deque(maxlen=max(0, preroll_chunks))
+        paused_at = 0.0  # 0 = đang chạy
+        self.capture_state = "running"
+        audio_generator = source.chunks()
+        try:
+            for chunk in audio_generator:
+                if self.stop_capture.is_set():
+                    break
+                now = time.monotonic()
+                if not source.live:
+                    # Source không live (file replay):
+                    # chờ Resume và chờ queue có chỗ, không drop
+                    if not self.pause_event.is_set():
+                        self._enter_pause(loop, now)
+                        self.pause_event.wait()  # close() cũng set event để đánh thức
+                        if self.stop_capture.is_set():
+                            return
+                        self.resume_latency = time.monotonic() - self.command_at
+                        self.capture_state = "running"
+                    asyncio.run_coroutine_threadsafe(
+                        self._put_all(chunk, time.monotonic()), loop
+                    ).result()
+                    continue
+
+                if self.pause_event.is_set():
+                    if paused_at:
+                        # Vừa Resume: pre-roll (audio ngay trước lúc bấm Resume)
+                        # vào pipeline trước
+                        for item in preroll:
+                            loop.call_soon_threadsafe(self._put_all_nowait, *item)
+                        self.preroll_seconds = len(preroll) * chunk_seconds
+                        preroll.clear()
+                        self.resume_latency = now - self.command_at
+                        self.capture_state = "running"
+                        paused_at = 0.0
+                    loop.call_soon_threadsafe(self._put_all_nowait, chunk, now)
+                    continue
+
+                if not paused_at:
+                    paused_at = now
+                    self._enter_pause(loop, now)
+                preroll.append((chunk, now))
+                paused_long = now - paused_at >= settings.PAUSE_RELEASE_AFTER
+                if paused_long and source.suspend():
+                    # Pause lâu: dừng hẳn thiết bị;
+                    # pre-roll cũ không còn là "ngay trước Resume"
+                    preroll.clear()
+                    self.release_latency = time.monotonic() - self.command_at
+                    self.capture_state = "released"
+                    logger.info(
+                        f"🎤 Capture released after {now - paused_at:.1f}s paused"
+                    )
+                    self.pause_event.wait()
+                    if self.stop_capture.is_set():
+                        break
+                    source.resume()
+        except Exception as e:
+            logger.error(f"Capture Error: {e}")
+        finally:
+            self.capture_state = "stopped"
+            audio_generator.close()
+            source.close()
+            try:
+                loop.call_soon_threadsafe(self._close_queues)
+            except RuntimeError:
+                pass  # Event loop đã đóng
+
+    def _enter_pause(self, loop: asyncio.AbstractEventLoop, now: float) -> None:
+        """Thread capture: báo STT gửi nốt segment đang dở và trả buffer"""
+        self.pause_latency = now - self.command_at
+        self.capture_state = "standby"
+        loop.call_soon_threadsafe(self._put_all_nowait, PAUSE_MARKER, now)
+
+    # Event loop: mỗi chunk capture được (interleaved) đi vào queue của mọi kênh
+    def _put_all_nowait(self, chunk: bytes, captured_at: float) -> None:
+        for pipeline in self.pipelines:
+            pipeline.audio_queue.put_nowait(chunk, captured_at)
+
+    async def _put_all(self, chunk: bytes, captured_at: float) -> None:
+        for pipeline in self.pipelines:
+            await pipeline.audio_queue.put(chunk, captured_at)
+
+    def _close_queues(self) -> None:
+        for pipeline in self.pipelines:
+            pipeline.audio_queue.close()
+
+    async def report_overload(self) -> None:
+        """Báo cho Client khi session bị trễ hoặc có audio bị drop"""
+        stats = self.stats
+        last_report = stats.to_dict()
+        while True:
+            await asyncio.sleep(settings.OVERLOAD_REPORT_INTERVAL)
+            backlog = max(p.audio_queue.backlog_seconds for p in self.pipelines)
+            stats.behind = (
+                backlog >= settings.AUDIO_BEHIND_SECONDS
+                or any(p.segment_queue.is_full for p in self.pipelines)
+                or stats.degraded
+            )
+            report = stats.to_dict()
+            if report == last_report:
+                continue
+            if report["behind"] != last_report["behind"]:
+                logger.warning(
+                    f"⚠️ Session behind: {stats.behind} "
+                    f"| Dropped: {report['dropped_seconds']}s "
+                    f"| Policy: {self.policy.value}"
+                )
+            last_report = report
+            await self.send({
+                "type": "overload",
+                "policy": self.policy.value,
+                "backlog_seconds": round(backlog, 2),
+                "pending_segments": sum(len(p.segment_queue) for p in self.pipelines),
+                **report
+            })
+
+    # --- Introspection ---
+    def memory_usage(self) -> Dict[str, int]:
+        """Bộ nhớ đang giữ bởi các buffer của session (bytes, đã cấp phát)"""
+        usage = {"transcriber_buffer": 0, "audio_queue": 0, "segment_queue": 0}
+        for pipeline in self.pipelines:
+            for key, value in pipeline.memory_usage().items():
+                usage[key] += value
+        usage["total"] = sum(usage.values())
+        return usage
+
+    def describe(self) -> Dict[str, object]:
+        if self.capture_thread is None:
+            state = "idle"
+        else:
+            state = "running" if self.pause_event.is_set() else "paused"
+
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return None if seconds is None else round(seconds * 1000, 1)
+        return {
+            "id": self.id,
+            "state": state,
+            "source": self.audio_source.describe(),
+            "stt": type(self.transcriber).__name__,
+            "translator": type(
+                getattr(self.translator, "inner", self.translator)
+            ).__name__,
+            "policy": self.policy.value,
+            "protocol": self.channel.protocol,
+            "capture": {
+                "state": self.capture_state,
+                "pause_ms": ms(self.pause_latency),
+                "release_ms": ms(self.release_latency),
+                "resume_ms": ms(self.resume_latency),
+                "preroll_ms": ms(self.preroll_seconds),
+            },
+            "uptime": round(time.time() - self.created_at, 1),
+            **{
+                key: value
+                for key, value in self.pipelines[0].describe().items()
+                if key not in ("channel", "speaker")
+            },
+            "backlog_seconds": round(
+                max(p.audio_queue.backlog_seconds for p in self.pipelines), 2
+            ),
+            "pending_segments": sum(len(p.segment_queue) for p in self.pipelines),
+            "audio_queue_max_bytes": self.audio_queue.max_bytes,
+            "channels": (
+                [p.describe() for p in self.pipelines] if self.multichannel else None
+            ),
+            "memory": self.memory_usage(),
+            "memory_budget": self.memory_budget,
+            "overload": self.stats.to_dict(),
+        }
@@ -0,0 +1,282 @@
+# Path: src/cabin_app/session_journal.py
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Dict, List, Optional, Tuple
+
+from cabin_app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+SESSION_ID_PATTERN = re.compile(r"^[\w-]{1,64}$")
+
+_CLOSE = "__close__"  # Record nội bộ: đóng file của session
+
+
+def journal_dir() -> Path:
+    return Path(settings.JOURNAL_DIR) if settings.JOURNAL_DIR else ROOT_DIR / "journal"
+
+
+def new_session_id() -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+class JournalWriter:
+    """
+    Background writer dùng chung cho mọi session.
+    Event loop chỉ đẩy record vào queue (không bao giờ chạm file);
+    thread này gom record theo batch, ghi append-only JSONL, fsync định kỳ và xoay file.
+    """
+    def __init__(self, directory: Optional[Path] = None) -> None:
+        self.directory = directory or journal_dir()
+        self._queue: "queue.SimpleQueue[Tuple[str, Dict]]" = queue.SimpleQueue()
+        self._files: Dict[str, IO[str]] = {}
+        self._parts: Dict[str, int] = {}
+        self._dirty: Dict[str, IO[str]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_fsync = time.monotonic()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._thread = threading.Thread(
+                target=self._run, name="cabin-journal", daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, session_id: str, record: Dict) -> None:
+        """Non-blocking, an toàn khi gọi từ event loop"""
+        self._queue.put((session_id, record))
+
+    def close_session(self, session_id: str) -> None:
+        self._queue.put((session_id, {"kind": _CLOSE}))
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5.0)
+        self._thread = None
+
+    # --- Writer thread ---
+    def _run(self) -> None:
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._drain()
+            try:
+                self._write(batch)
+                since_fsync = time.monotonic() - self._last_fsync
+                if since_fsync >= settings.JOURNAL_FSYNC_INTERVAL:
+                    self._fsync()
+            except Exception as e:
+                logger.error(f"Journal write error: {e}")
+        self._fsync()
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def _drain(self) -> List[Tuple[str, Dict]]:
+        """Chờ record đầu tiên tối đa một flush interval, sau đó gom phần còn lại"""
+        batch: List[Tuple[str, Dict]] = []
+        try:
+            batch.append(self._queue.get(timeout=settings.JOURNAL_FLUSH_INTERVAL))
+            while len(batch) < settings.JOURNAL_BATCH_MAX:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch: List[Tuple[str, Dict]]) -> None:
+        for session_id, record in batch:
+            if record.get("kind") == _CLOSE:
+                # Session kết thúc: bỏ luôn số part để map không phình theo số session
+                self._close(session_id)
+                self._parts.pop(session_id, None)
+                continue
+            f = self._open(session_id)
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._dirty[session_id] = f
+        for f in self._dirty.values():
+            f.flush()
+
+    def _open(self, session_id: str) -> IO[str]:
+        f = self._files.get(session_id)
+        if f is not None and f.tell() < settings.JOURNAL_MAX_BYTES:
+            return f
+        if f is not None:
+            # Rotation: đóng part hiện tại, mở part mới
+            self._close(session_id)
+            self._parts[session_id] = self._parts.get(session_id, 0) + 1
+        part = self._parts.setdefault(session_id, 0)
+        path = self.directory / f"{session_id}.{part:03d}.jsonl"
+        f = open(path, "a", encoding="utf-8")
+        self._files[session_id] = f
+        return f
+
+    def _close(self, session_id: str) -> None:
+        f = self._files.pop(session_id, None)
+        self._dirty.pop(session_id, None)
+        if f is not None:
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+
+    def _fsync(self) -> None:
+        for f in self._dirty.values():
+            if not f.closed:
+                os.fsync(f.fileno())
+        self._dirty.clear()
+        self._last_fsync = time.monotonic()
+
+
+@lru_cache()
+def get_journal_writer() -> JournalWriter:
+    writer = JournalWriter()
+    writer.start()
+    atexit.register(writer.stop)
+    return writer
+
+
+class SessionJournal:
+    """
+    Ghi transcript/translation của một session,
+    thời gian tính theo audio clock (giây)
+    """
+    __slots__ = ("session_id", "enabled", "_writer")
+
+    def __init__(
+        self, session_id: Optional[str] = None, enabled: Optional[bool] = None
+    ) -> None:
+        self.session_id = session_id or new_session_id()
+        self.enabled = settings.JOURNAL_ENABLED if enabled is None else enabled
+        self._writer = get_journal_writer() if self.enabled else None
+
+    def record(
+        self, kind: str, seq: int, text: str, start: float, end: float,
+        channel: Optional[int] = None, speaker: Optional[str] = None,
+    ) -> None:
+        """
+        `channel` / `speaker`: chỉ có ở session tách kênh
+        (seq đánh riêng theo từng kênh)
+        """
+        if self._writer is None:
+            return
+        record = {
+            "seq": seq,
+            "kind": kind,
+            "start": round(start, 3),
+            "end": round(end, 3),
+            "text": text,
+            "ts": round(time.time(), 3),
+        }
+        if channel is not None:
+            record["channel"] = channel
+            record["speaker"] = speaker
+        self._writer.submit(self.session_id, record)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close_session(self.session_id)
+
+
+# --- Query / Export (chạy trong thread, không gọi trực tiếp trên event loop) ---
+def list_sessions() -> List[Dict]:
+    sessions: Dict[str, Dict] = {}
+    directory = journal_dir()
+    if not directory.exists():
+        return []
+    for path in sorted(directory.glob("*.jsonl")):
+        session_id = path.name.split(".")[0]
+        info = sessions.setdefault(
+            session_id, {"id": session_id, "parts": 0, "bytes": 0}
+        )
+        info["parts"] += 1
+        info["bytes"] += path.stat().st_size
+    return list(sessions.values())
+
+
+def read_session(session_id: str) -> List[Dict]:
+    if not SESSION_ID_PATTERN.match(session_id):
+        raise ValueError(f"Invalid session id: {session_id}")
+    records: List[Dict] = []
+    for path in sorted(journal_dir().glob(f"{session_id}.*.jsonl")):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Dòng cuối có thể bị cắt nếu process chết giữa chừng
+                    continue
+    return records
+
+
+Cue = Tuple[float, float, str, Optional[str]]
+
+
+def _build_cues(records: List[Dict], lang: str) -> List[Cue]:
+    """
+    Gộp transcript + translation theo (kênh, seq) thành danh sách cue
+    (start, end, text, speaker), xếp theo thời gian
+    """
+    cues: Dict[Tuple[int, int], Dict] = {}
+    for r in records:
+        cue = cues.setdefault(
+            (r.get("channel", 0), r["seq"]),
+            {"start": r["start"], "end": r["end"], "speaker": r.get("speaker")},
+        )
+        cue[r["kind"]] = r["text"]
+
+    result: List[Cue] = []
+    for key in sorted(cues, key=lambda k: (cues[k]["start"], k)):
+        cue = cues[key]
+        source, target = cue.get("transcript", ""), cue.get("translation", "")
+        if lang == "source":
+            text = source
+        elif lang == "target":
+            text = target
+        else:
+            text = "\n".join(t for t in (source, target) if t)
+        if text:
+            result.append((cue["start"], cue["end"], text, cue["speaker"]))
+    return result
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    millis = int(round(max(seconds, 0.0) * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def export_srt(records: List[Dict], lang: str = "both") -> str:
+    blocks = []
+    cues = _build_cues(records, lang)
+    for index, (start, end, text, speaker) in enumerate(cues, start=1):
+        if speaker:
+            text = "\n".join(f"{speaker}: {line}" for line in text.split("\n"))
+        timing = f"{_timestamp(start, ',')} --> {_timestamp(end, ',')}"
+        blocks.append(f"{index}\n{timing}\n{text}\n")
+    return "\n".join(blocks)
+
+
+def export_vtt(records: List[Dict], lang: str = "both") -> str:
+    blocks = ["WEBVTT\n"]
+    for start, end, text, speaker in _build_cues(records, lang):
+        if speaker:
+            text = "\n".join(f"<v {speaker}>{line}" for line in text.split("\n"))
+        blocks.append(f"{_timestamp(start, '.')} --> {_timestamp(end, '.')}\n{text}\n")
+    return "\n".join(blocks)
@@ -17,6 +17,10 @@ const silenceSlider = document.getElementById('silence-slider');
 const silenceVal = document.getElementById('silence-val');
 const paddingSlider = document.getElementById('padding-slider');
 const paddingVal = document.getElementById('padding-val');
+const partialToggle = document.getElementById('partial-toggle');
+const autotuneToggle = document.getElementById('autotune-toggle');
+const splitToggle = document.getElementById('split-toggle');
+const speakersInput = document.getElementById('speakers-input');
 
 // Controls
 const pauseBtn = document.getElementById('pause-btn');
@@ -26,8 +30,18 @@ const closeSettings = document.getElementById('close-settings');
 const applyBtn = document.getElementById('apply-btn');
 const refreshBtn = document.getElementById('refresh-models-btn');
 
+// Wire Protocol (xem src/cabin_app/protocol.py)
+const PROTOCOL_JSON = 'cabin.v1';
+const PROTOCOL_BINARY = 'cabin.v2';
+const utf8 = new TextDecoder();
+
 let ws = null;
 let isPaused = true; // Start Paused
+let onlineStatusText = ""; // Status gốc, dùng để khôi phục khi hết trễ
+let sessionId = null; // Journal ID, export qua /api/journal/<id>?format=srt|vtt
+let partialDivs = {}; // Dòng transcript tạm thời theo kênh, bị thay bởi transcript final
+let channelLabels = {}; // Source tách kênh: kênh -> tên người nói (từ message session)
+const SPEAKER_COLORS = ['#64b5f6', '#ffb74d', '#ba68c8', '#4db6ac', '#f06292', '#aed581', '#fff176', '#90a4ae'];
 
 // --- LOCAL STORAGE HELPERS ---
 function saveSettings() {
@@ -37,7 +51,11 @@ function saveSettings() {
         buffer: bufferSlider ? bufferSlider.value : null,
         vad_threshold: vadSlider ? vadSlider.value : null,
         vad_silence: silenceSlider ? silenceSlider.value : null,
-        padding: paddingSlider ? paddingSlider.value : null
+        padding: paddingSlider ? paddingSlider.value : null,
+        partial: partialToggle ? partialToggle.checked : false,
+        autotune: autotuneToggle ? autotuneToggle.checked : false,
+        split: splitToggle ? splitToggle.checked : false,
+        speakers: speakersInput ? speakersInput.value : ""
     };
     localStorage.setItem('cabin_settings', JSON.stringify(settings));
 }
@@ -63,6 +81,10 @@ function loadSavedSettings() {
             silenceSlider.value = s.vad_silence;
             if (silenceVal) silenceVal.innerText = s.vad_silence + "s";
         }
+        if (partialToggle) partialToggle.checked = !!s.partial;
+        if (autotuneToggle) autotuneToggle.checked = !!s.autotune;
+        if (splitToggle) splitToggle.checked = !!s.split;
+        if (speakersInput && s.speakers) speakersInput.value = s.speakers;
         if (s.padding && paddingSlider) {
             paddingSlider.value = s.padding;
             if (paddingVal) paddingVal.innerText = s.padding + "%";
@@ -224,6 +246,10 @@ if (silenceSlider) {
 
 if (providerSelect) providerSelect.addEventListener('change', saveSettings);
 if (sttSelect) sttSelect.addEventListener('change', saveSettings);
+if (partialToggle) partialToggle.addEventListener('change', saveSettings);
+if (autotuneToggle) autotuneToggle.addEventListener('change', saveSettings);
+if (splitToggle) splitToggle.addEventListener('change', saveSettings);
+if (speakersInput) speakersInput.addEventListener('change', saveSettings);
 
 
 if (applyBtn) {
@@ -327,18 +353,28 @@ function connect() {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
     
     const urlParams = new URLSearchParams();
-    if (deviceId) urlParams.append('device_id', deviceId);
+    if (splitToggle && splitToggle.checked) {
+        // Một lần mở thiết bị, mỗi kênh một người nói (pipeline riêng trên server)
+        urlParams.append('source', deviceId ? `mic:${deviceId};split=true` : 'mic;split=true');
+        if (speakersInput && speakersInput.value.trim()) urlParams.append('speakers', speakersInput.value.trim());
+    } else if (deviceId) {
+        urlParams.append('device_id', deviceId);
+    }
     urlParams.append('provider', provider);
     urlParams.append('stt_provider', sttProvider);
     urlParams.append('buffer', bufferSize);
     urlParams.append('vad_threshold', vadThr);
     urlParams.append('vad_silence', vadSil);
+    if (partialToggle && partialToggle.checked) urlParams.append('partial', 'true');
+    if (autotuneToggle && autotuneToggle.checked) urlParams.append('autotune', 'true');
 
     const wsUrl = `${protocol}//${window.location.host}/ws/cabin?${urlParams.toString()}`;
     
     if (statusDiv) statusDiv.innerText = `Connecting...`;
     
-    ws = new WebSocket(wsUrl);
+    // cabin.v2: binary frame gom nhiều message; server cũ / tắt binary sẽ trả lời cabin.v1 (JSON)
+    ws = new WebSocket(wsUrl, [PROTOCOL_BINARY, PROTOCOL_JSON]);
+    ws.binaryType = 'arraybuffer';
 
     ws.onopen = () => {
         // Helper to remove leading emojis (non-word/space chars at start)
@@ -347,8 +383,9 @@ function connect() {
         const aiText = clean(providerSelect.options[providerSelect.selectedIndex].text);
         const sttText = clean(sttSelect.options[sttSelect.selectedIndex].text);
         
+        onlineStatusText = `Online  •  ${sttText}  •  ${aiText}`;
         if (statusDiv) {
-            statusDiv.innerText = `Online  •  ${sttText}  •  ${aiText}`;
+            statusDiv.innerText = onlineStatusText;
             statusDiv.style.color = "#81c784";
         }
         if (isPaused) {
@@ -358,20 +395,16 @@ function connect() {
 
     ws.onmessage = (event) => {
         try {
-            const data = JSON.parse(event.data);
-            if (data.type === 'transcript') {
-                appendMessage(engDiv, data.text, 'eng');
-            } else if (data.type === 'translation') {
-                appendMessage(vieDiv, data.text, 'vie');
-            } else if (data.type === 'error') {
-                appendMessage(engDiv, data.text, 'error');
-            }
+            // Text frame luôn là một JSON message (cả v1 và v2); binary frame là một batch v2
+            const messages = typeof event.data === 'string' ? [JSON.parse(event.data)] : decodeBatch(event.data);
+            messages.forEach(handleMessage);
         } catch (e) {
             console.error(e);
         }
     };
 
     ws.onclose = (e) => {
+        clearPartial();
         if (statusDiv) {
             statusDiv.innerText = `Offline`;
             statusDiv.style.color = "#e57373";
@@ -379,7 +412,172 @@ function connect() {
     };
 }
 
+function handleMessage(data) {
+    if (data.type === 'transcript') {
+        clearPartial(data.channel);
+        appendMessage(engDiv, data.text, 'eng', data.channel);
+    } else if (data.type === 'partial') {
+        updatePartial(data);
+    } else if (data.type === 'translation') {
+        appendMessage(vieDiv, data.text, 'vie', data.channel);
+    } else if (data.type === 'skipped') {
+        showSkipped(data);
+    } else if (data.type === 'error') {
+        appendMessage(engDiv, data.text, 'error');
+    } else if (data.type === 'session') {
+        sessionId = data.id;
+        // Nhãn chỉ hiện khi source có nhiều kênh
+        channelLabels = {};
+        if (data.channels && data.channels.length > 1) {
+            data.channels.forEach(c => { channelLabels[c.channel] = c.speaker; });
+        }
+        if (statusDiv) statusDiv.title = `Session ${sessionId} • /api/journal/${sessionId}?format=srt`;
+        // Server có thể giảm buffer để giữ trong ngân sách bộ nhớ của session
+        if (bufferSlider && bufferVal && data.buffer < parseFloat(bufferSlider.value)) {
+            bufferVal.innerText = data.buffer + "s";
+            bufferVal.title = `Clamped from ${bufferSlider.value}s (session memory budget)`;
+        }
+    } else if (data.type === 'overload') {
+        updateOverloadStatus(data);
+    } else if (data.type === 'tuning') {
+        showTuning(data);
+    }
+}
+
+// --- WIRE PROTOCOL (mirror của src/cabin_app/protocol.py) ---
+// Record = [type: u8][fields]; số nguyên là varint (LEB128), chuỗi là varint độ dài + UTF-8
+// Record 4 (channel) là prefix: record kế tiếp thuộc kênh đó
+function decodeBatch(buffer) {
+    const bytes = new Uint8Array(buffer);
+    const messages = [];
+    let pos = 0;
+    let channel = null;
+
+    const varint = () => {
+        let value = 0, scale = 1, byte;
+        do {
+            byte = bytes[pos++];
+            value += (byte & 0x7f) * scale;
+            scale *= 128;
+        } while (byte >= 0x80);
+        return value;
+    };
+    const string = () => {
+        const size = varint();
+        const text = utf8.decode(bytes.subarray(pos, pos + size));
+        pos += size;
+        return text;
+    };
+
+    while (pos < bytes.length) {
+        const kind = bytes[pos++];
+        if (kind === 4) {
+            channel = varint();
+            continue;
+        }
+        if (kind === 0) {
+            messages.push(JSON.parse(string()));
+        } else if (kind === 1 || kind === 2) {
+            const seq = varint();
+            const latency = varint() / 1000;
+            messages.push({ type: kind === 1 ? 'transcript' : 'translation', seq, latency, text: string() });
+        } else if (kind === 3) {
+            const seq = varint();
+            const text = string();
+            messages.push({ type: 'partial', seq, text, stable: string() });
+        } else {
+            throw new Error(`Unknown record type ${kind}`);
+        }
+        if (channel !== null) {
+            messages[messages.length - 1].channel = channel;
+            channel = null;
+        }
+    }
+    return messages;
+}
+
 // --- HELPERS ---
+function updateOverloadStatus(data) {
+    if (!statusDiv) return;
+    if (data.behind) {
+        const dropped = data.dropped_seconds > 0 ? `  •  ${data.dropped_seconds}s dropped` : "";
+        const mode = data.degraded ? "  •  Fallback AI" : "";
+        statusDiv.innerText = `⚠️ Behind ${data.backlog_seconds}s${dropped}${mode}`;
+        statusDiv.style.color = "#ffb74d";
+    } else {
+        statusDiv.innerText = onlineStatusText;
+        statusDiv.style.color = "#81c784";
+    }
+}
+
+function showTuning(data) {
+    // Giá trị server đang dùng; slider giữ giá trị người dùng chọn (dùng khi kết nối lại)
+    const note = `Auto-tuned (${data.reason})`;
+    if (bufferVal) {
+        bufferVal.innerText = data.buffer + "s";
+        bufferVal.title = note;
+    }
+    if (silenceVal) {
+        silenceVal.innerText = data.vad_silence + "s";
+        silenceVal.title = note;
+    }
+}
+
+function showSkipped(data) {
+    // Segment đã gộp vào segment trước: bản dịch chung sẽ tới, không cần đánh dấu
+    if (data.reason === 'merged') return;
+    const label = data.reason === 'deadline' ? '⏭️ Bỏ qua (quá hạn)' : '⏭️ Bỏ qua (quá tải)';
+    if (data.stage === 'stt') {
+        clearPartial(data.channel);
+        appendMessage(engDiv, label, 'skipped', data.channel);
+    }
+    appendMessage(vieDiv, label, 'skipped', data.channel);
+}
+
+function updatePartial(data) {
+    if (!engDiv) return;
+    const channel = data.channel || 0;
+    if (!data.text) {
+        clearPartial(channel); // Segment bị lọc bỏ
+        return;
+    }
+    let partialDiv = partialDivs[channel];
+    if (!partialDiv) {
+        partialDiv = document.createElement('div');
+        partialDiv.className = 'message eng partial';
+        engDiv.appendChild(partialDiv);
+        partialDivs[channel] = partialDiv;
+    }
+    // Phần đã ổn định hiện rõ, phần tail còn có thể thay đổi hiện mờ
+    const stable = document.createElement('span');
+    stable.className = 'stable';
+    stable.innerText = data.stable;
+    const tail = data.text.slice(data.stable.length);
+    const speaker = speakerLabel(data.channel);
+    partialDiv.replaceChildren(...(speaker ? [speaker] : []), stable, document.createTextNode(tail));
+    scrollToBottom(engDiv);
+}
+
+function clearPartial(channel) {
+    // Không chỉ định kênh (mất kết nối): xóa mọi dòng tạm thời
+    const channels = channel === undefined ? Object.keys(partialDivs) : [channel || 0];
+    channels.forEach(c => {
+        if (partialDivs[c]) {
+            partialDivs[c].remove();
+            delete partialDivs[c];
+        }
+    });
+}
+
+function speakerLabel(channel) {
+    if (channel === undefined || !(channel in channelLabels)) return null;
+    const span = document.createElement('span');
+    span.className = 'speaker';
+    span.style.color = SPEAKER_COLORS[channel % SPEAKER_COLORS.length];
+    span.innerText = channelLabels[channel];
+    return span;
+}
+
 function addSystemSeparator(text) {
     const createSeparator = (msg) => {
         const div = document.createElement('div');
@@ -397,11 +595,16 @@ function addSystemSeparator(text) {
     }
 }
 
-function appendMessage(container, text, className) {
+function appendMessage(container, text, className, channel) {
     if (!container) return;
     const div = document.createElement('div');
     div.className = `message ${className}`;
-    div.innerText = text;
+    const speaker = speakerLabel(channel);
+    if (speaker) {
+        div.append(speaker, document.createTextNode(text));
+    } else {
+        div.innerText = text;
+    }
     container.appendChild(div);
     scrollToBottom(container);
 }
@@ -0,0 +1,171 @@
+# Path: src/cabin_app/stt_cache.py
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+from cabin_app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+
+MODES = ("memory", "disk", "replay")
+# Kết quả lỗi của Transcriber (không được cache);
+# lỗi mạng / API trả về "" nên "" cũng không cache
+ERROR_MARKERS = ("[Lỗi",)
+
+
+def cache_dir() -> Path:
+    if settings.STT_CACHE_DIR:
+        return Path(settings.STT_CACHE_DIR)
+    return ROOT_DIR / "data" / "stt_cache"
+
+
+def audio_key(namespace: str, audio: bytes) -> str:
+    """
+    Key content-addressed: BLAKE2b(namespace + PCM).
+    `namespace` = provider:model:language, cùng audio gửi model khác có thể ra
+    transcript khác. BLAKE2b (hashlib, ~1 GB/s) thay vì hash không mật mã nhanh hơn:
+    key phải giống nhau trên mọi máy để thư mục cache dùng được làm fixture.
+    """
+    digest = hashlib.blake2b(namespace.encode("utf-8"), digest_size=16)
+    digest.update(audio)
+    return digest.hexdigest()
+
+
+class SttCache:
+    """
+    Cache transcript theo hash của segment PCM, đặt trước Transcriber._transcribe
+    (dùng chung mọi session): replay file, benchmark, client kết nối lại, xử lý lại
+    hàng loạt gửi đúng các segment đã gửi -> trả lời tại chỗ.
+    - memory: LRU trong process, giới hạn STT_CACHE_MAX_ENTRIES
+    - disk: thêm một tier trên đĩa, mỗi entry một file JSON
+      <dir>/<key[:2]>/<key>.json (ghi nguyên tử, giữ qua restart)
+    - replay: chỉ đọc tier đĩa như fixture store cho test offline;
+      miss không gọi provider
+    """
+    def __init__(
+        self,
+        mode: str,
+        max_entries: Optional[int] = None,
+        directory: Optional[Path] = None,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(
+                f"STT_CACHE_MODE must be one of {('off',) + MODES}, got {mode!r}"
+            )
+        self.mode = mode
+        self.max_entries = max_entries or settings.STT_CACHE_MAX_ENTRIES
+        self.directory = directory or cache_dir()
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self.stats = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0,
+            "stored": 0, "evicted": 0, "saved_seconds": 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def persistent(self) -> bool:
+        return self.mode != "memory"
+
+    # --- Lookup / Store ---
+    async def lookup(self, key: str, audio_seconds: float = 0.0) -> Optional[str]:
+        """
+        Transcript đã lưu cho key, hoặc None.
+        Tier đĩa chỉ được đọc khi memory miss (trong thread)
+        """
+        text = self._entries.get(key)
+        if text is not None:
+            self._entries.move_to_end(key)
+            self.stats["memory_hits"] += 1
+        elif self.persistent:
+            text = await asyncio.to_thread(self._read, key)
+            if text is not None:
+                self._remember(key, text)
+                self.stats["disk_hits"] += 1
+        if text is None:
+            self.stats["misses"] += 1
+        else:
+            self.stats["saved_seconds"] += audio_seconds
+        return text
+
+    async def store(
+        self, key: str, text: str, namespace: str, audio_seconds: float
+    ) -> None:
+        if not text.strip() or text.startswith(ERROR_MARKERS):
+            return
+        self._remember(key, text)
+        self.stats["stored"] += 1
+        if self.mode == "disk":
+            record = {
+                "namespace": namespace,
+                "text": text,
+                "audio_seconds": round(audio_seconds, 3),
+                "ts": round(time.time(), 3),
+            }
+            try:
+                await asyncio.to_thread(self._write, key, record)
+            except OSError as e:
+                logger.error(f"STT cache write failed: {e}")
+
+    def _remember(self, key: str, text: str) -> None:
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)  # Least recently used
+            self.stats["evicted"] += 1
+
+    # --- Disk tier (chạy trong thread, không gọi trực tiếp trên event loop) ---
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _read(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)["text"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"STT cache entry {key} unreadable: {e}")
+            return None
+
+    def _write(self, key: str, record: Dict) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Ghi file tạm rồi thay thế nguyên tử:
+        # process chết giữa chừng không để lại entry hỏng
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def snapshot(self) -> Dict[str, object]:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            "mode": self.mode,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "directory": str(self.directory) if self.persistent else None,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            **self.stats,
+            "saved_seconds": round(self.stats["saved_seconds"], 1),
+        }
+
+
+@lru_cache(maxsize=1)
+def get_stt_cache() -> Optional[SttCache]:
+    """None khi STT_CACHE_MODE=off"""
+    if settings.STT_CACHE_MODE == "off":
+        return None
+    return SttCache(settings.STT_CACHE_MODE)
@@ -0,0 +1,187 @@
+# Path: src/cabin_app/tracing.py
+import itertools
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from cabin_app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# (pid, trace_id, name, start, end, args): end = None là instant event
+SpanRecord = Tuple[int, int, str, float, Optional[float], Dict[str, Any]]
+
+# Các trace đang active trong task hiện tại (STT request, lời gọi Translator...)
+_active: ContextVar[Tuple["SegmentTrace", ...]] = ContextVar(
+    "segment_traces", default=()
+)
+
+
+class SegmentTrace:
+    """
+    Timeline của một segment, tạo lúc VAD cắt segment: buffer -> STT (encode, request)
+    -> filter -> translation queue -> translate (LLM) -> send.
+    """
+    __slots__ = ("tracer", "pid", "trace_id", "started", "seq", "queued_at")
+
+    def __init__(
+        self, tracer: "Tracer", pid: int, trace_id: int, started: float
+    ) -> None:
+        self.tracer = tracer
+        self.pid = pid
+        self.trace_id = trace_id
+        self.started = started  # Lúc audio đầu tiên của segment vào buffer
+        self.seq = 0  # Gán khi segment có transcript
+        self.queued_at = 0.0  # Lúc vào SegmentQueue
+
+    def add(
+        self, name: str, start: float, end: Optional[float] = None, **args: Any
+    ) -> None:
+        if end is None:
+            end = time.monotonic()
+        self.tracer.record(self.pid, self.trace_id, name, start, end, args)
+
+    def instant(self, name: str, **args: Any) -> None:
+        self.tracer.record(self.pid, self.trace_id, name, time.monotonic(), None, args)
+
+    def close(self, **args: Any) -> None:
+        """Span gốc bao cả segment (từ lúc bắt đầu buffer tới lần gửi cuối cùng)"""
+        self.add("segment", self.started, seq=self.seq, **args)
+
+
+class Tracer:
+    """
+    Ring buffer các span của mọi session (bộ nhớ cố định: TRACE_BUFFER_SPANS),
+    xuất ra Chrome Trace Event JSON (mở bằng ui.perfetto.dev hoặc chrome://tracing).
+    Mỗi session là một process, mỗi segment là một async track (id = trace id)
+    nên các span chồng nhau (send bất đồng bộ, queue) vẫn hiển thị đúng.
+    """
+    def __init__(self, capacity: Optional[int] = None) -> None:
+        self.capacity = capacity or settings.TRACE_BUFFER_SPANS
+        self._spans: Deque[SpanRecord] = deque(maxlen=self.capacity)
+        self._ids = itertools.count(1)
+        # session id -> pid
+        self._sessions: "OrderedDict[str, int]" = OrderedDict()
+        self._pids = itertools.count(1)
+        # Quy đổi monotonic -> wall clock để timeline khớp giờ thật
+        self._wall_offset = time.time() - time.monotonic()
+
+    def new_trace(
+        self, session: str, started: Optional[float] = None
+    ) -> SegmentTrace:
+        if session not in self._sessions:
+            self._sessions[session] = next(self._pids)
+            while len(self._sessions) > 1024:
+                self._sessions.popitem(last=False)
+        return SegmentTrace(
+            self, self._sessions[session], next(self._ids),
+            started or time.monotonic(),
+        )
+
+    def record(
+        self,
+        pid: int,
+        trace_id: int,
+        name: str,
+        start: float,
+        end: Optional[float],
+        args: Dict[str, Any],
+    ) -> None:
+        self._spans.append((pid, trace_id, name, start, end, args))
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+    def export(
+        self, session: Optional[str] = None, seconds: Optional[float] = None
+    ) -> Dict[str, Any]:
+        pid_filter = self._sessions.get(session) if session else None
+        if session and pid_filter is None:
+            return {"traceEvents": [], "displayTimeUnit": "ms"}
+        since = time.monotonic() - seconds if seconds else None
+
+        events: List[Dict[str, Any]] = []
+        pids = set()
+        for pid, trace_id, name, start, end, args in list(self._spans):
+            if pid_filter is not None and pid != pid_filter:
+                continue
+            if since is not None and start < since:
+                continue
+            pids.add(pid)
+            ts = (start + self._wall_offset) * 1e6
+            common = {
+                "name": name, "cat": "segment", "id": trace_id,
+                "pid": pid, "tid": trace_id,
+            }
+            if end is None:
+                events.append({**common, "ph": "n", "ts": ts, "args": args})
+                continue
+            events.append({**common, "ph": "b", "ts": ts, "args": args})
+            events.append({**common, "ph": "e", "ts": (end + self._wall_offset) * 1e6})
+
+        names = {pid: sid for sid, pid in self._sessions.items()}
+        for pid in sorted(pids):
+            events.append({
+                "name": "process_name", "ph": "M", "pid": pid,
+                "args": {"name": f"session {names.get(pid, pid)}"},
+            })
+        events.sort(key=lambda e: e.get("ts", 0))
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "spans": len(self._spans),
+            "capacity": self.capacity,
+            "sessions": len(self._sessions),
+        }
+
+
+@lru_cache()
+def get_tracer() -> Tracer:
+    return Tracer()
+
+
+def new_trace(
+    session: Optional[str], started: Optional[float] = None
+) -> Optional[SegmentTrace]:
+    """
+    Trace mới cho segment vừa cắt, hoặc None nếu tracing tắt
+    / Transcriber không thuộc session nào
+    """
+    if not settings.TRACE_ENABLED or session is None:
+        return None
+    return get_tracer().new_trace(session, started)
+
+
+@contextmanager
+def activate(*traces: Optional[SegmentTrace]) -> Iterator[None]:
+    """
+    Gắn các trace vào task hiện tại:
+    span() ở tầng dưới (provider, translator) sẽ ghi vào chúng
+    """
+    token = _active.set(tuple(t for t in traces if t is not None))
+    try:
+        yield
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def span(name: str, **args: Any) -> Iterator[None]:
+    """Ghi một span vào mọi trace đang active; không làm gì nếu không có trace nào"""
+    traces = _active.get()
+    if not traces:
+        yield
+        return
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        end = time.monotonic()
+        for trace in traces:
+            trace.add(name, start, end, **args)
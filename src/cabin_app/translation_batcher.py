@@ -0,0 +1,72 @@
+# Path: src/cabin_app/translation_batcher.py
+import asyncio
+from typing import List, Optional
+
+from cabin_app.config import get_settings
+from cabin_app.backpressure import Segment, SegmentQueue
+
+settings = get_settings()
+
+
+def estimate_tokens(text: str) -> int:
+    """Ước lượng nhanh số token (~4 ký tự / token), đủ dùng cho ngân sách batch"""
+    return max(1, len(text) // 4)
+
+
+class MicroBatcher:
+    """
+    Gom các segment liên tiếp từ SegmentQueue thành một batch để dịch bằng MỘT request.
+    Batch đóng lại khi hết cửa sổ thời gian, vượt ngân sách token hoặc đủ số segment.
+    Các segment đã nằm sẵn trong queue (ví dụ khi Translator đang bị throttle)
+    được gom ngay, không phải chờ thêm.
+    """
+    __slots__ = ("queue", "window", "max_tokens", "max_segments")
+
+    def __init__(
+        self,
+        queue: SegmentQueue,
+        enabled: Optional[bool] = None,
+        window: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        max_segments: Optional[int] = None,
+    ) -> None:
+        self.queue = queue
+        enabled = settings.TRANSLATION_BATCH_ENABLED if enabled is None else enabled
+        self.window = settings.TRANSLATION_BATCH_WINDOW if window is None else window
+        self.max_tokens = max_tokens or settings.TRANSLATION_BATCH_MAX_TOKENS
+        max_segments = max_segments or settings.TRANSLATION_BATCH_MAX_SEGMENTS
+        self.max_segments = max_segments if enabled else 1
+
+    async def next_batch(self) -> Optional[List[Segment]]:
+        """Trả về batch tiếp theo, hoặc None khi queue đã đóng"""
+        first = await self.queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        tokens = estimate_tokens(first.text)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+
+        while len(batch) < self.max_segments:
+            if len(self.queue) == 0:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    segment = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                segment = await self.queue.get()
+
+            if segment is None:
+                break
+            cost = estimate_tokens(segment.text)
+            if tokens + cost > self.max_tokens:
+                self.queue.unget(segment)
+                break
+            batch.append(segment)
+            tokens += cost
+
+        return batch
@@ -0,0 +1,381 @@
+# Path: src/cabin_app/translation_memory.py
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+import numpy as np
+
+from cabin_app.config import get_settings
+from cabin_app.hallucination_filter import normalize_text
+from cabin_app.services import Translator
+from cabin_app.tracing import span
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+
+# MinHash + LSH: 16 band x 4 row -> cặp có Jaccard ~0.5 trở lên
+# gần như chắc chắn rơi chung một bucket
+NUM_PERM = 64
+BAND_ROWS = 4
+_PRIME = (1 << 31) - 1  # a*x + b vẫn nằm trong uint64 với x là crc32
+_rng = np.random.default_rng(1309)
+_PERM_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+_DIGITS = re.compile(r"\d+")
+# Kết quả lỗi của Translator (không được lưu vào memory)
+ERROR_MARKERS = ("[Lỗi", "[Google AI")
+
+Key = Tuple[str, str]  # (glossary fingerprint, normalized source)
+
+
+def memory_path() -> Path:
+    if settings.TRANSLATION_MEMORY_PATH:
+        return Path(settings.TRANSLATION_MEMORY_PATH)
+    return ROOT_DIR / "data" / "translation_memory.jsonl"
+
+
+def glossary_fingerprint(glossary: Dict[str, str]) -> str:
+    """Bản dịch phụ thuộc glossary: chỉ dùng lại bản dịch tạo ra với cùng glossary"""
+    raw = json.dumps(glossary, ensure_ascii=False, sort_keys=True)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def canonical(text: str) -> str:
+    """
+    Chuẩn hóa để so khớp: như normalize_text nhưng bỏ thêm filler words
+    (um, uh, you know...)
+    """
+    text = f" {normalize_text(text)} "
+    for filler in settings.TRANSLATION_MEMORY_FILLERS:
+        text = text.replace(f" {filler} ", " ")
+    return " ".join(text.split())
+
+
+def shingles(text: str) -> FrozenSet[str]:
+    """Character trigram: bền với lỗi chính tả / biến thể từ của ASR hơn word n-gram"""
+    padded = f" {text} "
+    return frozenset(padded[i:i + 3] for i in range(max(1, len(padded) - 2)))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def minhash(grams: FrozenSet[str]) -> np.ndarray:
+    hashes = np.fromiter(
+        (zlib.crc32(g.encode("utf-8")) for g in grams),
+        dtype=np.uint64,
+        count=len(grams),
+    )
+    return ((np.outer(hashes, _PERM_A) + _PERM_B) % _PRIME).min(axis=0)
+
+
+def band_keys(signature: np.ndarray) -> List[Tuple[int, bytes]]:
+    return [
+        (i, signature[i * BAND_ROWS:(i + 1) * BAND_ROWS].tobytes())
+        for i in range(NUM_PERM // BAND_ROWS)
+    ]
+
+
+@dataclass(slots=True)
+class Entry:
+    source: str
+    target: str
+    context: str  # glossary fingerprint
+    bands: List[Tuple[int, bytes]]
+
+
+@dataclass(slots=True)
+class Match:
+    source: str
+    target: str
+    similarity: float
+    exact: bool = False
+
+    @property
+    def reusable(self) -> bool:
+        threshold = settings.TRANSLATION_MEMORY_REUSE_THRESHOLD
+        return self.exact or self.similarity >= threshold
+
+
+class TranslationMemory:
+    """
+    Bộ nhớ bản dịch dùng chung cho mọi session: (source -> target) đã dịch trước đó.
+    Tra cứu: khớp chính xác sau chuẩn hóa, rồi tìm ứng viên gần giống qua MinHash/LSH
+    và xác nhận bằng Jaccard thật trên character trigram.
+    Giới hạn số entry (LRU), lưu append-only JSONL và compact lại khi file quá dài.
+    """
+    def __init__(
+        self, path: Optional[Path] = None, max_entries: Optional[int] = None
+    ) -> None:
+        self.path = path or memory_path()
+        self.max_entries = max_entries or settings.TRANSLATION_MEMORY_MAX_ENTRIES
+        self._entries: "OrderedDict[Key, Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, bytes], Set[Key]] = {}
+        self._pending: List[Dict] = []  # Record chưa ghi xuống file
+        self._lines = 0  # Số dòng trong file (để biết khi nào cần compact)
+        # load / flush lúc shutdown / ghi nền không chồng nhau
+        self._io_lock = threading.Lock()
+        self._flushing = False
+        self.stats = {
+            "exact": 0, "fuzzy": 0, "hint": 0, "miss": 0, "stored": 0, "evicted": 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- Lookup / Store ---
+    def lookup(self, text: str, glossary: Dict[str, str]) -> Optional[Match]:
+        """
+        Bản dịch tốt nhất đã lưu, hoặc None nếu không có entry nào đạt
+        TRANSLATION_MEMORY_HINT_THRESHOLD
+        """
+        norm = canonical(text)
+        if not norm:
+            return None
+        context = glossary_fingerprint(glossary)
+        key = (context, norm)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            entry = self._entries[key]
+            self.stats["exact"] += 1
+            return Match(entry.source, entry.target, 1.0, exact=True)
+
+        match = self._nearest(norm, context)
+        if match is None:
+            self.stats["miss"] += 1
+        elif match.reusable:
+            self._entries.move_to_end((context, canonical(match.source)))
+            self.stats["fuzzy"] += 1
+        else:
+            self.stats["hint"] += 1
+        return match
+
+    def _nearest(self, norm: str, context: str) -> Optional[Match]:
+        grams = shingles(norm)
+        candidates: Set[Key] = set()
+        for band in band_keys(minhash(grams)):
+            candidates.update(self._buckets.get(band, ()))
+
+        best: Optional[Key] = None
+        best_similarity = 0.0
+        threshold = settings.TRANSLATION_MEMORY_HINT_THRESHOLD
+        for key in candidates:
+            if key[0] != context:
+                continue
+            similarity = jaccard(grams, shingles(key[1]))
+            if similarity >= threshold and similarity > best_similarity:
+                best, best_similarity = key, similarity
+        if best is None:
+            return None
+
+        entry = self._entries[best]
+        short = len(norm) < settings.TRANSLATION_MEMORY_MIN_CHARS
+        if short or _DIGITS.findall(best[1]) != _DIGITS.findall(norm):
+            # Câu ngắn hoặc khác số liệu: chỉ dùng làm gợi ý, không dùng lại nguyên văn
+            ceiling = settings.TRANSLATION_MEMORY_REUSE_THRESHOLD - 1e-6
+            best_similarity = min(best_similarity, ceiling)
+        return Match(entry.source, entry.target, best_similarity)
+
+    def store(self, text: str, translation: str, glossary: Dict[str, str]) -> None:
+        if not translation.strip() or translation.startswith(ERROR_MARKERS):
+            return
+        context = glossary_fingerprint(glossary)
+        if self._add(text, translation, context):
+            self._pending.append({
+                "src": text,
+                "tgt": translation,
+                "ctx": context,
+                "ts": round(time.time(), 3),
+            })
+            self.stats["stored"] += 1
+
+    def _add(self, text: str, translation: str, context: str) -> bool:
+        norm = canonical(text)
+        if not norm:
+            return False
+        key = (context, norm)
+        if key in self._entries:
+            self._remove(key)
+        entry = Entry(text, translation, context, band_keys(minhash(shingles(norm))))
+        self._entries[key] = entry
+        for band in entry.bands:
+            self._buckets.setdefault(band, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))  # Least recently used
+            self.stats["evicted"] += 1
+        return True
+
+    def _remove(self, key: Key) -> None:
+        entry = self._entries.pop(key)
+        for band in entry.bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    # --- Persistence (chạy trong thread, không gọi trực tiếp trên event loop) ---
+    def load(self) -> None:
+        if not self.path.exists():
+            return
+        count = 0
+        with self._io_lock, open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                count += 1
+                try:
+                    record = json.loads(line)
+                    self._add(record["src"], record["tgt"], record["ctx"])
+                except (ValueError, KeyError, TypeError):
+                    continue  # Dòng hỏng (ví dụ ghi dở lúc crash)
+            self._lines = count
+        self.stats["evicted"] = 0
+        logger.info(
+            f"📚 Translation memory: {len(self._entries)} entries from {self.path}"
+        )
+
+    def flush(self) -> None:
+        """Ghi đồng bộ (lúc shutdown, khi event loop không còn chạy)"""
+        pending, self._pending = self._pending, []
+        self._write(pending, self._compaction())
+
+    async def flush_soon(self) -> None:
+        """Ghi các record mới trong thread; bỏ qua nếu đang có một lần ghi khác"""
+        if not self._pending or self._flushing:
+            return
+        # Lấy dữ liệu trên event loop:
+        # thread ghi không bao giờ đọc state đang bị thay đổi
+        pending, self._pending = self._pending, []
+        compacted = self._compaction(len(pending))
+        self._flushing = True
+        try:
+            await asyncio.to_thread(self._write, pending, compacted)
+        except OSError as e:
+            logger.error(f"Translation memory write failed: {e}")
+        finally:
+            self._flushing = False
+
+    def _compaction(self, incoming: int = 0) -> Optional[List[Dict]]:
+        """Snapshot các entry còn giữ (thứ tự LRU) khi file đã dài gấp đôi giới hạn"""
+        if self._lines + incoming <= 2 * self.max_entries:
+            return None
+        return [
+            {"src": e.source, "tgt": e.target, "ctx": e.context}
+            for e in self._entries.values()
+        ]
+
+    def _write(self, pending: List[Dict], compacted: Optional[List[Dict]]) -> None:
+        with self._io_lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if compacted is not None:
+                # Ghi lại toàn bộ file rồi thay thế nguyên tử
+                # (entry đã evict biến mất khỏi file)
+                tmp = self.path.with_suffix(".tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.writelines(_jsonl(compacted))
+                os.replace(tmp, self.path)
+                self._lines = len(compacted)
+            elif pending:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.writelines(_jsonl(pending))
+                self._lines += len(pending)
+
+    def snapshot(self) -> Dict[str, object]:
+        lookups = sum(self.stats[k] for k in ("exact", "fuzzy", "hint", "miss"))
+        reused = self.stats["exact"] + self.stats["fuzzy"]
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "path": str(self.path),
+            "hit_rate": round(reused / lookups, 3) if lookups else 0.0,
+            **self.stats,
+        }
+
+
+def _jsonl(records: List[Dict]) -> List[str]:
+    return [json.dumps(r, ensure_ascii=False) + "\n" for r in records]
+
+
+@lru_cache()
+def get_translation_memory() -> TranslationMemory:
+    return TranslationMemory()
+
+
+class MemoryTranslator(Translator):
+    """
+    Đặt trước một Translator: segment gần giống segment đã dịch thì dùng lại
+    bản dịch (không gọi LLM), khớp một phần thì gửi bản dịch cũ làm gợi ý cho LLM.
+    """
+    def __init__(
+        self, inner: Translator, memory: Optional[TranslationMemory] = None
+    ) -> None:
+        self.inner = inner
+        self.memory = memory if memory is not None else get_translation_memory()
+
+    async def translate(self, text: str, glossary: Dict[str, str]) -> str:
+        if not text.strip():
+            return ""
+        with span("memory_lookup"):
+            match = self.memory.lookup(text, glossary)
+        if match is not None and match.reusable:
+            return match.target
+        return await self._translate_miss(text, glossary, match)
+
+    async def translate_batch(
+        self, texts: List[str], glossary: Dict[str, str]
+    ) -> List[str]:
+        results: List[Optional[str]] = []
+        misses: List[Tuple[int, Optional[Match]]] = []
+        with span("memory_lookup", segments=len(texts)):
+            for i, text in enumerate(texts):
+                match = self.memory.lookup(text, glossary) if text.strip() else None
+                if match is not None and match.reusable:
+                    results.append(match.target)
+                else:
+                    results.append(None)
+                    misses.append((i, match))
+
+        if len(misses) == 1:
+            i, match = misses[0]
+            results[i] = await self._translate_miss(texts[i], glossary, match)
+        elif misses:
+            # Batch không kèm gợi ý: các segment lân cận đã là ngữ cảnh cho nhau
+            with span("llm", segments=len(misses)):
+                translations = await self.inner.translate_batch(
+                    [texts[i] for i, _ in misses], glossary
+                )
+            for (i, _), translation in zip(misses, translations):
+                results[i] = translation
+                self.memory.store(texts[i], translation, glossary)
+            await self.memory.flush_soon()
+        return [r or "" for r in results]
+
+    async def _translate_miss(
+        self, text: str, glossary: Dict[str, str], hint: Optional[Match]
+    ) -> str:
+        with span("llm", hint=hint is not None):
+            if hint is not None and hasattr(self.inner, "translate_with_hint"):
+                translation = await self.inner.translate_with_hint(
+                    text, glossary, hint.source, hint.target
+                )
+            else:
+                translation = await self.inner.translate(text, glossary)
+        self.memory.store(text, translation, glossary)
+        await self.memory.flush_soon()
+        return translation